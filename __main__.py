@@ -1,32 +1,30 @@
 import os
-from dotenv import load_dotenv
-from openai import OpenAI
-from src.app.graph_builder import build_graph
-from src.app.get_communities import get_communities, summarize_communities
-from src.app.graph_nx import build_nx_graph
-from src.app.generating_answers import generate_answer
-from src.app.utils.utils import save_to_pickle
+import time
+import pickle
+import argparse
 
-# Load environment variables
-load_dotenv()
+# Heavy dependencies (langchain, torch, matplotlib) are imported by the command that needs
+# them, so that querying a saved index does not pay for the indexing stack.
 
-# Initialize OpenAI client
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("Missing OPENAI_API_KEY. Please set it in the environment.")
-client = OpenAI(api_key=api_key)
 
-
-def main(file_paths: list[str]) -> tuple:
+def build_index(file_paths: list[str], client=None) -> tuple:
     """
     Extract the graph, identify communities, and summarize them.
 
     Args:
         file_paths (list[str]): List of file paths to be processed.
+        client (OpenAI | None): OpenAI client for summarizing communities. Defaults to the
+            shared client.
 
     Returns:
-        tuple: A tuple containing the NetworkX graph (nx.Graph) and a list of community summaries (list[str]).
+        tuple: The NetworkX graph (nx.Graph), its communities (list[list[str]]) and their
+        summaries (list[str]).
     """
+    from src.app.graph_builder import build_graph
+    from src.app.get_communities import get_communities, summarize_communities
+    from src.app.graph_nx import build_nx_graph
+    from src.app.utils.config import get_openai_client
+
     # Build the graph document from file paths
     graph_document = build_graph(file_paths)
 
@@ -35,29 +33,131 @@ def main(file_paths: list[str]) -> tuple:
 
     # Identify communities and summarize them
     communities = get_communities(graph)
-    community_summaries = summarize_communities(communities, graph, client)
+    community_summaries = summarize_communities(
+        communities, graph, client or get_openai_client()
+    )
+
+    return graph, communities, community_summaries
 
+
+def main(file_paths: list[str], client=None) -> tuple:
+    """
+    Extract the graph, identify communities, and summarize them.
+
+    Args:
+        file_paths (list[str]): List of file paths to be processed.
+        client (OpenAI | None): OpenAI client for summarizing communities. Defaults to the
+            shared client.
+
+    Returns:
+        tuple: A tuple containing the NetworkX graph (nx.Graph) and a list of community summaries (list[str]).
+    """
+    graph, _, community_summaries = build_index(file_paths, client)
     return graph, community_summaries
 
 
+def index_command(args: argparse.Namespace):
+    """Index the documents of a data folder into the files of a session."""
+    from src.app.local_search import build_entity_index
+    from src.app.provenance import build_provenance_index
+    from src.app.session_store import session_files
+    from src.app.summary_index import build_summary_index
+    from src.app.utils.corpus_store import list_documents
+    from src.app.utils.dedup import deduplicate_files
+
+    file_paths, dedup_report = deduplicate_files(list_documents(args.data_folder))
+    print(dedup_report.summary())
+    graph, communities, community_summaries = build_index(file_paths)
+
+    files = session_files(args.session_id)
+    os.makedirs(os.path.dirname(files["graph"]) or ".", exist_ok=True)
+    contents = {
+        "community_summaries": community_summaries,
+        "summary_embeddings": build_summary_index(community_summaries),
+        "graph": graph,
+        "entity_index": build_entity_index(graph),
+        "provenance": build_provenance_index(graph, communities),
+    }
+    for name, content in contents.items():
+        with open(files[name], "wb") as f:
+            pickle.dump(content, f)
+    print(f"Indexed {len(file_paths)} documents into session {args.session_id}")
+
+
+def query_command(args: argparse.Namespace):
+    """Answer a query from the saved index of a session, with global search."""
+    from src.app.generating_answers import (
+        NO_INFORMATION_ANSWER,
+        generate_answer,
+        generate_formatted_answer,
+        render_formatted_answer,
+    )
+    from src.app.session_store import load_session_index
+    from src.app.utils.config import get_openai_client
+
+    start_time = time.perf_counter()
+    session = load_session_index(args.session_id)
+    precomputed = session.precomputed_answer(
+        args.query, "Global", args.answer_mode, args.top_k
+    )
+    if precomputed is not None:
+        answer, _ = precomputed
+    elif args.answer_mode == "Single pass":
+        formatted_answer = generate_formatted_answer(
+            session.community_summaries,
+            args.query,
+            get_openai_client(),
+            summary_embeddings=session.summary_embeddings,
+            top_k=args.top_k,
+        )
+        answer = (
+            render_formatted_answer(formatted_answer.model_dump())
+            or NO_INFORMATION_ANSWER
+        )
+    else:
+        answer = generate_answer(
+            session.community_summaries,
+            args.query,
+            get_openai_client(),
+            summary_embeddings=session.summary_embeddings,
+            top_k=args.top_k,
+        )
+    print(answer)
+    print(f"Answered in {time.perf_counter() - start_time:.2f}s")
+
+
 if __name__ == "__main__":
-    # Define input directory and output paths
-    input_dir = "test"
-    graph_pickle_path = "output/graph.gpickle"
-    summaries_pickle_path = "output/community_summaries.pkl"
-
-    # Prepare file paths
-    file_paths = [os.path.join(input_dir, file) for file in os.listdir(input_dir)]
-
-    # Run the main process
-    graph, community_summaries = main(file_paths)
-
-    # Save the graph and summaries to files
-    save_to_pickle(graph, graph_pickle_path)
-    save_to_pickle(community_summaries, summaries_pickle_path)
-
-    # Optional: Uncomment the following lines to generate a final answer from summaries
-    # query = "What factors in these articles can impact medical inflation in the UK in the short term? "
-    # final_answer = generate_answer(community_summaries, query, client)
-    # print("Query:", query)
-    # print("Final answer:", final_answer)
+    from src.app.session_store import SUMMARY_TOP_K
+
+    parser = argparse.ArgumentParser(description="Index documents and query the graph.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser(
+        "index", help="Build the graph index of a data folder."
+    )
+    index_parser.add_argument("data_folder", nargs="?", default="test")
+    index_parser.add_argument("--session-id", default=os.path.join("output", "graph"))
+    index_parser.set_defaults(handler=index_command)
+
+    query_parser = subparsers.add_parser(
+        "query", help="Answer a query from a saved index."
+    )
+    query_parser.add_argument("query")
+    query_parser.add_argument("--session-id", default=os.path.join("output", "graph"))
+    query_parser.add_argument(
+        "--top-k",
+        type=int,
+        default=SUMMARY_TOP_K,
+        help="Number of community summaries mapped over when the index has embeddings.",
+    )
+    query_parser.add_argument(
+        "--answer-mode",
+        choices=["Single pass", "Reduce"],
+        default="Reduce",
+        help="Single pass ranks and formats the bullet points in the reduce call. Answers "
+        "precomputed at indexing time are only served in this mode, with the default --top-k.",
+    )
+    query_parser.set_defaults(handler=query_command)
+
+    args = parser.parse_args()
+    args.handler(args)
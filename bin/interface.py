@@ -18,7 +18,9 @@ from src.app.utils.functions import (
     handle_source_selection,
     read_article_titles,
     toggle_textbox,
+    PREDEFINED_QUERIES,
 )
+from src.app.embedding_models import warm_up_in_background
 import gradio as gr
 
 with gr.Blocks() as interface:
@@ -140,11 +142,15 @@ with gr.Blocks() as interface:
                 lines=10,
                 interactive=False,
             )
+            precompute_answers = gr.Checkbox(
+                label="Precompute answers to the suggested queries",
+                value=False,
+            )
             process_button = gr.Button("Index Graph and Summarize Communities")
 
             process_button.click(
                 fn=display_graph_summary,
-                inputs=[data_folder_input, session_id],
+                inputs=[data_folder_input, session_id, precompute_answers],
                 outputs=[graph_summary_output],
             )
 
@@ -167,23 +173,24 @@ with gr.Blocks() as interface:
                 lines=1,
             )
             query_choices = gr.Dropdown(
-                choices=[
-                    "Select an option...",
-                    "Write a custom query",
-                    "Identify factors that can impact medical inflation in the UK",
-                    "What are the long-term drivers of healthcare inflation?",
-                    "How does public health crises affect medical costs?",
-                    "What are the regulatory challenges driving healthcare inflation?",
-                    "What are the events that could lead to a rise in healthcare services demand?",
-                    "How do demographic changes affect medical costs?",
-                    "Has there been any advancement in medical technology that could significantly increase treatment costs?",
-                    "How do public health initiatives impact healthcare costs?",
-                    "Are there any pharmaceutical shortages?",
-                ],
+                choices=["Select an option...", "Write a custom query"]
+                + PREDEFINED_QUERIES,
                 value="Select an option...",
                 label="Select a query",
                 interactive=True,
             )
+            search_mode = gr.Radio(
+                choices=["Global", "Local"],
+                value="Global",
+                label="Search mode",
+                info="Global searches all community summaries. Local answers questions about specific entities from their neighborhood in the graph.",
+            )
+            answer_mode = gr.Radio(
+                choices=["Single pass", "Reduce + edit"],
+                value="Single pass",
+                label="Answer format",
+                info="Single pass ranks and formats the answer in the final call. Reduce + edit formats it with an additional call.",
+            )
             user_query = gr.Textbox(
                 label="Enter your query",
                 placeholder="E.g., Analyze the provided documents to identify factors that can impact medical inflation in the UK.",
@@ -229,6 +236,8 @@ with gr.Blocks() as interface:
                     user_query,
                     data_folder_input_vis,
                     session_id,
+                    search_mode,
+                    answer_mode,
                 ],
                 outputs=[output_response, source_dropdown],
             )
@@ -239,4 +248,6 @@ with gr.Blocks() as interface:
             )
 
 if __name__ == "__main__":
+    # Load the embedding model while the server starts instead of on the first request
+    warm_up_in_background()
     interface.launch()
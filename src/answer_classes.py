@@ -0,0 +1,71 @@
+from pydantic import Field, BaseModel
+
+
+class AnswerPoint(BaseModel):
+    """
+    Represents a single insight extracted from a community summary.
+
+    Attributes:
+        description (str): The insight, with its citations.
+        score (int): Helpfulness of the insight for answering the query.
+    """
+    description: str = Field(..., description="A specific insight answering the query, with its citations.")
+    score: int = Field(..., description="Helpfulness of the insight for answering the query, from 0 (not helpful) to 100 (critical).")
+
+
+class IntermediateAnswer(BaseModel):
+    """
+    Represents the answer to a query from a single community summary.
+
+    Attributes:
+        points (list[AnswerPoint]): Insights answering the query, empty if the summary is not relevant.
+    """
+    points: list[AnswerPoint] = Field(..., description="Insights answering the query. Empty if the summary does not address the query.")
+
+
+class AnswerBullet(BaseModel):
+    """
+    Represents a ranked bullet point of a formatted answer.
+
+    Attributes:
+        text (str): The insight, without its citations.
+        sources (list[str]): Names of the documents the insight is taken from.
+        community_ids (list[int]): IDs of the communities whose intermediate answers support the insight.
+        entities (list[str]): Names of the entities the insight is about.
+    """
+    text: str = Field(..., description="A specific, evidence-based insight answering the query, without citations.")
+    sources: list[str] = Field(..., description="Names of the source documents cited for the insight, exactly as they appear in the intermediate answers. Empty if no source is explicitly cited.")
+    community_ids: list[int] = Field(..., description="IDs of the communities whose intermediate answers support the insight.")
+    entities: list[str] = Field(..., description="Names of the entities the insight is about, exactly as they appear in the intermediate answers.")
+
+
+class FormattedAnswer(BaseModel):
+    """
+    Represents a final answer formatted as ranked bullet points.
+
+    Attributes:
+        bullets (list[AnswerBullet]): Bullet points, most relevant first.
+    """
+    bullets: list[AnswerBullet] = Field(..., description="Bullet points answering the query, ranked from most to least relevant.")
+
+
+class QueryAnswer(BaseModel):
+    """
+    Represents the answer to one query of a batch from a single community summary.
+
+    Attributes:
+        query_index (int): Number of the query in the batch.
+        points (list[AnswerPoint]): Insights answering the query, empty if the summary is not relevant.
+    """
+    query_index: int = Field(..., description="Number of the query this answer responds to.")
+    points: list[AnswerPoint] = Field(..., description="Insights answering the query. Empty if the summary does not address the query.")
+
+
+class BatchIntermediateAnswer(BaseModel):
+    """
+    Represents the answers to a batch of queries from a single community summary.
+
+    Attributes:
+        answers (list[QueryAnswer]): One answer per query of the batch.
+    """
+    answers: list[QueryAnswer] = Field(..., description="One answer per query, in the order of the queries.")
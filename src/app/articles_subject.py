@@ -1,12 +1,151 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer, util
+import pickle
+import numpy as np
+import scipy.sparse as sp
+from src.app.utils.embedding_store import encode_cached, encode_documents
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Select the indices of the k highest scores, highest first.
+
+    Only the k selected scores are sorted, after an `argpartition` of all of them.
+
+    Args:
+        scores (np.ndarray): Scores of shape (n,).
+        k (int): Number of indices to select.
+
+    Returns:
+        np.ndarray: Indices of the min(k, n) highest scores, in decreasing order of score.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(scores, len(scores) - k)[len(scores) - k :]
+    return top[np.argsort(scores[top])[::-1]]
+
+
+class TfidfIndex:
+    """
+    TF-IDF index of a corpus, fitted once and scored against any number of themes.
+
+    Term counts are hashed into a fixed feature space, so new articles are added without
+    refitting a vocabulary, and the document frequencies are updated with them. The TF-IDF
+    weights (smoothed IDF and L2 normalization, as `TfidfVectorizer` defaults) are recomputed
+    lazily after additions.
+
+    Args:
+        articles (list[str] | None): Initial articles of the index.
+        n_features (int): Number of hashed term features.
+    """
+
+    def __init__(self, articles: list[str] | None = None, n_features: int = 2**20):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None
+        )
+        self.counts = sp.csr_matrix((0, n_features), dtype=np.float64)
+        self.document_frequencies = np.zeros(n_features, dtype=np.int64)
+        self._weights: sp.csr_matrix | None = None
+        if articles:
+            self.add(articles)
+
+    def __len__(self) -> int:
+        return self.counts.shape[0]
+
+    def add(self, articles: list[str]):
+        """
+        Add articles to the index.
+
+        Args:
+            articles (list[str]): Articles to add.
+        """
+        counts = self.vectorizer.transform(articles)
+        self.document_frequencies += np.bincount(
+            counts.indices, minlength=counts.shape[1]
+        )
+        self.counts = sp.vstack([self.counts, counts], format="csr")
+        self._weights = None
+
+    def idf(self) -> np.ndarray:
+        """Compute the smoothed inverse document frequency of each feature."""
+        return np.log((1 + len(self)) / (1 + self.document_frequencies)) + 1
+
+    def _weighted(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """Weight term counts by IDF and L2-normalize the rows."""
+        from sklearn.preprocessing import normalize
+
+        return normalize(counts @ sp.diags(self.idf()), norm="l2", copy=False)
+
+    def scores(self, themes: list[str]) -> np.ndarray:
+        """
+        Compute the cosine similarity of each article with each theme.
+
+        Args:
+            themes (list[str]): Themes to compare the articles against.
+
+        Returns:
+            np.ndarray: Similarities of shape (number of articles, number of themes).
+        """
+        if self._weights is None:
+            self._weights = self._weighted(self.counts).tocsr()
+        theme_weights = self._weighted(self.vectorizer.transform(themes))
+        return (self._weights @ theme_weights.T).toarray()
+
+    def top_k(self, themes: list[str], k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Select the k most similar articles of each theme.
+
+        Args:
+            themes (list[str]): Themes to compare the articles against.
+            k (int): Number of articles to select per theme.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Indices of the selected articles, most similar
+            first, and their similarities, for each theme.
+        """
+        scores = self.scores(themes)
+        results = []
+        for column in scores.T:
+            indices = top_k_indices(column, k)
+            results.append((indices, column[indices]))
+        return results
+
+    def save(self, path: str):
+        """
+        Save the index to a pickle file.
+
+        Args:
+            path (str): Path of the file.
+        """
+        with open(path, "wb") as f:
+            pickle.dump((self.vectorizer.n_features, self.counts), f)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfIndex":
+        """
+        Load an index saved with `save`.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            TfidfIndex: The loaded index.
+        """
+        with open(path, "rb") as f:
+            n_features, counts = pickle.load(f)
+        index = cls(n_features=n_features)
+        index.counts = counts
+        index.document_frequencies = np.bincount(counts.indices, minlength=n_features)
+        return index
 
 
 def calculate_tfidf_similarity(articles: list[str], theme: str) -> list[float]:
     """
     Calculate cosine similarity between articles and a theme using TF-IDF.
 
+    To compare the same articles with several themes, build a `TfidfIndex` once instead.
+
     Args:
         articles (list[str]): List of articles as strings.
         theme (str): The theme to compare the articles against.
@@ -14,10 +153,7 @@ def calculate_tfidf_similarity(articles: list[str], theme: str) -> list[float]:
     Returns:
         list[float]: A list of cosine similarity scores between the theme and each article.
     """
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(articles + [theme])
-    cosine_similarities = cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1])
-    return cosine_similarities.flatten()
+    return TfidfIndex(articles).scores([theme])[:, 0]
 
 
 def calculate_bert_similarity(
@@ -26,6 +162,9 @@ def calculate_bert_similarity(
     """
     Calculate cosine similarity between articles and a theme using a BERT-based model.
 
+    Long articles are embedded window by window and pooled, so that the whole article is compared
+    with the theme rather than its first tokens.
+
     Args:
         articles (list[str]): List of articles as strings.
         theme (str): The theme to compare the articles against.
@@ -34,13 +173,46 @@ def calculate_bert_similarity(
     Returns:
         list[float]: A list of cosine similarity scores between the theme and each article.
     """
-    # Load the SentenceTransformer model
-    model = SentenceTransformer(model_name)
-
-    # Encode articles and theme into embeddings
-    article_embeddings = model.encode(articles, convert_to_tensor=True)
-    theme_embedding = model.encode(theme, convert_to_tensor=True)
+    # Embed whole articles into the embedding store, reusing the cached ones so that ranking
+    # the same articles against a new theme only encodes the theme and new articles
+    store, keys = encode_documents(articles, model_name)
+    theme_embedding = encode_cached([theme], model_name)[0]
 
     # Compute cosine similarity
-    cosine_similarities = util.cos_sim(theme_embedding, article_embeddings)
-    return cosine_similarities.flatten().cpu().numpy()
+    return store.similarities(keys, theme_embedding)
+
+
+def rank_articles(
+    articles: list[str],
+    theme: str,
+    num_articles: int,
+    rerank_candidates: int | None = 100,
+    model_name: str = "all-MiniLM-L6-v2",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the articles most similar to a theme with a two-stage ranking.
+
+    A TF-IDF prefilter keeps the `rerank_candidates` best articles, which are then re-ranked
+    with the BERT-based model, so the cost of the dense model scales with the number of
+    candidates rather than with the corpus.
+
+    Args:
+        articles (list[str]): List of articles as strings.
+        theme (str): The theme to compare the articles against.
+        num_articles (int): Number of articles to select.
+        rerank_candidates (int | None): Number of prefiltered articles re-ranked with the dense
+            model, at least `num_articles`. None re-ranks every article (default: 100).
+        model_name (str): Name of the SentenceTransformer model to use (default: "all-MiniLM-L6-v2").
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Indices of the selected articles, most similar first,
+        and their BERT similarity scores.
+    """
+    candidates = np.arange(len(articles))
+    if rerank_candidates is not None and len(articles) > rerank_candidates:
+        candidates, _ = TfidfIndex(articles).top_k(
+            [theme], max(rerank_candidates, num_articles)
+        )[0]
+    scores = calculate_bert_similarity([articles[i] for i in candidates], theme, model_name)
+    top = top_k_indices(scores, num_articles)
+    return candidates[top], scores[top]
@@ -0,0 +1,169 @@
+import os
+import time
+import threading
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# "torch": the model as published; "int8": dynamic int8 quantization of its linear layers
+# for CPU inference; "onnx": ONNX Runtime on CPU (requires `optimum[onnxruntime]`)
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide registry of SentenceTransformer models.
+
+    Each (model, backend) pair is loaded once, on first use, and shared by every caller, so the
+    weights are not read from disk and the runtime is not initialized again on each call.
+    Concurrent first uses of a model wait for a single load.
+
+    Args:
+        backend (str | None): Default backend, one of `EMBEDDING_BACKENDS`. Defaults to the
+            `EMBEDDING_BACKEND` environment variable, or "torch".
+        batch_size (int | None): Encoding batch size. Defaults to the `EMBEDDING_BATCH_SIZE`
+            environment variable, or 32.
+        num_threads (int | None): Number of CPU threads used for inference. Defaults to the
+            `EMBEDDING_THREADS` environment variable, or the runtime default.
+    """
+
+    def __init__(
+        self,
+        backend: str | None = None,
+        batch_size: int | None = None,
+        num_threads: int | None = None,
+    ):
+        self.backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+        threads = num_threads or os.getenv("EMBEDDING_THREADS")
+        self.num_threads = int(threads) if threads else None
+        self._models: dict[tuple[str, str], "SentenceTransformer"] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, model_name: str, backend: str) -> "SentenceTransformer":
+        """Load a model with the given backend."""
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"Unknown embedding backend: {backend}. Expected one of {EMBEDDING_BACKENDS}."
+            )
+        # Imported on first load: torch dominates the start-up time otherwise
+        from sentence_transformers import SentenceTransformer
+
+        if backend == "onnx":
+            model_kwargs = {"provider": "CPUExecutionProvider"}
+            if self.num_threads:
+                import onnxruntime
+
+                session_options = onnxruntime.SessionOptions()
+                session_options.intra_op_num_threads = self.num_threads
+                model_kwargs["session_options"] = session_options
+            return SentenceTransformer(
+                model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+            )
+
+        import torch
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        if backend == "int8":
+            model = SentenceTransformer(model_name, device="cpu")
+            return torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return SentenceTransformer(model_name)
+
+    def get(
+        self, model_name: str = DEFAULT_MODEL_NAME, backend: str | None = None
+    ) -> "SentenceTransformer":
+        """
+        Get a model, loading it on first use.
+
+        Args:
+            model_name (str): Name of the SentenceTransformer model.
+            backend (str | None): Backend of the model. Defaults to the registry backend.
+
+        Returns:
+            SentenceTransformer: The shared model.
+        """
+        key = (model_name, backend or self.backend)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            if key not in self._models:
+                start_time = time.perf_counter()
+                self._models[key] = self._load(*key)
+                print(
+                    f"Loaded embedding model {key[0]} ({key[1]}) "
+                    f"in {time.perf_counter() - start_time:.2f}s"
+                )
+            return self._models[key]
+
+    def encode(
+        self,
+        texts: list[str],
+        model_name: str = DEFAULT_MODEL_NAME,
+        backend: str | None = None,
+        normalize: bool = True,
+    ) -> np.ndarray:
+        """
+        Encode texts with a shared model.
+
+        Args:
+            texts (list[str]): Texts to encode.
+            model_name (str): Name of the SentenceTransformer model.
+            backend (str | None): Backend of the model. Defaults to the registry backend.
+            normalize (bool): Whether to L2-normalize the embeddings.
+
+        Returns:
+            np.ndarray: A float32 matrix of shape (len(texts), dim).
+        """
+        model = self.get(model_name, backend)
+        embeddings = model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize,
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def warm_up(self, model_names: list[str] = (DEFAULT_MODEL_NAME,)):
+        """
+        Load models and run a first encoding so that the first request does not pay for it.
+
+        Args:
+            model_names (list[str]): Names of the models to warm up.
+        """
+        for model_name in model_names:
+            self.encode(["warm-up"], model_name)
+
+    def clear(self):
+        """Release the loaded models."""
+        with self._lock:
+            self._models.clear()
+
+
+embedding_models = EmbeddingModelRegistry()
+
+
+def warm_up_in_background(model_names: list[str] = (DEFAULT_MODEL_NAME,)) -> threading.Thread:
+    """
+    Warm up the shared embedding models without blocking the caller.
+
+    Requests arriving before the warm-up is done wait for the same load.
+
+    Args:
+        model_names (list[str]): Names of the models to warm up.
+
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    thread = threading.Thread(
+        target=embedding_models.warm_up, args=(model_names,), daemon=True
+    )
+    thread.start()
+    return thread
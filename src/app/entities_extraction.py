@@ -1,29 +1,24 @@
-import os
-from dotenv import load_dotenv
-from langchain.chains.openai_functions import create_structured_output_chain
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from typing import TYPE_CHECKING
 from src.KG_classes import KnowledgeGraph
+from src.app.utils.config import get_api_key
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("Missing OPENAI_API_KEY. Please set it in the environment.")
 
-
-if not api_key:
-    raise EnvironmentError("Missing OPENAI_API_KEY. Please set it in the environment.")
-
-
-def initialize_llm() -> ChatOpenAI:
+def initialize_llm() -> "ChatOpenAI":
     """
     Initialize the ChatOpenAI instance with required configuration.
 
     Returns:
         ChatOpenAI: Configured LLM instance.
+
+    Raises:
+        EnvironmentError: If OPENAI_API_KEY is not set.
     """
-    return ChatOpenAI(model="gpt-4o", temperature=0, api_key=api_key)
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4o", temperature=0, api_key=get_api_key("OPENAI_API_KEY"))
 
 
 def get_extraction_chain(
@@ -39,6 +34,8 @@ def get_extraction_chain(
     Returns:
         StructuredOutputChain: The chain for extracting knowledge graph data.
     """
+    from langchain.chains.openai_functions import create_structured_output_chain
+    from langchain.prompts import ChatPromptTemplate
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -1,51 +1,615 @@
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from openai import OpenAI
-from src.app.utils.utils import read_prompt
+from src.answer_classes import (
+    AnswerPoint,
+    BatchIntermediateAnswer,
+    FormattedAnswer,
+    IntermediateAnswer,
+)
+from src.app.summary_index import rank_summaries
+from src.app.utils.utils import count_tokens, read_prompt
 
+# Answer returned without a reduce call when no community has relevant information
+NO_INFORMATION_ANSWER = "No relevant information available in the provided answers."
 
-def generate_answer(community_summaries: list[str], query: str, client: OpenAI) -> str:
+
+def answer_community(summary: str, query: str, client: OpenAI) -> IntermediateAnswer:
     """
-    Generate a final answer by combining answers from different community summaries.
+    Generate an intermediate answer to a query from a single community summary.
+
+    Args:
+        summary (str): Summary of the community.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+
+    Returns:
+        IntermediateAnswer: Scored insights based on the community summary, with no points if
+        the summary is not relevant or the answer could not be parsed.
+    """
+    response = client.beta.chat.completions.parse(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": read_prompt(
+                    "GraphRAG_vf/src/prompts/system_prompts/intermediate_answers.txt"
+                ),
+            },
+            {"role": "user", "content": f"Query: {query} Summary: {summary}"},
+        ],
+        response_format=IntermediateAnswer,
+    )
+    return response.choices[0].message.parsed or IntermediateAnswer(points=[])
+
+
+def select_summaries(
+    community_summaries: list[str],
+    query: str,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+) -> list[int]:
+    """
+    Select the community summaries to map over for a query.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        query (str): Query to be answered.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries, if available.
+        top_k (int | None): Maximum number of summaries to keep.
+        similarity_threshold (float | None): Minimum cosine similarity to keep a summary.
+
+    Returns:
+        list[int]: IDs of the selected communities, most relevant first, or all communities if no
+        index or selection criterion is provided.
+    """
+    all_ids = list(range(len(community_summaries)))
+    if summary_embeddings is None or (top_k is None and similarity_threshold is None):
+        return all_ids
+    if len(summary_embeddings) != len(community_summaries):
+        print("Summary index does not match the community summaries, skipping pre-filter.")
+        return all_ids
+
+    selected = rank_summaries(query, summary_embeddings, top_k, similarity_threshold)
+    print(f"Pre-filter kept {len(selected)}/{len(community_summaries)} communities.")
+    return selected
+
+
+def stream_chat_completion(client: OpenAI, messages: list[dict]) -> Iterator[str]:
+    """
+    Stream the tokens of a gpt-4o chat completion.
+
+    Args:
+        client (OpenAI): OpenAI client.
+        messages (list[dict]): Messages of the chat completion.
+
+    Yields:
+        str: Content deltas as they arrive.
+    """
+    stream = client.chat.completions.create(
+        model="gpt-4o", messages=messages, stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def map_intermediate_answers(
+    community_summaries: list[str],
+    query: str,
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+) -> dict[int, IntermediateAnswer]:
+    """
+    Run the map step: answer the query from each selected community summary.
 
     Args:
         community_summaries (list[str]): List of summaries for each community.
         query (str): Query to be answered.
         client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+        top_k (int | None): Maximum number of summaries to map over.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
 
     Returns:
-        str: Final answer generated by combining the answers from different communities.
+        dict[int, IntermediateAnswer]: Scored intermediate answer of each selected community, keyed by community ID.
+    """
+    community_ids = select_summaries(
+        community_summaries, query, summary_embeddings, top_k, similarity_threshold
+    )
+
+    intermediate_answers = {}
+    for index, community_id in enumerate(community_ids):
+        print(f"Answering community {index+1}/{len(community_ids)}:")
+        intermediate_answer = answer_community(
+            community_summaries[community_id], query, client
+        )
+        print("Intermediate answer:", intermediate_answer)
+        intermediate_answers[community_id] = intermediate_answer
+    return intermediate_answers
+
+
+def pack_intermediate_answers(
+    intermediate_answers: dict[int, IntermediateAnswer], max_tokens: int = 8000
+) -> str:
+    """
+    Prune and pack the intermediate answers into the context of the reduce call.
+
+    Points with a score of 0 are dropped, and the remaining points are added by decreasing score
+    until the token budget is reached. Each point is labelled with the ID of its community so
+    that the final answer can cite it.
+
+    Args:
+        intermediate_answers (dict[int, IntermediateAnswer]): Scored intermediate answers from the
+            map step, keyed by community ID.
+        max_tokens (int): Token budget of the packed context.
+
+    Returns:
+        str: The packed context, or an empty string if no point is helpful.
     """
-    intermediate_answers = []
-    for index, summary in enumerate(community_summaries):
-        print(f"Answering community {index+1}/{len(community_summaries)}:")
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": read_prompt(
-                        "GraphRAG_vf/src/prompts/system_prompts/intermediate_answers.txt"
-                    ),
-                },
-                {"role": "user", "content": f"Query: {query} Summary: {summary}"},
-            ],
+    points: list[tuple[int, AnswerPoint]] = sorted(
+        (
+            (community_id, point)
+            for community_id, answer in intermediate_answers.items()
+            for point in answer.points
+            if point.score > 0
+        ),
+        key=lambda item: item[1].score,
+        reverse=True,
+    )
+
+    sections = []
+    total_tokens = 0
+    for community_id, point in points:
+        section = (
+            f"----Community {community_id} | Importance Score: {point.score}----\n"
+            f"{point.description}\n"
         )
-        print("Intermediate answer:", response.choices[0].message.content)
-        intermediate_answers.append(response.choices[0].message.content)
+        section_tokens = count_tokens(section)
+        if total_tokens + section_tokens > max_tokens:
+            break
+        sections.append(section)
+        total_tokens += section_tokens
+
+    print(
+        f"Packed {len(sections)}/{len(points)} helpful points into {total_tokens} tokens."
+    )
+    return "\n".join(sections)
+
+
+def final_answer_messages(context: str, query: str) -> list[dict]:
+    """
+    Build the messages of the reduce call combining the intermediate answers.
+
+    Args:
+        context (str): Intermediate answers packed by `pack_intermediate_answers`.
+        query (str): Query to be answered.
 
+    Returns:
+        list[dict]: Messages for the final chat completion.
+    """
+    return [
+        {
+            "role": "system",
+            "content": read_prompt(
+                "GraphRAG_vf/src/prompts/system_prompts/final_answers.txt"
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"Intermediate answers:\n{context}\nQuery: {query}",
+        },
+    ]
+
+
+def reduce_answer(
+    intermediate_answers: dict[int, IntermediateAnswer],
+    query: str,
+    client: OpenAI,
+    max_context_tokens: int = 8000,
+) -> str:
+    """
+    Run the reduce step: combine the intermediate answers into a final answer.
+
+    Args:
+        intermediate_answers (dict[int, IntermediateAnswer]): Scored intermediate answers from the
+            map step, keyed by community ID.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        max_context_tokens (int): Token budget of the intermediate answers passed to the reduce call.
+
+    Returns:
+        str: Final answer, or `NO_INFORMATION_ANSWER` without any call if no point is helpful.
+    """
+    context = pack_intermediate_answers(intermediate_answers, max_context_tokens)
+    if not context:
+        return NO_INFORMATION_ANSWER
     final_response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=final_answer_messages(context, query),
+    )
+    final_answer = final_response.choices[0].message.content
+    return final_answer
+
+
+def generate_answer(
+    community_summaries: list[str],
+    query: str,
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+    max_context_tokens: int = 8000,
+) -> str:
+    """
+    Generate a final answer by combining answers from different community summaries.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries. When provided
+            with `top_k` or `similarity_threshold`, only the most relevant summaries are mapped over.
+        top_k (int | None): Maximum number of summaries to map over.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
+        max_context_tokens (int): Token budget of the intermediate answers passed to the reduce call.
+
+    Returns:
+        str: Final answer generated by combining the answers from different communities.
+    """
+    intermediate_answers = map_intermediate_answers(
+        community_summaries,
+        query,
+        client,
+        summary_embeddings,
+        top_k,
+        similarity_threshold,
+    )
+    return reduce_answer(intermediate_answers, query, client, max_context_tokens)
+
+
+def stream_answer(
+    community_summaries: list[str],
+    query: str,
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+    max_context_tokens: int = 8000,
+) -> Iterator[str]:
+    """
+    Generate a final answer like `generate_answer`, streaming the tokens of the reduce step.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+        top_k (int | None): Maximum number of summaries to map over.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
+        max_context_tokens (int): Token budget of the intermediate answers passed to the reduce call.
+
+    Yields:
+        str: Tokens of the final answer as they arrive.
+    """
+    intermediate_answers = map_intermediate_answers(
+        community_summaries,
+        query,
+        client,
+        summary_embeddings,
+        top_k,
+        similarity_threshold,
+    )
+    context = pack_intermediate_answers(intermediate_answers, max_context_tokens)
+    if not context:
+        yield NO_INFORMATION_ANSWER
+        return
+    yield from stream_chat_completion(client, final_answer_messages(context, query))
+
+
+def formatted_answer_messages(context: str, query: str) -> list[dict]:
+    """
+    Build the messages of the reduce call producing ranked, formatted bullet points.
+
+    Args:
+        context (str): Intermediate answers packed by `pack_intermediate_answers`.
+        query (str): Query to be answered.
+
+    Returns:
+        list[dict]: Messages for the final chat completion.
+    """
+    messages = final_answer_messages(context, query)
+    messages[0]["content"] += "\n\n" + read_prompt(
+        "GraphRAG_vf/src/prompts/system_prompts/formatted_answers.txt"
+    )
+    return messages
+
+
+def render_formatted_answer(answer: dict) -> str:
+    """
+    Render a formatted answer as plain-text bullet points with their sources.
+
+    Args:
+        answer (dict): A `FormattedAnswer` dumped to a dictionary. Partial answers received while
+            streaming are supported.
+
+    Returns:
+        str: One bullet point per line, each followed by its sources.
+    """
+    lines = []
+    for bullet in answer.get("bullets") or []:
+        line = f"- {bullet.get('text', '')}"
+        if "sources" in bullet:
+            sources = bullet["sources"] or []
+            line += (
+                f" (Source: {', '.join(sources)})"
+                if sources
+                else " (No source explicitly found)"
+            )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def reduce_formatted_answer(
+    intermediate_answers: dict[int, IntermediateAnswer],
+    query: str,
+    client: OpenAI,
+    max_context_tokens: int = 8000,
+) -> FormattedAnswer:
+    """
+    Run the reduce step producing ranked, formatted bullet points.
+
+    Args:
+        intermediate_answers (dict[int, IntermediateAnswer]): Scored intermediate answers from the
+            map step, keyed by community ID.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        max_context_tokens (int): Token budget of the intermediate answers passed to the reduce call.
+
+    Returns:
+        FormattedAnswer: Ranked bullet points with their sources, empty without any call if no
+        point is helpful.
+    """
+    context = pack_intermediate_answers(intermediate_answers, max_context_tokens)
+    if not context:
+        return FormattedAnswer(bullets=[])
+    response = client.beta.chat.completions.parse(
+        model="gpt-4o",
+        messages=formatted_answer_messages(context, query),
+        response_format=FormattedAnswer,
+    )
+    return response.choices[0].message.parsed or FormattedAnswer(bullets=[])
+
+
+def generate_formatted_answer(
+    community_summaries: list[str],
+    query: str,
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+    max_context_tokens: int = 8000,
+) -> FormattedAnswer:
+    """
+    Generate a final answer whose ranking and bullet formatting are done by the reduce call.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+        top_k (int | None): Maximum number of summaries to map over.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
+        max_context_tokens (int): Token budget of the intermediate answers passed to the reduce call.
+
+    Returns:
+        FormattedAnswer: Ranked bullet points with their sources, empty if no community is relevant.
+    """
+    intermediate_answers = map_intermediate_answers(
+        community_summaries,
+        query,
+        client,
+        summary_embeddings,
+        top_k,
+        similarity_threshold,
+    )
+    return reduce_formatted_answer(
+        intermediate_answers, query, client, max_context_tokens
+    )
+
+
+def stream_formatted_answer(
+    community_summaries: list[str],
+    query: str,
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+    max_context_tokens: int = 8000,
+) -> Iterator[dict]:
+    """
+    Generate a formatted answer like `generate_formatted_answer`, streaming the reduce call.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+        top_k (int | None): Maximum number of summaries to map over.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
+        max_context_tokens (int): Token budget of the intermediate answers passed to the reduce call.
+
+    Yields:
+        dict: Partial snapshots of the answer as they arrive, then the complete `FormattedAnswer`
+        dumped to a dictionary.
+    """
+    intermediate_answers = map_intermediate_answers(
+        community_summaries,
+        query,
+        client,
+        summary_embeddings,
+        top_k,
+        similarity_threshold,
+    )
+    context = pack_intermediate_answers(intermediate_answers, max_context_tokens)
+    if not context:
+        yield FormattedAnswer(bullets=[]).model_dump()
+        return
+
+    with client.beta.chat.completions.stream(
+        model="gpt-4o",
+        messages=formatted_answer_messages(context, query),
+        response_format=FormattedAnswer,
+    ) as stream:
+        for event in stream:
+            if event.type == "content.delta" and isinstance(event.parsed, dict):
+                yield event.parsed
+        answer = stream.get_final_completion().choices[0].message.parsed
+    yield (answer or FormattedAnswer(bullets=[])).model_dump()
+
+
+def answer_community_batch(
+    summary: str, queries: list[str], client: OpenAI
+) -> list[IntermediateAnswer]:
+    """
+    Generate intermediate answers to several queries from a single community summary in one request.
+
+    Args:
+        summary (str): Summary of the community.
+        queries (list[str]): Queries to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+
+    Returns:
+        list[IntermediateAnswer]: One scored intermediate answer per query, in the order of the queries.
+    """
+    numbered_queries = "\n".join(
+        f"{index}. {query}" for index, query in enumerate(queries)
+    )
+    response = client.beta.chat.completions.parse(
         model="gpt-4o",
         messages=[
             {
                 "role": "system",
                 "content": read_prompt(
-                    "GraphRAG_vf/src/prompts/system_prompts/final_answers.txt"
+                    "GraphRAG_vf/src/prompts/system_prompts/intermediate_answers.txt"
+                )
+                + "\n\n"
+                + read_prompt(
+                    "GraphRAG_vf/src/prompts/system_prompts/batch_intermediate_answers.txt"
                 ),
             },
             {
                 "role": "user",
-                "content": f"Intermediate answers: {intermediate_answers} , Query: {query}",
+                "content": f"Queries:\n{numbered_queries}\nSummary: {summary}",
             },
         ],
+        response_format=BatchIntermediateAnswer,
     )
-    final_answer = final_response.choices[0].message.content
-    return final_answer
+    batch_answer = response.choices[0].message.parsed
+
+    answers = [IntermediateAnswer(points=[]) for _ in queries]
+    for answer in batch_answer.answers if batch_answer else []:
+        if 0 <= answer.query_index < len(queries):
+            answers[answer.query_index] = IntermediateAnswer(points=answer.points)
+    return answers
+
+
+def map_intermediate_answers_batch(
+    community_summaries: list[str],
+    queries: list[str],
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+) -> list[dict[int, IntermediateAnswer]]:
+    """
+    Run the map step for several queries, sending each community summary once with all its queries.
+
+    When a summary index is provided, each community is only sent with the queries that selected it.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        queries (list[str]): Queries to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+        top_k (int | None): Maximum number of summaries to map over per query.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
+
+    Returns:
+        list[dict[int, IntermediateAnswer]]: For each query, the scored intermediate answer of each
+        selected community, keyed by community ID.
+    """
+    community_queries: dict[int, list[int]] = {}
+    for query_index, query in enumerate(queries):
+        for community_id in select_summaries(
+            community_summaries, query, summary_embeddings, top_k, similarity_threshold
+        ):
+            community_queries.setdefault(community_id, []).append(query_index)
+
+    intermediate_answers = [{} for _ in queries]
+    for index, (community_id, query_indices) in enumerate(
+        sorted(community_queries.items())
+    ):
+        print(
+            f"Answering community {index+1}/{len(community_queries)} "
+            f"for {len(query_indices)} queries:"
+        )
+        answers = answer_community_batch(
+            community_summaries[community_id],
+            [queries[query_index] for query_index in query_indices],
+            client,
+        )
+        for query_index, answer in zip(query_indices, answers):
+            intermediate_answers[query_index][community_id] = answer
+    return intermediate_answers
+
+
+def generate_answers_batch(
+    community_summaries: list[str],
+    queries: list[str],
+    client: OpenAI,
+    summary_embeddings: np.ndarray | None = None,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+    max_context_tokens: int = 8000,
+    formatted: bool = False,
+    max_workers: int = 8,
+) -> list[str] | list[FormattedAnswer]:
+    """
+    Answer several queries with a shared map step and concurrent reduce calls.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        queries (list[str]): Queries to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+        top_k (int | None): Maximum number of summaries to map over per query.
+        similarity_threshold (float | None): Minimum cosine similarity for a summary to be mapped over.
+        max_context_tokens (int): Token budget of the intermediate answers passed to each reduce call.
+        formatted (bool): Whether to return `FormattedAnswer` bullet points instead of plain-text answers.
+        max_workers (int): Maximum number of concurrent reduce calls.
+
+    Returns:
+        list[str] | list[FormattedAnswer]: One final answer per query, in the order of the queries.
+    """
+    intermediate_answers = map_intermediate_answers_batch(
+        community_summaries,
+        queries,
+        client,
+        summary_embeddings,
+        top_k,
+        similarity_threshold,
+    )
+    reduce = reduce_formatted_answer if formatted else reduce_answer
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                lambda answers, query: reduce(answers, query, client, max_context_tokens),
+                intermediate_answers,
+                queries,
+            )
+        )
@@ -1,6 +1,5 @@
 import networkx as nx
 import community as community_louvain
-import matplotlib.pyplot as plt
 from openai import OpenAI
 from tqdm import tqdm
 from src.app.utils.utils import read_prompt
@@ -27,6 +26,8 @@ def plot_graph_with_communities(graph: nx.Graph, partition: dict[str, int]):
         graph (nx.Graph): The NetworkX graph.
         partition (dict[str, int]): A dictionary mapping nodes to their community IDs.
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(20, 20))
     pos = nx.spring_layout(graph)  # Use spring layout for visualization
 
@@ -1,118 +1,412 @@
-import os
 import random
-import requests
 import xml.etree.ElementTree as ET
-from dotenv import load_dotenv
-from datetime import datetime
-from serpapi import GoogleSearch
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterator
+from src.app.utils.http_cache import http_cache
+from src.app.utils.config import get_api_key
 
-load_dotenv()
-google_api_key = os.getenv("GOOGLE_API_KEY")
-if not google_api_key:
-    raise EnvironmentError("Missing GOOGLE_API_KEY. Please set it in the environment.")
 
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
 
-def fetch_sitemap_content(sitemap_url: str) -> ET.Element:
+
+def iter_sitemap_urls(
+    sitemap_url: str,
+    sitemap_filter: callable = lambda loc, lastmod: True,
+    max_depth: int = 3,
+    _visited: set[str] | None = None,
+) -> Iterator[ET.Element]:
+    """
+    Stream the `<url>` elements of an XML sitemap, following sitemap indexes recursively.
+
+    The sitemap is parsed incrementally from the HTTP cache and each element is cleared once it
+    has been consumed, so memory does not grow with the size of the sitemap.
+
+    Args:
+        sitemap_url (str): URL of the XML sitemap or sitemap index.
+        sitemap_filter (callable): Function of the `loc` and `lastmod` texts of a child sitemap
+            deciding whether it is followed.
+        max_depth (int): Maximum number of nested sitemap indexes to follow.
+
+    Yields:
+        ET.Element: `<url>` elements of the sitemap. They are cleared once the consumer moves on
+        to the next element.
+    """
+    visited = _visited if _visited is not None else set()
+    if sitemap_url in visited:
+        return
+    visited.add(sitemap_url)
+
+    path = http_cache.fetch_path(sitemap_url, timeout=30)
+    root = None
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag == "url":
+            yield element
+        elif tag == "sitemap":
+            loc = element.findtext(f"{{{SITEMAP_NAMESPACE}}}loc")
+            lastmod = element.findtext(f"{{{SITEMAP_NAMESPACE}}}lastmod")
+            if loc and max_depth > 0 and sitemap_filter(loc.strip(), lastmod):
+                yield from iter_sitemap_urls(
+                    loc.strip(), sitemap_filter, max_depth - 1, visited
+                )
+        else:
+            continue
+        # Drop the consumed element and its siblings from the partial tree
+        element.clear()
+        root.clear()
+
+
+class Reservoir:
+    """
+    Uniform random sample of k items from a stream of unknown length.
+
+    Args:
+        k (int): Number of items to keep.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.items = []
+        self.seen = 0
+
+    def add(self, item):
+        """Offer an item of the stream to the sample."""
+        if self.seen < self.k:
+            self.items.append(item)
+        else:
+            slot = random.randint(0, self.seen)
+            if slot < self.k:
+                self.items[slot] = item
+        self.seen += 1
+
+
+def reservoir_sample(items, k: int) -> list:
+    """
+    Select k items uniformly at random from an iterable of unknown length in one pass.
+
+    Args:
+        items: Iterable of items.
+        k (int): Number of items to select.
+
+    Returns:
+        list: Up to k selected items.
+    """
+    reservoir = Reservoir(k)
+    for item in items:
+        reservoir.add(item)
+    return reservoir.items
+
+
+def parse_lastmod(lastmod: str | None) -> datetime | None:
+    """
+    Parse the `lastmod` text of a sitemap entry.
+
+    Args:
+        lastmod (str | None): W3C datetime of the entry, if any.
+
+    Returns:
+        datetime | None: Timezone-aware date, UTC if the text has no offset, or None if the text
+        is missing or invalid.
     """
-    Fetch and parse the content of an XML sitemap.
+    if not lastmod:
+        return None
+    try:
+        modified = datetime.fromisoformat(lastmod.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return modified if modified.tzinfo else modified.replace(tzinfo=timezone.utc)
+
+
+def modified_since(lastmod: str | None, year: int, month: int) -> bool:
+    """
+    Check whether a sitemap may contain URLs of a month from its `lastmod` text.
 
     Args:
-        sitemap_url (str): URL of the XML sitemap.
+        lastmod (str | None): Last modification date of the sitemap, if any.
+        year (int): Year of the month.
+        month (int): Month.
 
     Returns:
-        ET.Element: Parsed XML root element.
+        bool: False only if the sitemap was last modified before the month.
     """
-    response = requests.get(sitemap_url)
-    response.raise_for_status()
-    return ET.fromstring(response.content)
+    modified = parse_lastmod(lastmod)
+    return modified is None or (modified.year, modified.month) >= (year, month)
 
 
 def filter_urls_by_date(
-    root: ET.Element,
+    sitemap_url: str,
     namespace: dict,
     target_year: int,
     target_month: int,
     date_extractor,
     url_filter: callable = lambda url: True,
     num_articles: int = 20,
+    modified_after: datetime | None = None,
 ) -> list[str]:
     """
     Filter URLs from a sitemap XML by year and month.
 
+    The sitemap is streamed and the URLs are sampled with a reservoir, so memory stays constant
+    whatever the size of the sitemap. Child sitemaps of a sitemap index last modified before the
+    target month, or before `modified_after`, are skipped.
+
     Args:
-        root (ET.Element): Parsed XML root element.
+        sitemap_url (str): URL of the XML sitemap or sitemap index.
         namespace (dict): XML namespaces.
         target_year (int): Target year for filtering.
         target_month (int): Target month for filtering.
         date_extractor (callable): Function to extract the date from XML elements.
         url_filter (callable): Function to filter URLs.
         num_articles (int): Number of articles to return.
+        modified_after (datetime | None): If set, only the URLs whose `lastmod` is after this
+            timezone-aware date are returned, e.g. to list the articles published since a run.
 
     Returns:
         list[str]: Filtered URLs.
     """
-    filtered_urls = []
-
-    for url in root.findall("ns:url", namespace):
-        loc_element = url.find("ns:loc", namespace)
-        if loc_element is not None and url_filter(loc_element.text):
-            date = date_extractor(url, namespace)
-            if date and date.year == target_year and date.month == target_month:
-                filtered_urls.append(loc_element.text)
 
-    return random.sample(filtered_urls, min(num_articles, len(filtered_urls)))
+    def sitemap_filter(loc, lastmod):
+        if modified_after is not None:
+            modified = parse_lastmod(lastmod)
+            if modified is not None and modified <= modified_after:
+                return False
+        return modified_since(lastmod, target_year, target_month)
+
+    def is_new(url):
+        modified = parse_lastmod(url.findtext("ns:lastmod", None, namespace))
+        return modified is not None and modified > modified_after
+
+    def matching_urls():
+        for url in iter_sitemap_urls(sitemap_url, sitemap_filter):
+            loc_element = url.find("ns:loc", namespace)
+            if modified_after is not None and not is_new(url):
+                continue
+            if loc_element is not None and url_filter(loc_element.text):
+                date = date_extractor(url, namespace)
+                if date and date.year == target_year and date.month == target_month:
+                    yield loc_element.text.strip()
+
+    return reservoir_sample(matching_urls(), num_articles)
+
+
+def lastmod_date(url: ET.Element, namespace: dict) -> datetime | None:
+    """Extract the date of a sitemap URL from its `lastmod` element."""
+    lastmod_element = url.find("ns:lastmod", namespace)
+    if lastmod_element is not None:
+        try:
+            return datetime.fromisoformat(lastmod_element.text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+
+def economist_url_date(url: ET.Element, namespace: dict) -> datetime | None:
+    """Extract the date embedded in an Economist URL (`/section/yyyy/mm/dd/slug`)."""
+    loc_element = url.find("ns:loc", namespace)
+    if loc_element is not None:
+        try:
+            parts = loc_element.text.split("/")
+            return datetime(int(parts[4]), int(parts[5]), int(parts[6]))
+        except (IndexError, ValueError):
+            return None
+
+
+def nhs_url_date(url: ET.Element, namespace: dict) -> datetime | None:
+    """Extract the year and month embedded in an NHS England URL (`/yyyy/mm/slug`)."""
+    loc_element = url.find("ns:loc", namespace)
+    if loc_element is not None:
+        url_parts = loc_element.text.strip().split("/")
+        try:
+            return datetime(int(url_parts[3]), int(url_parts[4]), 1)
+        except (IndexError, ValueError):
+            return None
 
 
-def get_filtered_urls_for_bbc(
-    sitemap_url: str, target_year: int, target_month: int, num_articles: int = 20
-) -> list[str]:
+def get_filtered_urls_for_google_news(query: str, num_articles: int) -> list[str]:
     """
-    Retrieve filtered URLs from the BBC sitemap by date.
+    Retrieve filtered URLs from Google News search results.
 
     Args:
-        sitemap_url (str): URL of the BBC sitemap.
-        target_year (int): Target year for filtering.
-        target_month (int): Target month for filtering.
+        query (str): Search query for Google News.
         num_articles (int): Number of articles to return.
 
     Returns:
         list[str]: Filtered URLs.
+
+    Raises:
+        EnvironmentError: If GOOGLE_API_KEY is not set.
     """
-    root = fetch_sitemap_content(sitemap_url)
-    namespace = {
-        "ns": "http://www.sitemaps.org/schemas/sitemap/0.9",
-        "news": "http://www.google.com/schemas/sitemap-news/0.9",
+    from serpapi import GoogleSearch
+
+    params = {
+        "engine": "google_news",
+        "q": query,
+        "gl": "us",
+        "hl": "en",
+        "api_key": get_api_key("GOOGLE_API_KEY"),
     }
 
-    def extract_date(url, ns):
-        lastmod_element = url.find("ns:lastmod", ns)
-        if lastmod_element is not None:
-            try:
-                return datetime.fromisoformat(
-                    lastmod_element.text.replace("Z", "+00:00")
-                )
-            except ValueError:
-                return None
-
-    return filter_urls_by_date(
-        root,
-        namespace,
-        target_year,
-        target_month,
-        extract_date,
+    search = GoogleSearch(params)
+    results = search.get_dict()
+    news_results = results.get("news_results", [])
+
+    filtered_urls = []
+    for result in news_results[:num_articles]:
+        if "link" in result:
+            filtered_urls.append(result["link"])
+        elif "stories" in result:
+            filtered_urls.extend(story["link"] for story in result["stories"])
+
+    return filtered_urls
+
+
+@dataclass(frozen=True)
+class SiteHandler:
+    """
+    How to list the article URLs of a website.
+
+    Sitemap-based sites date their URLs with `date_extractor`; search-based sources such as
+    Google News set `search` instead and ignore the sitemap and dates.
+
+    Attributes:
+        name (str): Name of the website, as selected in the interface.
+        default_sitemap_url (str): Sitemap scraped by default.
+        sitemap_prefix (str): Prefix of the sitemap URLs of the site.
+        namespace (dict): XML namespaces of the sitemap.
+        date_extractor (callable | None): Function to extract the date from XML elements.
+        url_filter (callable): Function to filter URLs.
+        search (callable | None): Function of the query and number of articles returning URLs.
+    """
+
+    name: str
+    default_sitemap_url: str = ""
+    sitemap_prefix: str = ""
+    namespace: dict = field(default_factory=lambda: {"ns": SITEMAP_NAMESPACE})
+    date_extractor: callable = None
+    url_filter: callable = lambda url: True
+    search: callable = None
+
+    def list_urls(
+        self,
+        sitemap_url: str,
+        target_year: int,
+        target_month: int,
+        num_articles: int = 20,
+        query: str | None = None,
+        modified_after: datetime | None = None,
+    ) -> list[str]:
+        """
+        List the article URLs of the site for a month, or for a query if the site is searched.
+
+        Args:
+            sitemap_url (str): URL of the sitemap.
+            target_year (int): Target year for filtering.
+            target_month (int): Target month for filtering.
+            num_articles (int): Number of articles to return.
+            query (str | None): Search query, for search-based sources.
+            modified_after (datetime | None): If set, only the sitemap URLs last modified after
+                this timezone-aware date are listed. Ignored by search-based sources.
+
+        Returns:
+            list[str]: Filtered URLs.
+        """
+        if self.search is not None:
+            return self.search(query, num_articles)
+        return filter_urls_by_date(
+            sitemap_url or self.default_sitemap_url,
+            self.namespace,
+            target_year,
+            target_month,
+            self.date_extractor,
+            url_filter=self.url_filter,
+            num_articles=num_articles,
+            modified_after=modified_after,
+        )
+
+
+# Registry of the supported websites, keyed by name
+SITE_HANDLERS: dict[str, SiteHandler] = {}
+
+
+def register_site_handler(handler: SiteHandler) -> SiteHandler:
+    """
+    Register a website so that it can be scraped and harvested.
+
+    Args:
+        handler (SiteHandler): Handler of the website.
+
+    Returns:
+        SiteHandler: The registered handler.
+    """
+    SITE_HANDLERS[handler.name] = handler
+    return handler
+
+
+def get_site_handler(website: str) -> SiteHandler:
+    """
+    Get the handler of a registered website.
+
+    Args:
+        website (str): Name of the website.
+
+    Returns:
+        SiteHandler: Handler of the website.
+
+    Raises:
+        ValueError: If the website is not registered.
+    """
+    if website not in SITE_HANDLERS:
+        raise ValueError(f"Invalid website name: {website}")
+    return SITE_HANDLERS[website]
+
+
+register_site_handler(
+    SiteHandler(
+        name="bbc",
+        default_sitemap_url="https://www.bbc.com/sitemaps/https-sitemap-com-news-1.xml",
+        sitemap_prefix="https://www.bbc.com/",
+        namespace={
+            "ns": SITEMAP_NAMESPACE,
+            "news": "http://www.google.com/schemas/sitemap-news/0.9",
+        },
+        date_extractor=lastmod_date,
         url_filter=lambda url: url.startswith("https://www.bbc.com/news/"),
-        num_articles=num_articles,
     )
+)
+register_site_handler(
+    SiteHandler(
+        name="the economist",
+        default_sitemap_url="https://www.economist.com/sitemap-2024-Q4.xml",
+        sitemap_prefix="https://www.economist.com/",
+        date_extractor=economist_url_date,
+    )
+)
+register_site_handler(
+    SiteHandler(
+        name="nhs",
+        default_sitemap_url="https://www.england.nhs.uk/sitemap-posttype-post.2024.xml",
+        sitemap_prefix="https://www.england.nhs.uk/",
+        date_extractor=nhs_url_date,
+    )
+)
+register_site_handler(
+    SiteHandler(name="google news", search=get_filtered_urls_for_google_news)
+)
 
 
-def get_filtered_urls_for_economist(
+def get_filtered_urls_for_bbc(
     sitemap_url: str, target_year: int, target_month: int, num_articles: int = 20
 ) -> list[str]:
     """
-    Retrieve filtered URLs from The Economist sitemap by date embedded in URLs.
+    Retrieve filtered URLs from the BBC sitemap by date.
 
     Args:
-        sitemap_url (str): URL of The Economist sitemap.
+        sitemap_url (str): URL of the BBC sitemap.
         target_year (int): Target year for filtering.
         target_month (int): Target month for filtering.
         num_articles (int): Number of articles to return.
@@ -120,59 +414,29 @@ def get_filtered_urls_for_economist(
     Returns:
         list[str]: Filtered URLs.
     """
-    root = fetch_sitemap_content(sitemap_url)
-    namespace = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-
-    def extract_date(url, _):
-        loc_element = url.find("ns:loc", namespace)
-        if loc_element is not None:
-            try:
-                parts = loc_element.text.split("/")
-                return datetime(int(parts[4]), int(parts[5]), int(parts[6]))
-            except (IndexError, ValueError):
-                return None
-
-    return filter_urls_by_date(
-        root,
-        namespace,
-        target_year,
-        target_month,
-        extract_date,
-        num_articles=num_articles,
+    return SITE_HANDLERS["bbc"].list_urls(
+        sitemap_url, target_year, target_month, num_articles
     )
 
 
-def get_filtered_urls_for_google_news(query: str, num_articles: int) -> list[str]:
+def get_filtered_urls_for_economist(
+    sitemap_url: str, target_year: int, target_month: int, num_articles: int = 20
+) -> list[str]:
     """
-    Retrieve filtered URLs from Google News search results.
+    Retrieve filtered URLs from The Economist sitemap by date embedded in URLs.
 
     Args:
-        query (str): Search query for Google News.
+        sitemap_url (str): URL of The Economist sitemap.
+        target_year (int): Target year for filtering.
+        target_month (int): Target month for filtering.
         num_articles (int): Number of articles to return.
 
     Returns:
         list[str]: Filtered URLs.
     """
-    params = {
-        "engine": "google_news",
-        "q": query,
-        "gl": "us",
-        "hl": "en",
-        "api_key": google_api_key,
-    }
-
-    search = GoogleSearch(params)
-    results = search.get_dict()
-    news_results = results.get("news_results", [])
-
-    filtered_urls = []
-    for result in news_results[:num_articles]:
-        if "link" in result:
-            filtered_urls.append(result["link"])
-        elif "stories" in result:
-            filtered_urls.extend(story["link"] for story in result["stories"])
-
-    return filtered_urls
+    return SITE_HANDLERS["the economist"].list_urls(
+        sitemap_url, target_year, target_month, num_articles
+    )
 
 
 def get_filtered_urls_for_nhs(
@@ -190,31 +454,65 @@ def get_filtered_urls_for_nhs(
     Returns:
         list: A list of URLs of the last n filtered articles.
     """
-    # Download the XML sitemap content
-    response = requests.get(sitemap_url)
-    response.raise_for_status()  # Check if the request was successful
+    return SITE_HANDLERS["nhs"].list_urls(
+        sitemap_url, target_year, target_month, num_articles
+    )
 
-    # Parse the XML with namespace handling
-    root = ET.fromstring(response.content.decode("utf-8"))
-    namespace = {"ns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
 
-    # Filter articles by the given month and year
-    filtered_urls = []
-    for url in root.findall("ns:url", namespace):
-        loc_element = url.find("ns:loc", namespace)
-        if loc_element is not None:
-            # Extract the date from the URL
-            url_parts = loc_element.text.split("/")
-            if len(url_parts) > 4:
-                url_year = int(url_parts[3])
-                url_month = int(url_parts[4])
+def harvest_sitemaps(
+    sitemaps: list[tuple[str, str]],
+    months: list[tuple[int, int]],
+    num_articles: int = 20,
+) -> dict[tuple[str, int, int], list[str]]:
+    """
+    Harvest the article URLs of several sites and months, parsing each sitemap once.
 
-                # Filter by month and year
-                if url_year == target_year and url_month == target_month:
-                    filtered_urls.append(loc_element.text)
+    Each sitemap is streamed a single time and its URLs are bucketed by site and month, each
+    bucket keeping a reservoir sample of `num_articles` URLs. Child sitemaps last modified
+    before the earliest month are skipped.
 
-    # Return the last n articles
-    return random.sample(filtered_urls, min(num_articles, len(filtered_urls)))
+    Args:
+        sitemaps (list[tuple[str, str]]): Website name and sitemap URL of each sitemap. A site
+            may be listed with several sitemaps.
+        months (list[tuple[int, int]]): Year and month of each bucket.
+        num_articles (int): Number of articles to return per site and month.
+
+    Returns:
+        dict[tuple[str, int, int], list[str]]: Sampled URLs keyed by (website, year, month),
+        empty when no month is given.
+    """
+    if not months:
+        # No bucket to fill: the sitemaps are not downloaded
+        return {}
+    earliest_year, earliest_month = min(months)
+    buckets = {
+        (website, year, month): Reservoir(num_articles)
+        for website, _ in sitemaps
+        for year, month in months
+    }
+
+    def sitemap_filter(loc, lastmod):
+        return modified_since(lastmod, earliest_year, earliest_month)
+
+    parsed = set()
+    for website, sitemap_url in sitemaps:
+        handler = get_site_handler(website)
+        if handler.search is not None:
+            raise ValueError(f"{website} has no sitemap to harvest.")
+        if (website, sitemap_url) in parsed:
+            continue
+        parsed.add((website, sitemap_url))
+
+        for url in iter_sitemap_urls(sitemap_url, sitemap_filter):
+            loc_element = url.find("ns:loc", handler.namespace)
+            if loc_element is None or not handler.url_filter(loc_element.text):
+                continue
+            date = handler.date_extractor(url, handler.namespace)
+            bucket = date and buckets.get((website, date.year, date.month))
+            if bucket is not None:
+                bucket.add(loc_element.text.strip())
+
+    return {key: reservoir.items for key, reservoir in buckets.items()}
 
 
 def get_filtered_urls(
@@ -232,13 +530,8 @@ def get_filtered_urls(
     Returns:
         list[str]: Filtered URLs.
     """
-    handlers = {
-        "https://www.bbc.com/": get_filtered_urls_for_bbc,
-        "https://www.economist.com/": get_filtered_urls_for_economist,
-    }
-
-    for prefix, handler in handlers.items():
-        if sitemap_url.startswith(prefix):
-            return handler(sitemap_url, target_year, target_month, num_articles)
+    for handler in SITE_HANDLERS.values():
+        if handler.sitemap_prefix and sitemap_url.startswith(handler.sitemap_prefix):
+            return handler.list_urls(sitemap_url, target_year, target_month, num_articles)
 
     return []  # Default empty list for unsupported sources
@@ -1,9 +1,11 @@
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
 import networkx as nx
-from langchain_community.graphs.graph_document import GraphDocument
 
+if TYPE_CHECKING:
+    from langchain_community.graphs.graph_document import GraphDocument
 
-def build_nx_graph(final_graph_document: GraphDocument) -> nx.Graph:
+
+def build_nx_graph(final_graph_document: "GraphDocument") -> nx.Graph:
     """
     Build a NetworkX graph from a GraphDocument.
 
@@ -12,14 +14,16 @@ def build_nx_graph(final_graph_document: GraphDocument) -> nx.Graph:
 
     Returns:
         nx.Graph: A NetworkX graph with nodes and edges based on the input document.
+            Each node keeps its `type` and `properties` as node attributes.
     """
-    # Extract unique node IDs
-    nodes = {node.id for node in final_graph_document.nodes}
     relationships = final_graph_document.relationships
 
-    # Initialize the graph and add nodes
+    # Initialize the graph and add nodes with their type and properties
     G = nx.Graph()
-    G.add_nodes_from(nodes)
+    G.add_nodes_from(
+        (node.id, {"type": node.type, "properties": node.properties})
+        for node in final_graph_document.nodes
+    )
 
     # Add edges based on relationships
     for relation in relationships:
@@ -38,6 +42,8 @@ def plot_nx_graph(G: nx.Graph):
     Returns:
         None: Displays the graph visualization using Matplotlib.
     """
+    import matplotlib.pyplot as plt
+
     pos = nx.spring_layout(G)  # Generate positions for nodes
     plt.figure(figsize=(20, 20))  # Configure the plot size
 
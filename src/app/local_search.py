@@ -0,0 +1,310 @@
+import re
+import difflib
+from dataclasses import dataclass
+import networkx as nx
+import numpy as np
+from openai import OpenAI
+from src.app.provenance import file_name
+from src.app.summary_index import embed_texts
+from src.app.utils.utils import read_prompt
+
+# Node types added by the graph builder that are not extracted entities
+STRUCTURAL_NODE_TYPES = {"File", "Chunk"}
+
+
+@dataclass
+class EntityIndex:
+    """
+    Name index over the entity nodes of a graph.
+
+    Attributes:
+        names (list[str]): Entity node IDs, in the same order as the embeddings.
+        lookup (dict[str, str]): Lower-cased entity name to node ID.
+        embeddings (np.ndarray): Normalized embedding of each entity name.
+        max_words (int): Number of words in the longest entity name.
+    """
+
+    names: list[str]
+    lookup: dict[str, str]
+    embeddings: np.ndarray
+    max_words: int
+
+
+def is_entity(graph: nx.Graph, node: str) -> bool:
+    """
+    Check whether a graph node is an extracted entity rather than a file or chunk node.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        node (str): Node ID.
+
+    Returns:
+        bool: True if the node is an entity.
+    """
+    return graph.nodes[node].get("type") not in STRUCTURAL_NODE_TYPES
+
+
+def build_entity_index(
+    graph: nx.Graph, model_name: str = "all-MiniLM-L6-v2"
+) -> EntityIndex:
+    """
+    Build the exact, fuzzy and embedding name index over the entities of a graph.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        model_name (str): Name of the SentenceTransformer model to use (default: "all-MiniLM-L6-v2").
+
+    Returns:
+        EntityIndex: Index over the entity names.
+    """
+    names = [node for node in graph.nodes if is_entity(graph, node)]
+    embeddings = (
+        embed_texts(names, model_name)
+        if names
+        else np.zeros((0, 0), dtype=np.float32)
+    )
+    return EntityIndex(
+        names=names,
+        lookup={name.lower(): name for name in names},
+        embeddings=embeddings,
+        max_words=max((len(name.split()) for name in names), default=0),
+    )
+
+
+def query_ngrams(query: str, max_words: int) -> list[str]:
+    """
+    List the word n-grams of a query, longest first.
+
+    Args:
+        query (str): The query.
+        max_words (int): Maximum number of words per n-gram.
+
+    Returns:
+        list[str]: Lower-cased n-grams of the query.
+    """
+    words = re.findall(r"[\w'-]+", query.lower())
+    return [
+        " ".join(words[start : start + size])
+        for size in range(min(max_words, len(words)), 0, -1)
+        for start in range(len(words) - size + 1)
+    ]
+
+
+def resolve_entities(
+    query: str,
+    entity_index: EntityIndex,
+    max_entities: int = 5,
+    fuzzy_cutoff: float = 0.85,
+    similarity_threshold: float = 0.5,
+    model_name: str = "all-MiniLM-L6-v2",
+) -> list[str]:
+    """
+    Resolve the entities mentioned in a query.
+
+    Exact name matches are tried first, then fuzzy matches on the query n-grams, and finally
+    the entity names closest to the query embedding.
+
+    Args:
+        query (str): The query.
+        entity_index (EntityIndex): Index over the entity names.
+        max_entities (int): Maximum number of entities to return.
+        fuzzy_cutoff (float): Minimum similarity ratio for a fuzzy match.
+        similarity_threshold (float): Minimum cosine similarity for an embedding match.
+        model_name (str): Name of the SentenceTransformer model used to build the index.
+
+    Returns:
+        list[str]: Node IDs of the resolved entities.
+    """
+    ngrams = query_ngrams(query, entity_index.max_words)
+    entities = []
+
+    def add(name: str):
+        if name not in entities and len(entities) < max_entities:
+            entities.append(name)
+
+    for ngram in ngrams:
+        if ngram in entity_index.lookup:
+            add(entity_index.lookup[ngram])
+
+    if not entities:
+        for ngram in ngrams:
+            for match in difflib.get_close_matches(
+                ngram, entity_index.lookup.keys(), n=1, cutoff=fuzzy_cutoff
+            ):
+                add(entity_index.lookup[match])
+
+    if len(entities) < max_entities and len(entity_index.embeddings):
+        query_embedding = embed_texts([query], model_name)[0]
+        scores = entity_index.embeddings @ query_embedding
+        for position in np.argsort(scores)[::-1][:max_entities]:
+            if scores[position] < similarity_threshold:
+                break
+            add(entity_index.names[position])
+
+    return entities
+
+
+def expand_neighborhood(
+    graph: nx.Graph, entities: list[str], hops: int = 2, max_nodes: int = 100
+) -> list[str]:
+    """
+    Collect the entities within a bounded number of hops of the resolved entities.
+
+    File and chunk nodes are not traversed, so the neighborhood only follows entity relationships.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        entities (list[str]): Node IDs of the resolved entities.
+        hops (int): Maximum distance from the resolved entities.
+        max_nodes (int): Maximum number of entities in the neighborhood.
+
+    Returns:
+        list[str]: Entity node IDs, closest first.
+    """
+    neighborhood = [entity for entity in entities if entity in graph]
+    visited = set(neighborhood)
+    frontier = list(neighborhood)
+    for _ in range(hops):
+        next_frontier = []
+        for node in frontier:
+            for neighbor in graph.neighbors(node):
+                if neighbor in visited or not is_entity(graph, neighbor):
+                    continue
+                if len(neighborhood) >= max_nodes:
+                    return neighborhood
+                visited.add(neighbor)
+                neighborhood.append(neighbor)
+                next_frontier.append(neighbor)
+        frontier = next_frontier
+    return neighborhood
+
+
+def collect_chunks(
+    graph: nx.Graph, neighborhood: list[str], max_chunks: int = 10
+) -> list[tuple[str, str]]:
+    """
+    Pull the chunk texts linked to a neighborhood through the `From` relationships.
+
+    Chunks linked to more entities of the neighborhood, and to closer entities, come first.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        neighborhood (list[str]): Entity node IDs, closest first.
+        max_chunks (int): Maximum number of chunks to return.
+
+    Returns:
+        list[tuple[str, str]]: Source file name and content of each chunk.
+    """
+    scores = {}
+    for rank, entity in enumerate(neighborhood):
+        for neighbor in graph.neighbors(entity):
+            if (
+                graph.nodes[neighbor].get("type") == "Chunk"
+                and graph.edges[entity, neighbor].get("type") == "From"
+            ):
+                scores[neighbor] = scores.get(neighbor, 0.0) + 1.0 / (rank + 1)
+
+    chunks = []
+    for chunk in sorted(scores, key=scores.get, reverse=True)[:max_chunks]:
+        properties = graph.nodes[chunk].get("properties", {})
+        if properties.get("content"):
+            chunks.append((chunk_source(graph, chunk), properties["content"]))
+    return chunks
+
+
+def chunk_source(graph: nx.Graph, chunk: str) -> str:
+    """
+    Resolve a chunk to the name of its source file through its `From` relationship.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        chunk (str): ID of the chunk node.
+
+    Returns:
+        str: Name of the source file, or the chunk ID if the chunk is not linked to a file.
+    """
+    for neighbor in graph.neighbors(chunk):
+        if (
+            graph.nodes[neighbor].get("type") == "File"
+            and graph.edges[chunk, neighbor].get("type") == "From"
+        ):
+            return file_name(graph, neighbor)
+    return chunk
+
+
+def describe_relationships(graph: nx.Graph, neighborhood: list[str]) -> list[str]:
+    """
+    Describe the relationships between the entities of a neighborhood.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        neighborhood (list[str]): Entity node IDs.
+
+    Returns:
+        list[str]: Relationships formatted as "source -> type -> target".
+    """
+    subgraph = graph.subgraph(neighborhood)
+    return [
+        f"{source} -> {data.get('type', 'unknown')} -> {target}"
+        for source, target, data in subgraph.edges(data=True)
+    ]
+
+
+def local_search(
+    query: str,
+    graph: nx.Graph,
+    client: OpenAI,
+    entity_index: EntityIndex | None = None,
+    hops: int = 2,
+    max_nodes: int = 100,
+    max_chunks: int = 10,
+) -> str:
+    """
+    Answer a query from the neighborhood of the entities it mentions with a single LLM call.
+
+    Args:
+        query (str): Query to be answered.
+        graph (nx.Graph): The NetworkX graph.
+        client (OpenAI): OpenAI client for generating the answer.
+        entity_index (EntityIndex | None): Index over the entity names. Built from the graph if not provided.
+        hops (int): Maximum distance from the resolved entities.
+        max_nodes (int): Maximum number of entities in the neighborhood.
+        max_chunks (int): Maximum number of chunks passed to the LLM.
+
+    Returns:
+        str: Answer generated from the neighborhood of the query entities.
+    """
+    if entity_index is None:
+        entity_index = build_entity_index(graph)
+
+    entities = resolve_entities(query, entity_index)
+    if not entities:
+        return "No entity of the query was found in the graph."
+    print(f"Resolved entities: {entities}")
+
+    neighborhood = expand_neighborhood(graph, entities, hops, max_nodes)
+    relationships = describe_relationships(graph, neighborhood)
+    chunks = collect_chunks(graph, neighborhood, max_chunks)
+    print(f"Local context: {len(neighborhood)} entities, {len(chunks)} chunks")
+
+    context = (
+        "Entities: "
+        + ", ".join(neighborhood)
+        + "\nRelationships: "
+        + ", ".join(relationships)
+        + "\nChunks:\n"
+        + "\n".join(f"(Source: {source}) {content}" for source, content in chunks)
+    )
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": read_prompt(
+                    "GraphRAG_vf/src/prompts/system_prompts/local_search_answers.txt"
+                ),
+            },
+            {"role": "user", "content": f"Query: {query} Context: {context}"},
+        ],
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,117 @@
+import os
+from dataclasses import dataclass, field
+import networkx as nx
+
+
+@dataclass
+class ProvenanceIndex:
+    """
+    Maps communities and entities to the source files they were extracted from.
+
+    Attributes:
+        entity_chunks (dict[str, set[str]]): Lower-cased entity ID to the IDs of its chunks.
+        chunk_files (dict[str, str]): Chunk ID to the name of its source file.
+        community_entities (dict[int, list[str]]): Community ID to the IDs of its entities.
+        community_files (dict[int, set[str]]): Community ID to the names of its source files.
+    """
+
+    entity_chunks: dict[str, set[str]] = field(default_factory=dict)
+    chunk_files: dict[str, str] = field(default_factory=dict)
+    community_entities: dict[int, list[str]] = field(default_factory=dict)
+    community_files: dict[int, set[str]] = field(default_factory=dict)
+
+    def entity_files(self, entity: str) -> set[str]:
+        """
+        Resolve an entity to the names of its source files.
+
+        Args:
+            entity (str): Entity ID, case-insensitive.
+
+        Returns:
+            set[str]: Names of the source files, empty if the entity is unknown.
+        """
+        return {
+            self.chunk_files[chunk]
+            for chunk in self.entity_chunks.get(entity.lower(), ())
+            if chunk in self.chunk_files
+        }
+
+    def resolve_sources(
+        self, community_ids: list[int] = (), entities: list[str] = ()
+    ) -> list[str]:
+        """
+        Resolve the communities and entities cited by an answer to source file names.
+
+        Entities are more specific than communities, so communities are only used when none of
+        the entities can be resolved.
+
+        Args:
+            community_ids (list[int]): IDs of the cited communities.
+            entities (list[str]): IDs of the cited entities.
+
+        Returns:
+            list[str]: Sorted names of the source files.
+        """
+        files = set().union(*(self.entity_files(entity) for entity in entities))
+        if not files:
+            files = set().union(
+                *(self.community_files.get(cid, set()) for cid in community_ids)
+            )
+        return sorted(files)
+
+
+def file_name(graph: nx.Graph, file_node: str) -> str:
+    """
+    Get the name of the source file of a file node.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        file_node (str): ID of the file node.
+
+    Returns:
+        str: Base name of the file path, or the node ID if the path is unknown.
+    """
+    path = graph.nodes[file_node].get("properties", {}).get("path")
+    return os.path.basename(path) if path else file_node
+
+
+def build_provenance_index(
+    graph: nx.Graph, communities: list[list[str]]
+) -> ProvenanceIndex:
+    """
+    Build the provenance index of a graph through its `From` relationships.
+
+    Args:
+        graph (nx.Graph): The NetworkX graph.
+        communities (list[list[str]]): Communities of the graph, in the order of their summaries.
+
+    Returns:
+        ProvenanceIndex: Index mapping entities to chunks, chunks to files and communities to files.
+    """
+    index = ProvenanceIndex()
+    node_types = nx.get_node_attributes(graph, "type")
+
+    for source, target, data in graph.edges(data=True):
+        if data.get("type") != "From":
+            continue
+        for chunk, other in ((source, target), (target, source)):
+            if node_types.get(chunk) != "Chunk":
+                continue
+            if node_types.get(other) == "File":
+                index.chunk_files[chunk] = file_name(graph, other)
+            elif node_types.get(other) not in ("Chunk", "File"):
+                index.entity_chunks.setdefault(other.lower(), set()).add(chunk)
+
+    for community_id, community in enumerate(communities):
+        entities = [
+            node for node in community if node_types.get(node) not in ("Chunk", "File")
+        ]
+        files = set().union(*(index.entity_files(entity) for entity in entities))
+        for node in community:
+            if node_types.get(node) == "Chunk" and node in index.chunk_files:
+                files.add(index.chunk_files[node])
+            elif node_types.get(node) == "File":
+                files.add(file_name(graph, node))
+        index.community_entities[community_id] = entities
+        index.community_files[community_id] = files
+    return index
@@ -0,0 +1,147 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+from src.app.summary_index import embed_texts
+
+
+@dataclass
+class CacheEntry:
+    """
+    Cached answer to a query.
+
+    Attributes:
+        embedding (np.ndarray): Normalized embedding of the query.
+        answer (tuple[str, list[str]]): Answer text and list of source filenames.
+        created_at (float): Time at which the answer was cached.
+    """
+
+    embedding: np.ndarray
+    answer: tuple[str, list[str]]
+    created_at: float
+
+
+class QueryCache:
+    """
+    Semantic query-answer cache keyed by session, index version and query embedding.
+
+    A query hits the cache when a previous query on the same version of the session index has
+    a cosine similarity above `similarity_threshold`. Entries are evicted in LRU order once
+    `max_entries` is reached and expire after `ttl` seconds. Entries of a previous index version
+    are dropped as soon as a newer version of the session is looked up.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 24 * 3600,
+        similarity_threshold: float = 0.95,
+        model_name: str = "all-MiniLM-L6-v2",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.model_name = model_name
+        self._entries: OrderedDict[tuple[str, str, str, str], CacheEntry] = OrderedDict()
+        self._versions: dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query for exact matching."""
+        return " ".join(query.lower().split())
+
+    def _check_version(self, session_id: str, version: str):
+        """Drop the entries of a session when its index version changes."""
+        if self._versions.get(session_id) != version:
+            self.invalidate(session_id)
+            self._versions[session_id] = version
+
+    def _expire(self):
+        """Drop the entries older than the TTL."""
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now - e.created_at > self.ttl]:
+            del self._entries[key]
+
+    def get(
+        self, session_id: str, version: str, query: str, mode: str = "Global"
+    ) -> tuple[str, list[str]] | None:
+        """
+        Look up the answer to a query or to a close paraphrase of it.
+
+        Args:
+            session_id (str): Unique session ID.
+            version (str): Version of the session index.
+            query (str): User query.
+            mode (str): Answering mode (search mode and answer format) the answer was generated with.
+
+        Returns:
+            tuple[str, list[str]] | None: Cached answer text and sources, or None on a miss.
+        """
+        with self._lock:
+            self._check_version(session_id, version)
+            self._expire()
+            key = (session_id, version, mode, self.normalize(query))
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key].answer
+            candidates = [
+                k for k in self._entries if k[:3] == (session_id, version, mode)
+            ]
+        if not candidates:
+            return None
+
+        query_embedding = embed_texts([query], self.model_name)[0]
+        with self._lock:
+            candidates = [k for k in candidates if k in self._entries]
+            if not candidates:
+                return None
+            scores = np.stack([self._entries[k].embedding for k in candidates]) @ query_embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(candidates[best])
+            print(f"Query cache hit (similarity {scores[best]:.3f}).")
+            return self._entries[candidates[best]].answer
+
+    def put(
+        self,
+        session_id: str,
+        version: str,
+        query: str,
+        answer: tuple[str, list[str]],
+        mode: str = "Global",
+    ):
+        """
+        Cache the answer to a query.
+
+        Args:
+            session_id (str): Unique session ID.
+            version (str): Version of the session index the answer was generated from.
+            query (str): User query.
+            answer (tuple[str, list[str]]): Answer text and list of source filenames.
+            mode (str): Answering mode (search mode and answer format) the answer was generated with.
+        """
+        embedding = embed_texts([query], self.model_name)[0]
+        with self._lock:
+            if self._versions.get(session_id, version) != version:
+                # The index was rebuilt while the answer was being generated
+                return
+            self._versions[session_id] = version
+            key = (session_id, version, mode, self.normalize(query))
+            self._entries[key] = CacheEntry(embedding, answer, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str):
+        """
+        Drop all cached answers of a session.
+
+        Args:
+            session_id (str): Unique session ID.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == session_id]:
+                del self._entries[key]
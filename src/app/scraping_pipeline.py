@@ -1,17 +1,52 @@
 import os
-import numpy as np
-from src.app.get_urls import (
-    get_filtered_urls_for_bbc,
-    get_filtered_urls_for_economist,
-    get_filtered_urls_for_nhs,
-    get_filtered_urls_for_google_news,
-)
-from src.app.utils.utils_scraping import (
-    create_article_dataframe,
-    save_dataframe_to_csv,
-    save_articles_to_txt,
-)
-from src.app.articles_subject import calculate_bert_similarity
+from datetime import datetime, timezone
+from src.app.get_urls import get_site_handler
+from src.app.utils.utils_scraping import save_dataframe_to_csv, save_articles_to_corpus
+from src.app.utils.job_queue import ScrapingJobQueue, run_workers
+from src.app.utils.dedup import deduplicate_articles
+from src.app.articles_subject import rank_articles
+
+
+def get_article_urls(
+    website: str,
+    sitemap_url: str,
+    num_articles: int,
+    query: str,
+    target_year: int,
+    target_month: int,
+    lim_articles: int = 200,
+    modified_after: datetime | None = None,
+) -> list[str]:
+    """
+    List the article URLs to scrape from a website.
+
+    Args:
+        website (str): Name of the website to scrape articles from, as registered in
+            `SITE_HANDLERS`: "bbc", "the economist", "nhs", "google news".
+        sitemap_url (str): URL of the sitemap to extract article URLs from.
+        num_articles (int): Number of articles to return for search-based sources (Google News).
+        query (str): Search query for search-based sources.
+        target_year (int): Target year for filtering articles.
+        target_month (int): Target month for filtering articles.
+        lim_articles (int, optional): Maximum number of articles to retrieve. Default is 200.
+        modified_after (datetime | None, optional): If set, only list the sitemap URLs last
+            modified after this timezone-aware date. Default is None.
+
+    Returns:
+        list[str]: Article URLs.
+
+    Raises:
+        ValueError: If the website is not registered.
+    """
+    handler = get_site_handler(website)
+    return handler.list_urls(
+        sitemap_url,
+        target_year,
+        target_month,
+        num_articles if handler.search is not None else lim_articles,
+        query,
+        modified_after,
+    )
 
 
 def scraping_pipeline(
@@ -23,10 +58,18 @@ def scraping_pipeline(
     target_month: int,
     lim_articles: int = 200,
     output_dir: str = "articles/",
+    job_db: str = "scraping_jobs.sqlite",
+    num_workers: int = 1,
+    rerank_candidates: int | None = 100,
+    refresh: bool = False,
 ):
     """
     Scrapes articles from a specified website, filters them based on the provided criteria, and saves the results.
 
+    The article URLs are fetched through a persisted job queue: running the pipeline again with
+    the same parameters resumes an interrupted run, and articles already fetched are not
+    downloaded again. Refreshing adds the articles published since the run was created.
+
     Args:
         website (str): Name of the website to scrape articles from.
             Supported values: "bbc", "the economist", "nhs", "google news".
@@ -36,51 +79,85 @@ def scraping_pipeline(
         target_year (int): Target year for filtering articles.
         target_month (int): Target month for filtering articles.
         lim_articles (int, optional): Maximum number of articles to retrieve. Default is 200.
-        output_dir (str, optional): Directory to save article text files. Default is "articles/".
+        output_dir (str, optional): Data folder whose corpus store receives the articles. Default is "articles/".
+        job_db (str, optional): Path of the job queue database. Default is "scraping_jobs.sqlite".
+        num_workers (int, optional): Number of worker processes fetching the articles. Default is 1.
+        rerank_candidates (int | None, optional): Number of articles kept by the TF-IDF prefilter
+            and re-ranked with the BERT model. None re-ranks every article. Default is 100.
+        refresh (bool, optional): Whether to add to an existing run the sitemap URLs last
+            modified since it was created. The run keeps at most `lim_articles` tasks (the
+            number of Google News results for Google News), and URLs already fetched are not
+            fetched again. Default is False.
 
     Returns:
         tuple: Two DataFrames:
             - all_articles_df (DataFrame): Contains all scraped articles.
             - top_articles_df (DataFrame): Contains top N articles based on similarity (or None for Google News).
     """
-    # Retrieve filtered URLs based on the website
-    if website == "bbc":
-        filtered_urls = get_filtered_urls_for_bbc(
-            sitemap_url, target_year, target_month, lim_articles
-        )
-    elif website == "the economist":
-        filtered_urls = get_filtered_urls_for_economist(
-            sitemap_url, target_year, target_month, lim_articles
-        )
-    elif website == "nhs":
-        filtered_urls = get_filtered_urls_for_nhs(
-            sitemap_url, target_year, target_month, lim_articles
-        )
-    elif website == "google news":
-        filtered_urls = get_filtered_urls_for_google_news(query, num_articles)
-    else:
-        raise ValueError(f"Invalid website name: {website}")
-
-    if not filtered_urls:
-        raise ValueError(f"No articles found for {website} with the given criteria.")
-
-    # Store all articles in a DataFrame
-    all_articles_df = create_article_dataframe(
-        filtered_urls, save_to_txt=False, site_name=website
-    )
+    run_params = {
+        "website": website,
+        "sitemap_url": sitemap_url,
+        "target_year": target_year,
+        "target_month": target_month,
+        "lim_articles": lim_articles,
+        # Only the Google News results depend on the query
+        "query": query if website == "google news" else None,
+        "num_articles": num_articles if website == "google news" else None,
+    }
+    queue = ScrapingJobQueue(job_db)
+    run_id = queue.run_id(**run_params)
+    max_tasks = num_articles if website == "google news" else lim_articles
+    try:
+        created_at = queue.created_at(run_id)
+        if created_at is not None and not refresh:
+            print(f"Resuming scraping run {run_id}: {queue.progress(run_id)}")
+        else:
+            # Retrieve filtered URLs based on the website, or the ones added since the run
+            filtered_urls = get_article_urls(
+                website,
+                sitemap_url,
+                num_articles,
+                query,
+                target_year,
+                target_month,
+                lim_articles,
+                modified_after=(
+                    datetime.fromtimestamp(created_at, timezone.utc)
+                    if created_at is not None
+                    else None
+                ),
+            )
+            if not filtered_urls and created_at is None:
+                raise ValueError(
+                    f"No articles found for {website} with the given criteria."
+                )
+            added = queue.create_run(run_id, filtered_urls, max_tasks, **run_params)
+            if created_at is not None:
+                print(f"Refreshed scraping run {run_id}: {added} new articles")
+
+        # Fetch the remaining articles and store all articles in a DataFrame
+        print(f"Scraping run {run_id}: {run_workers(job_db, run_id, num_workers)}")
+        all_articles_df = queue.results(run_id)
+    finally:
+        queue.close()
+
+    # Drop the same story published under several URLs
+    all_articles_df, dedup_report = deduplicate_articles(all_articles_df)
+    print(dedup_report.summary())
+
     save_dataframe_to_csv(all_articles_df, f"{website}_all_articles.csv")
 
     # If the website is Google News, return only the scraped articles
     if website == "google news":
-        save_articles_to_txt(all_articles_df, output_dir)
+        save_articles_to_corpus(all_articles_df, output_dir)
         return None, all_articles_df
 
     # Process articles to find the top N based on similarity to the query
     preprocessed_articles = all_articles_df["content"].tolist()
-    similarity_scores = calculate_bert_similarity(preprocessed_articles, query)
-    top_indices = np.argsort(similarity_scores)[-num_articles:][::-1]
+    top_indices, top_similarity_scores = rank_articles(
+        preprocessed_articles, query, num_articles, rerank_candidates
+    )
     top_articles_df = all_articles_df.iloc[top_indices]
-    top_similarity_scores = similarity_scores[top_indices]
 
     # Log the top articles with their similarity scores
     for idx, score in zip(top_indices, top_similarity_scores):
@@ -90,7 +167,7 @@ def scraping_pipeline(
 
     # Save results
     save_dataframe_to_csv(top_articles_df, f"{website}_selected_articles.csv")
-    save_articles_to_txt(top_articles_df, output_dir)
+    save_articles_to_corpus(top_articles_df, output_dir)
     return all_articles_df, top_articles_df
 
 
@@ -0,0 +1,230 @@
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+import networkx as nx
+import numpy as np
+from src.app.local_search import EntityIndex
+from src.app.provenance import ProvenanceIndex
+from src.app.utils.utils import file_version, load_pickle_if_exists
+
+# Number of community summaries mapped over per query when a summary index exists
+SUMMARY_TOP_K = 10
+
+
+@dataclass
+class SessionIndex:
+    """
+    Index of a session loaded in memory.
+
+    Attributes:
+        community_summaries (list[str]): Summaries for each community.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries, if any.
+        graph (nx.Graph | None): NetworkX graph of the session, if any.
+        entity_index (EntityIndex | None): Entity name index used by local search, if any.
+        provenance (ProvenanceIndex | None): Index resolving communities and entities to source files, if any.
+        precomputed_answers (dict[str, tuple[str, list[str]]]): Answer text and sources of the queries
+            answered at indexing time, keyed by query. Empty if they were computed for another version.
+        version (str): Version of the session files the index was loaded from.
+        size (int): Size of the session files on disk, used as an estimate of the memory footprint.
+    """
+
+    community_summaries: list[str]
+    summary_embeddings: np.ndarray | None
+    graph: nx.Graph | None
+    entity_index: EntityIndex | None
+    provenance: ProvenanceIndex | None
+    precomputed_answers: dict[str, tuple[str, list[str]]]
+    version: str
+    size: int
+
+    def precomputed_answer(
+        self,
+        query: str,
+        search_mode: str,
+        answer_mode: str,
+        top_k: int = SUMMARY_TOP_K,
+    ) -> tuple[str, list[str]] | None:
+        """
+        Get the precomputed answer of a query, if it is asked the way answers are precomputed.
+
+        Answers are precomputed with global search in single pass mode, over the
+        `SUMMARY_TOP_K` most relevant communities.
+
+        Args:
+            query (str): Query to answer.
+            search_mode (str): "Global" or "Local" search.
+            answer_mode (str): "Single pass" or "Reduce + edit".
+            top_k (int): Number of community summaries mapped over.
+
+        Returns:
+            tuple[str, list[str]] | None: Answer text and sources, or None if the query has no
+            precomputed answer for this mode.
+        """
+        if (search_mode, answer_mode, top_k) != ("Global", "Single pass", SUMMARY_TOP_K):
+            return None
+        return self.precomputed_answers.get(query)
+
+
+def session_files(session_id: str) -> dict[str, str]:
+    """
+    List the files making up the index of a session.
+
+    Args:
+        session_id (str): Unique session ID.
+
+    Returns:
+        dict[str, str]: Path of each session file, keyed by the `SessionIndex` attribute it holds.
+    """
+    return {
+        "community_summaries": f"{session_id}.pkl",
+        "summary_embeddings": f"{session_id}_embeddings.pkl",
+        "graph": f"{session_id}.gpickle",
+        "entity_index": f"{session_id}_entities.pkl",
+        "provenance": f"{session_id}_provenance.pkl",
+    }
+
+
+def precomputed_answers_file(session_id: str) -> str:
+    """
+    Get the path of the answers precomputed for a session.
+
+    The file is not part of `session_files`: it stores the version of the index it was computed
+    from, and writing it does not change the version of the session.
+
+    Args:
+        session_id (str): Unique session ID.
+
+    Returns:
+        str: Path of the precomputed answers pickle.
+    """
+    return f"{session_id}_answers.pkl"
+
+
+def session_version(session_id: str) -> str:
+    """
+    Identify the current version of a session index from its files.
+
+    Args:
+        session_id (str): Unique session ID.
+
+    Returns:
+        str: Version string that changes whenever one of the session files is rewritten.
+    """
+    return "/".join(file_version(path) for path in session_files(session_id).values())
+
+
+def load_session_index(session_id: str) -> SessionIndex:
+    """
+    Load the index of a session from disk.
+
+    Args:
+        session_id (str): Unique session ID.
+
+    Returns:
+        SessionIndex: The loaded session index.
+
+    Raises:
+        FileNotFoundError: If the community summaries of the session do not exist.
+    """
+    files = session_files(session_id)
+    version = session_version(session_id)
+    with open(files["community_summaries"], "rb") as f:
+        community_summaries = pickle.load(f)
+    precomputed = load_pickle_if_exists(precomputed_answers_file(session_id))
+    return SessionIndex(
+        community_summaries=community_summaries,
+        summary_embeddings=load_pickle_if_exists(files["summary_embeddings"]),
+        graph=load_pickle_if_exists(files["graph"]),
+        entity_index=load_pickle_if_exists(files["entity_index"]),
+        provenance=load_pickle_if_exists(files["provenance"]),
+        precomputed_answers=(
+            precomputed["answers"]
+            if precomputed and precomputed["version"] == version
+            else {}
+        ),
+        version=version,
+        size=sum(
+            os.path.getsize(path) for path in files.values() if os.path.exists(path)
+        ),
+    )
+
+
+class SessionStore:
+    """
+    Process-wide store keeping loaded session indexes in memory.
+
+    Sessions are evicted in LRU order once more than `max_sessions` are loaded or their total
+    size exceeds `max_bytes`. An entry is reloaded when the version of its files changes, and
+    concurrent first loads of the same session are coalesced into a single load.
+    """
+
+    def __init__(self, max_sessions: int = 8, max_bytes: int = 2 * 1024**3):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, SessionIndex] = OrderedDict()
+        # Only the sessions being loaded hold a lock: entries go away with their last waiter
+        self._load_locks: weakref.WeakValueDictionary[str, threading.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _lookup(self, session_id: str, version: str) -> SessionIndex | None:
+        """Return the loaded index of a session if it is up to date."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(session_id)
+            return entry
+
+    def get(self, session_id: str) -> SessionIndex:
+        """
+        Get the index of a session, loading it from disk if needed.
+
+        Args:
+            session_id (str): Unique session ID.
+
+        Returns:
+            SessionIndex: The up-to-date session index.
+        """
+        version = session_version(session_id)
+        entry = self._lookup(session_id, version)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            load_lock = self._load_locks.get(session_id)
+            if load_lock is None:
+                load_lock = self._load_locks[session_id] = threading.Lock()
+        with load_lock:
+            # Another request may have loaded the session while this one was waiting
+            entry = self._lookup(session_id, version)
+            if entry is not None:
+                return entry
+            entry = load_session_index(session_id)
+            with self._lock:
+                self._entries[session_id] = entry
+                self._entries.move_to_end(session_id)
+                self._evict()
+        return entry
+
+    def _evict(self):
+        """Evict the least recently used sessions until the store fits its limits."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions
+            or sum(entry.size for entry in self._entries.values()) > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str):
+        """
+        Drop the loaded index of a session.
+
+        Args:
+            session_id (str): Unique session ID.
+        """
+        with self._lock:
+            self._entries.pop(session_id, None)
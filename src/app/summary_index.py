@@ -0,0 +1,68 @@
+import numpy as np
+from src.app.utils.embedding_store import encode_cached
+
+
+def embed_texts(texts: list[str], model_name: str = "all-MiniLM-L6-v2") -> np.ndarray:
+    """
+    Encode texts into L2-normalized embeddings with the shared model of the embedding registry.
+
+    Embeddings are cached by content hash, so a text is only encoded once.
+
+    Args:
+        texts (list[str]): Texts to encode.
+        model_name (str): Name of the SentenceTransformer model to use (default: "all-MiniLM-L6-v2").
+
+    Returns:
+        np.ndarray: A float32 matrix of shape (len(texts), dim) with unit-norm rows.
+    """
+    return encode_cached(texts, model_name)
+
+
+def build_summary_index(
+    community_summaries: list[str], model_name: str = "all-MiniLM-L6-v2"
+) -> np.ndarray:
+    """
+    Build the embedding index over community summaries.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        model_name (str): Name of the SentenceTransformer model to use (default: "all-MiniLM-L6-v2").
+
+    Returns:
+        np.ndarray: One normalized embedding per summary, in the same order as the summaries.
+    """
+    if not community_summaries:
+        return np.zeros((0, 0), dtype=np.float32)
+    return embed_texts(community_summaries, model_name)
+
+
+def rank_summaries(
+    query: str,
+    summary_embeddings: np.ndarray,
+    top_k: int | None = None,
+    similarity_threshold: float | None = None,
+    model_name: str = "all-MiniLM-L6-v2",
+) -> list[int]:
+    """
+    Rank community summaries against a query and select the most relevant ones.
+
+    Args:
+        query (str): Query to rank the summaries against.
+        summary_embeddings (np.ndarray): Embedding index built by `build_summary_index`.
+        top_k (int | None): Maximum number of summaries to keep (default: keep all).
+        similarity_threshold (float | None): Minimum cosine similarity to keep a summary (default: no threshold).
+        model_name (str): Name of the SentenceTransformer model used to build the index.
+
+    Returns:
+        list[int]: Indices of the selected summaries, most similar first.
+    """
+    if len(summary_embeddings) == 0:
+        return []
+    query_embedding = embed_texts([query], model_name)[0]
+    scores = summary_embeddings @ query_embedding
+    order = np.argsort(scores)[::-1]
+    if similarity_threshold is not None:
+        order = order[scores[order] >= similarity_threshold]
+    if top_k is not None:
+        order = order[:top_k]
+    return order.tolist()
@@ -0,0 +1,157 @@
+import time
+import random
+import asyncio
+from urllib.parse import urlparse
+import aiohttp
+from src.app.utils.http_cache import HttpCache, http_cache
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostThrottle:
+    """
+    Politeness throttle spacing the requests sent to the same host.
+
+    Args:
+        delay (float): Minimum number of seconds between the starts of two requests to a host.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._last_request: dict[str, float] = {}
+
+    async def wait(self, host: str):
+        """
+        Wait until a new request can be sent to a host.
+
+        Args:
+            host (str): Host name of the request.
+        """
+        if self.delay <= 0:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            elapsed = time.monotonic() - self._last_request.get(host, float("-inf"))
+            if elapsed < self.delay:
+                await asyncio.sleep(self.delay - elapsed)
+            self._last_request[host] = time.monotonic()
+
+
+async def fetch_url(
+    session: aiohttp.ClientSession,
+    url: str,
+    throttle: HostThrottle,
+    retries: int = 3,
+    backoff: float = 1.0,
+    cache: HttpCache | None = None,
+) -> bytes | None:
+    """
+    Fetch the body of a URL, retrying transient failures with exponential backoff.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session holding the keep-alive connections.
+        url (str): URL to fetch.
+        throttle (HostThrottle): Politeness throttle of the hosts.
+        retries (int): Maximum number of retries after the first attempt.
+        backoff (float): Base delay in seconds of the exponential backoff.
+        cache (HttpCache | None): HTTP cache used to revalidate the URL, if any.
+
+    Returns:
+        bytes | None: Body of the response, or None if the URL could not be fetched.
+    """
+    if cache is not None and cache.offline:
+        body = cache.read(url)
+        if body is None:
+            print(f"Failed to fetch {url}: not in the HTTP cache (offline mode)")
+        return body
+
+    host = urlparse(url).netloc
+    revalidate = cache is not None
+    for attempt in range(retries + 1):
+        await throttle.wait(host)
+        headers = cache.conditional_headers(url) if revalidate else {}
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and revalidate:
+                    body = cache.read(url)
+                    if body is not None:
+                        return body
+                    # The entry was evicted since the request was built
+                    revalidate = False
+                    retry_after, error = "0", "HTTP 304 for an evicted cache entry"
+                elif response.status not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    body = await response.read()
+                    if cache is not None:
+                        cache.store(url, body, response.headers)
+                    return body
+                else:
+                    retry_after = response.headers.get("Retry-After", "")
+                    error = f"HTTP {response.status}"
+        except asyncio.TimeoutError:
+            retry_after, error = "", "timed out"
+        except aiohttp.ClientResponseError as e:
+            print(f"Failed to fetch {url}: {e}")
+            return None
+        except aiohttp.ClientError as e:
+            retry_after, error = "", str(e)
+
+        if attempt == retries:
+            print(f"Failed to fetch {url} after {retries + 1} attempts: {error}")
+            return None
+        delay = backoff * 2**attempt + random.uniform(0, backoff)
+        if retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+
+
+async def fetch_urls_async(
+    urls: list[str],
+    max_connections: int = 32,
+    per_host_limit: int = 8,
+    politeness_delay: float = 0.1,
+    timeout: float = 10,
+    retries: int = 3,
+    backoff: float = 1.0,
+    cache: HttpCache | None = http_cache,
+) -> list[bytes | None]:
+    """
+    Fetch URLs concurrently over shared keep-alive connections.
+
+    Args:
+        urls (list[str]): URLs to fetch.
+        max_connections (int): Maximum number of open connections.
+        per_host_limit (int): Maximum number of concurrent connections per host.
+        politeness_delay (float): Minimum number of seconds between the starts of two requests to a host.
+        timeout (float): Total timeout in seconds of each attempt.
+        retries (int): Maximum number of retries of each URL.
+        backoff (float): Base delay in seconds of the exponential backoff.
+        cache (HttpCache | None): HTTP cache used to revalidate the URLs, or None to always download them.
+
+    Returns:
+        list[bytes | None]: Body of each URL, in the order of the URLs, or None for the URLs that could not be fetched.
+    """
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=per_host_limit)
+    throttle = HostThrottle(politeness_delay)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as session:
+        return await asyncio.gather(
+            *(fetch_url(session, url, throttle, retries, backoff, cache) for url in urls)
+        )
+
+
+def fetch_urls(urls: list[str], **kwargs) -> list[bytes | None]:
+    """
+    Fetch URLs concurrently from synchronous code.
+
+    Args:
+        urls (list[str]): URLs to fetch.
+        **kwargs: Options of `fetch_urls_async`.
+
+    Returns:
+        list[bytes | None]: Body of each URL, in the order of the URLs, or None for the URLs that could not be fetched.
+    """
+    return asyncio.run(fetch_urls_async(urls, **kwargs))
@@ -0,0 +1,42 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+def get_api_key(name: str) -> str:
+    """
+    Read an API key from the environment or the .env file.
+
+    Keys are only checked when a client needs them, so commands that do not call the API
+    start without them.
+
+    Args:
+        name (str): Name of the environment variable (e.g. "OPENAI_API_KEY").
+
+    Returns:
+        str: The API key.
+
+    Raises:
+        EnvironmentError: If the key is not set.
+    """
+    load_dotenv()
+    api_key = os.getenv(name)
+    if not api_key:
+        raise EnvironmentError(f"Missing {name}. Please set it in the environment.")
+    return api_key
+
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """
+    Get the shared OpenAI client, created on first use.
+
+    Returns:
+        OpenAI: OpenAI client authenticated with OPENAI_API_KEY.
+
+    Raises:
+        EnvironmentError: If OPENAI_API_KEY is not set.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=get_api_key("OPENAI_API_KEY"))
@@ -0,0 +1,315 @@
+import os
+import json
+import hashlib
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Sub-directory of a data folder holding its corpus store
+CORPUS_DIR = ".corpus"
+
+
+def article_name(title: str, suffix: str = "") -> str:
+    """
+    Build the name of an article from its title.
+
+    Names mirror the text files previously written for each article, so that graph nodes and
+    answer sources keep the same identifiers.
+
+    Args:
+        title (str): Title of the article.
+        suffix (str, optional): Suffix distinguishing articles with the same title. Default is
+            no suffix.
+
+    Returns:
+        str: Name of the article.
+    """
+    name = title.replace(" ", "_").replace("/", "_")
+    return f"{name}_{suffix}.txt" if suffix else f"{name}.txt"
+
+
+def format_article(record: dict) -> str:
+    """
+    Format an article record as the text indexed and displayed for it.
+
+    Args:
+        record (dict): Article record with url, title, date and content.
+
+    Returns:
+        str: Article text with its URL, title and date header.
+    """
+    return (
+        f"URL: {record['url']}\n"
+        f"Title: {record['title']}\n"
+        f"Date: {record['date']}\n\n"
+        f"{record['content']}"
+    )
+
+
+def _text_field(row, name: str, default: str) -> str:
+    """Read a text column of a DataFrame row, falling back to a default for missing values."""
+    value = getattr(row, name, None)
+    return value if isinstance(value, str) and value else default
+
+
+class CorpusStore:
+    """
+    Append-only JSONL store of scraped articles with an offset index.
+
+    Each record holds the id, url, title, date, content and content hash of an article.
+    Records are appended in bulk to `articles.jsonl`, and the byte offset and length of each
+    record are appended to `offsets.jsonl`, so an article is read with a single seek. Removing
+    an article appends a tombstone. An offset index lagging behind the data file (e.g. after a
+    crash) is completed by scanning the missing records on load.
+
+    Args:
+        directory (str): Directory of the store.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "articles.jsonl")
+        self.index_path = os.path.join(directory, "offsets.jsonl")
+        self._offsets: dict[str, tuple[int, int]] = {}
+        self._hashes: dict[str, str] = {}
+        self._id_hashes: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _index(self, doc_id: str, offset: int, length: int, content_hash: str | None):
+        """Add a record to the in-memory index; a record without hash is a tombstone."""
+        self._hashes.pop(self._id_hashes.pop(doc_id, None), None)
+        if content_hash is None:
+            self._offsets.pop(doc_id, None)
+        else:
+            self._offsets[doc_id] = (offset, length)
+            self._id_hashes[doc_id] = content_hash
+            self._hashes[content_hash] = doc_id
+
+    def _load_index(self):
+        """Load the offset index, completing it from the data file if it lags behind."""
+        if not os.path.exists(self.data_path):
+            return
+        indexed_until = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        doc_id, offset, length, content_hash = json.loads(line)
+                    except ValueError:
+                        break  # Partially written last line
+                    self._index(doc_id, offset, length, content_hash)
+                    indexed_until = offset + length
+
+        if indexed_until < os.path.getsize(self.data_path):
+            entries = []
+            with open(self.data_path, "rb") as file:
+                file.seek(indexed_until)
+                offset = indexed_until
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Partially written last line
+                    self._index(record["id"], offset, len(line), record.get("hash"))
+                    entries.append(
+                        [record["id"], offset, len(line), record.get("hash")]
+                    )
+                    offset += len(line)
+            self._append_index(entries)
+
+    def _append_index(self, entries: list[list]):
+        """Append entries to the offset index file."""
+        with open(self.index_path, "a", encoding="utf-8") as file:
+            file.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+    def _append(self, records: list[dict]):
+        """Append records to the data file and the offset index."""
+        if not records:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        with open(self.data_path, "ab") as file:
+            offset = file.tell()
+            for record in records:
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                file.write(line)
+                self._index(record["id"], offset, len(line), record.get("hash"))
+                entries.append([record["id"], offset, len(line), record.get("hash")])
+                offset += len(line)
+        self._append_index(entries)
+
+    def add_articles(self, df: "pd.DataFrame") -> list[str]:
+        """
+        Append the articles of a DataFrame in bulk.
+
+        Articles whose content is already stored are skipped, and the ID of the stored copy
+        is returned for them. An article whose title is already used by another article gets
+        the start of its content hash appended to its ID.
+
+        Args:
+            df (pd.DataFrame): Articles with "url", "title", "date" and "content" columns.
+
+        Returns:
+            list[str]: IDs of the articles, including the ones already stored.
+        """
+        ids, records, batch_hashes, batch_ids = [], [], {}, set()
+        with self._lock:
+            for row in df.itertuples(index=False):
+                content = _text_field(row, "content", "")
+                content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                if content_hash in self._hashes or content_hash in batch_hashes:
+                    ids.append(self._hashes.get(content_hash) or batch_hashes[content_hash])
+                    continue
+                title = _text_field(row, "title", "Untitled")
+                doc_id = article_name(title)
+                if doc_id in self._offsets or doc_id in batch_ids:
+                    doc_id = article_name(title, content_hash[:8])
+                ids.append(doc_id)
+                batch_ids.add(doc_id)
+                batch_hashes[content_hash] = doc_id
+                records.append(
+                    {
+                        "id": doc_id,
+                        "url": _text_field(row, "url", "Unknown URL"),
+                        "title": title,
+                        "date": _text_field(row, "date", "Unknown Date"),
+                        "content": content,
+                        "hash": content_hash,
+                    }
+                )
+            self._append(records)
+        return ids
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove an article by appending a tombstone.
+
+        Args:
+            doc_id (str): ID of the article.
+
+        Returns:
+            bool: Whether the article was stored.
+        """
+        with self._lock:
+            if doc_id not in self._offsets:
+                return False
+            self._append([{"id": doc_id, "deleted": True}])
+            return True
+
+    def ids(self) -> list[str]:
+        """Return the IDs of the stored articles, in insertion order."""
+        return list(self._offsets)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._offsets
+
+    def get(self, doc_id: str) -> dict | None:
+        """
+        Read an article record by ID.
+
+        Args:
+            doc_id (str): ID of the article.
+
+        Returns:
+            dict | None: The article record, or None if it is not stored.
+        """
+        location = self._offsets.get(doc_id)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.data_path, "rb") as file:
+            file.seek(offset)
+            return json.loads(file.read(length))
+
+    def text(self, doc_id: str) -> str | None:
+        """
+        Read the text of an article, as indexed and displayed.
+
+        Args:
+            doc_id (str): ID of the article.
+
+        Returns:
+            str | None: Article text with its header, or None if it is not stored.
+        """
+        record = self.get(doc_id)
+        return format_article(record) if record else None
+
+
+_stores: dict[str, tuple[str, CorpusStore]] = {}
+_stores_lock = threading.Lock()
+
+
+def _data_version(path: str) -> str:
+    """Identify the version of the data file of a store."""
+    if not os.path.exists(path):
+        return "missing"
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def get_corpus_store(data_folder: str) -> CorpusStore:
+    """
+    Get the corpus store of a data folder, reusing its loaded index while the store is unchanged.
+
+    Args:
+        data_folder (str): Path to the data folder.
+
+    Returns:
+        CorpusStore: The corpus store of the folder.
+    """
+    directory = os.path.abspath(os.path.join(data_folder, CORPUS_DIR))
+    data_path = os.path.join(directory, "articles.jsonl")
+    version = _data_version(data_path)
+    with _stores_lock:
+        cached = _stores.get(directory)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        store = CorpusStore(directory)
+        _stores[directory] = (_data_version(data_path), store)
+        return store
+
+
+def list_documents(data_folder: str) -> list[str]:
+    """
+    List the documents of a data folder: its files and the articles of its corpus store.
+
+    Stored articles are listed as paths inside the data folder named after their ID, which
+    `read_document` resolves back to the store.
+
+    Args:
+        data_folder (str): Path to the data folder.
+
+    Returns:
+        list[str]: Paths of the documents.
+    """
+    files = [
+        os.path.join(data_folder, file)
+        for file in os.listdir(data_folder)
+        if os.path.isfile(os.path.join(data_folder, file))
+    ]
+    existing = {os.path.basename(path) for path in files}
+    return files + [
+        os.path.join(data_folder, doc_id)
+        for doc_id in get_corpus_store(data_folder).ids()
+        if doc_id not in existing
+    ]
+
+
+def read_document(path: str) -> str | None:
+    """
+    Read the text of a document listed by `list_documents`.
+
+    Args:
+        path (str): Path of the document.
+
+    Returns:
+        str | None: Text of the document, or None if it is neither a file nor a stored article.
+    """
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+    data_folder, doc_id = os.path.split(path)
+    return get_corpus_store(data_folder or ".").text(doc_id)
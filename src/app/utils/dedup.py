@@ -0,0 +1,280 @@
+import re
+import math
+import zlib
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import numpy as np
+import pandas as pd
+from src.app.utils.corpus_store import read_document
+from src.app.utils.utils import count_tokens
+
+# Query parameters that identify a campaign or a referrer rather than a page
+TRACKING_PARAMETERS = re.compile(
+    r"^(utm_\w+|at_\w+|fbclid|gclid|ocid|cmpid|ito|xtor|mc_cid|mc_eid|ref|src)$"
+)
+
+# Prime larger than any 32-bit shingle hash, used by the MinHash permutations
+MINHASH_PRIME = (1 << 32) + 15
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonicalize an article URL so that the same page under different URLs compares equal.
+
+    The scheme and `www.` prefix, fragments, tracking parameters, AMP suffixes and trailing
+    slashes are dropped, and the remaining query parameters are sorted.
+
+    Args:
+        url (str): URL of the article.
+
+    Returns:
+        str: Canonical form of the URL.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower().removeprefix("www.").removeprefix("amp.")
+    path = re.sub(r"(/amp|\.amp)$", "", parsed.path.rstrip("/")) or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parsed.query)
+            if not TRACKING_PARAMETERS.match(key.lower())
+        )
+    )
+    return urlunparse(("", host, path, "", query, ""))
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    """
+    Split a text into overlapping word shingles.
+
+    Args:
+        text (str): Text to split.
+        size (int): Number of words per shingle.
+
+    Returns:
+        set[str]: Shingles of the lower-cased text, empty for a text without words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures estimating the Jaccard similarity of shingle sets.
+
+    Each of the `num_perm` hash functions is a random permutation `(a * x + b) mod p` of the
+    32-bit shingle hashes; the fraction of equal minimums of two signatures estimates the
+    Jaccard similarity of their sets.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a < 2**31 keeps a * x + b below 2**64 for 32-bit hashes
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: set[str]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a shingle set.
+
+        Args:
+            shingle_set (set[str]): Non-empty set of shingles.
+
+        Returns:
+            np.ndarray: Signature of shape (num_perm,).
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % MINHASH_PRIME
+        return permuted.min(axis=1)
+
+
+@dataclass
+class DedupReport:
+    """
+    Outcome of a deduplication pass.
+
+    Attributes:
+        total (int): Number of documents checked.
+        url_duplicates (int): Number of documents dropped because of a duplicate canonical URL.
+        near_duplicates (int): Number of documents dropped because of a near-duplicate content.
+        duplicates (dict[str, str]): Dropped document to the kept document it duplicates.
+        avoided_llm_calls (int): Estimated number of graph extraction calls saved.
+    """
+
+    total: int = 0
+    url_duplicates: int = 0
+    near_duplicates: int = 0
+    duplicates: dict[str, str] = field(default_factory=dict)
+    avoided_llm_calls: int = 0
+
+    def summary(self) -> str:
+        """Describe the report in one line."""
+        return (
+            f"Deduplication: {self.url_duplicates + self.near_duplicates} of {self.total} "
+            f"articles dropped ({self.url_duplicates} duplicate URLs, {self.near_duplicates} "
+            f"near-duplicate contents), ~{self.avoided_llm_calls} LLM extraction calls avoided."
+        )
+
+
+def estimate_extraction_calls(
+    text: str, chunk_size: int = 100, chunk_overlap: int = 20
+) -> int:
+    """
+    Estimate the number of graph extraction calls spent on a document.
+
+    `build_graph` sends one extraction call per chunk of `load_and_split_documents`.
+
+    Args:
+        text (str): Content of the document.
+        chunk_size (int): Size of each chunk (in tokens).
+        chunk_overlap (int): Overlap between chunks (in tokens).
+
+    Returns:
+        int: Estimated number of chunks of the document.
+    """
+    tokens = count_tokens(text)
+    if tokens <= chunk_size:
+        return 1 if tokens else 0
+    return math.ceil((tokens - chunk_overlap) / (chunk_size - chunk_overlap))
+
+
+def find_duplicates(
+    urls: list[str | None],
+    texts: list[str],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int = 16,
+    shingle_size: int = 5,
+) -> tuple[dict[int, int], set[int]]:
+    """
+    Find the documents duplicating an earlier one, by canonical URL or near-duplicate content.
+
+    Contents are compared with MinHash signatures bucketed by LSH bands, so each document is
+    only compared with the kept documents sharing at least one band with it.
+
+    Args:
+        urls (list[str | None]): URL of each document, if known.
+        texts (list[str]): Content of each document.
+        threshold (float): Minimum estimated Jaccard similarity of near-duplicate contents.
+        num_perm (int): Number of MinHash permutations.
+        bands (int): Number of LSH bands; `num_perm` must be a multiple of it.
+        shingle_size (int): Number of words per shingle.
+
+    Returns:
+        tuple[dict[int, int], set[int]]: Index of each duplicate document to the index of the
+        kept document it duplicates, and indices of the duplicates found by URL.
+    """
+    duplicate_of = {}
+    canonical_urls = {}
+    for index, url in enumerate(urls):
+        if not url or not url.startswith(("http://", "https://")):
+            continue
+        key = canonicalize_url(url)
+        if key in canonical_urls:
+            duplicate_of[index] = canonical_urls[key]
+        else:
+            canonical_urls[key] = index
+    url_duplicates = set(duplicate_of)
+
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+    buckets: dict[tuple[int, bytes], list[int]] = {}
+    signatures: dict[int, np.ndarray] = {}
+    for index, text in enumerate(texts):
+        shingle_set = shingles(text, shingle_size)
+        if index in duplicate_of or not shingle_set:
+            continue
+        signature = hasher.signature(shingle_set)
+        keys = [
+            (band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(bands)
+        ]
+        candidates = {c for key in keys for c in buckets.get(key, ())}
+        similarities = {
+            candidate: float(np.mean(signatures[candidate] == signature))
+            for candidate in candidates
+        }
+        best = max(similarities, key=similarities.get, default=None)
+        if best is not None and similarities[best] >= threshold:
+            duplicate_of[index] = best
+            continue
+        signatures[index] = signature
+        for key in keys:
+            buckets.setdefault(key, []).append(index)
+    return duplicate_of, url_duplicates
+
+
+def build_report(
+    names: list[str],
+    texts: list[str],
+    duplicate_of: dict[int, int],
+    url_duplicates: set[int],
+) -> DedupReport:
+    """Summarize the duplicates found among named documents."""
+    return DedupReport(
+        total=len(names),
+        url_duplicates=len(url_duplicates),
+        near_duplicates=len(duplicate_of) - len(url_duplicates),
+        duplicates={names[i]: names[kept] for i, kept in duplicate_of.items()},
+        avoided_llm_calls=sum(estimate_extraction_calls(texts[i]) for i in duplicate_of),
+    )
+
+
+def deduplicate_articles(
+    df: pd.DataFrame, threshold: float = 0.8
+) -> tuple[pd.DataFrame, DedupReport]:
+    """
+    Drop the scraped articles duplicating an earlier one.
+
+    Args:
+        df (pd.DataFrame): Articles with "url" and "content" columns.
+        threshold (float): Minimum estimated Jaccard similarity of near-duplicate contents.
+
+    Returns:
+        tuple[pd.DataFrame, DedupReport]: Kept articles and deduplication report.
+    """
+    if df.empty:
+        return df, DedupReport()
+    urls = df["url"].tolist()
+    texts = df["content"].fillna("").tolist()
+    duplicate_of, url_duplicates = find_duplicates(urls, texts, threshold)
+    report = build_report(urls, texts, duplicate_of, url_duplicates)
+    kept = [i for i in range(len(df)) if i not in duplicate_of]
+    return df.iloc[kept].reset_index(drop=True), report
+
+
+def deduplicate_files(
+    file_paths: list[str], threshold: float = 0.8
+) -> tuple[list[str], DedupReport]:
+    """
+    Drop the article documents duplicating an earlier one before they are indexed.
+
+    The URL is read from the `URL:` header of the article text, when present.
+
+    Args:
+        file_paths (list[str]): Paths of the documents, as listed by `list_documents`.
+        threshold (float): Minimum estimated Jaccard similarity of near-duplicate contents.
+
+    Returns:
+        tuple[list[str], DedupReport]: Paths of the kept files and deduplication report.
+    """
+    urls, texts = [], []
+    for path in file_paths:
+        try:
+            text = read_document(path) or ""
+        except (OSError, UnicodeDecodeError):
+            # Not a text article (e.g. a PDF): never treated as a duplicate
+            text = ""
+        first_line = text.split("\n", 1)[0]
+        url = first_line[len("URL:") :].strip() if first_line.startswith("URL:") else None
+        urls.append(url)
+        texts.append(text)
+    duplicate_of, url_duplicates = find_duplicates(urls, texts, threshold)
+    report = build_report(file_paths, texts, duplicate_of, url_duplicates)
+    return [path for i, path in enumerate(file_paths) if i not in duplicate_of], report
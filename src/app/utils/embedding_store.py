@@ -0,0 +1,407 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections.abc import Callable
+from contextlib import contextmanager
+import numpy as np
+from src.app.embedding_models import DEFAULT_MODEL_NAME, embedding_models
+
+try:
+    import fcntl
+except ImportError:
+    # Without fcntl (Windows), writers are only synchronized within a process
+    fcntl = None
+
+# Directory holding one embedding store per model and backend
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+
+# Aggregations of the window embeddings of a document: token-weighted mean or element-wise max
+POOLINGS = ("mean", "max")
+
+
+def text_key(text: str) -> str:
+    """
+    Key a text by the hash of its content.
+
+    Args:
+        text (str): Text to key.
+
+    Returns:
+        str: SHA-256 hex digest of the text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent store of embeddings keyed by content hash.
+
+    Vectors are appended as rows of a raw float32 matrix, `vectors.f32`, read through a memory
+    map, and the key of each row is appended as a line of `keys.txt`, so a lookup touches only
+    the rows it needs and the store is never rewritten. Rows written without their key (e.g.
+    after a crash) are dropped on load. Writes hold a file lock, so several processes can share
+    a store: each one reads the keys appended by the others before appending its own.
+
+    Args:
+        directory (str): Directory of the store.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.txt")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "store.lock")
+        self.dim: int | None = None
+        self._rows: dict[str, int] = {}
+        # Number of rows and of bytes of `keys.txt` already read
+        self._size = 0
+        self._keys_offset = 0
+        self._matrix: np.ndarray | None = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the lock shared by the processes writing to the store."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Load the key index, dropping the vectors written without a key."""
+        if not os.path.exists(self.meta_path):
+            return
+        with self._file_lock():
+            self._refresh()
+
+    def _refresh(self):
+        """
+        Read the keys appended since the last read, e.g. by another process, and drop the
+        vectors written without a key. Must be called with the file lock held.
+        """
+        if self.dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path, "r", encoding="utf-8") as file:
+                self.dim = json.load(file)["dim"]
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "rb") as file:
+                file.seek(self._keys_offset)
+                for line in file:
+                    if not line.endswith(b"\n") or (self._size + 1) * row_bytes > size:
+                        break
+                    self._rows[line[:-1].decode("utf-8")] = self._size
+                    self._size += 1
+                    self._keys_offset += len(line)
+        if size != self._size * row_bytes:
+            with open(self.vectors_path, "r+b") as file:
+                file.truncate(self._size * row_bytes)
+
+    def _vectors(self) -> np.ndarray:
+        """Map the stored vectors, remapping them when rows were appended."""
+        rows = self._size
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            if rows == 0:
+                self._matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(
+                    self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)
+                )
+        return self._matrix
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def get(self, keys: list[str]) -> tuple[np.ndarray, list[int]]:
+        """
+        Read the embeddings of keys.
+
+        Args:
+            keys (list[str]): Keys of the embeddings.
+
+        Returns:
+            tuple[np.ndarray, list[int]]: A float32 matrix of shape (len(keys), dim) whose rows
+            are zero for missing keys, and positions of the missing keys.
+        """
+        with self._lock:
+            rows = [self._rows.get(key) for key in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            embeddings = np.zeros((len(keys), self.dim or 0), dtype=np.float32)
+            found = [i for i, row in enumerate(rows) if row is not None]
+            if found:
+                embeddings[found] = self._vectors()[[rows[i] for i in found]]
+        return embeddings, missing
+
+    def add(self, keys: list[str], vectors: np.ndarray):
+        """
+        Append embeddings, skipping the keys already stored.
+
+        Args:
+            keys (list[str]): Keys of the embeddings.
+            vectors (np.ndarray): Embeddings of shape (len(keys), dim).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with self._file_lock():
+                self._refresh()
+                if self.dim is None:
+                    self.dim = int(vectors.shape[1])
+                    with open(self.meta_path, "w", encoding="utf-8") as file:
+                        json.dump({"dim": self.dim}, file)
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(
+                        f"Embedding dimension {vectors.shape[1]} does not match the store ({self.dim})."
+                    )
+
+                new_keys, new_rows = [], []
+                for i, key in enumerate(keys):
+                    if key not in self._rows and key not in new_keys:
+                        new_keys.append(key)
+                        new_rows.append(i)
+                if not new_keys:
+                    return
+                # Vectors first: a key is only written once its row is complete
+                with open(self.vectors_path, "ab") as file:
+                    file.write(vectors[new_rows].tobytes())
+                lines = "".join(key + "\n" for key in new_keys).encode("utf-8")
+                with open(self.keys_path, "ab") as file:
+                    file.write(lines)
+                for key in new_keys:
+                    self._rows[key] = self._size
+                    self._size += 1
+                self._keys_offset += len(lines)
+
+    def encode(
+        self, texts: list[str], encoder: Callable[[list[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Embed texts, encoding only the ones not stored yet.
+
+        Args:
+            texts (list[str]): Texts to embed.
+            encoder (Callable[[list[str]], np.ndarray]): Function encoding a list of texts.
+
+        Returns:
+            np.ndarray: A float32 matrix of shape (len(texts), dim).
+        """
+        keys = [text_key(text) for text in texts]
+        embeddings, missing = self.get(keys)
+        if not missing:
+            return embeddings
+        # Encode each missing text once, even if it appears several times
+        unique = {keys[i]: texts[i] for i in missing}
+        self.add(list(unique), encoder(list(unique.values())))
+        if embeddings.shape[1] != self.dim:
+            # The store was empty: its dimension is only known now
+            embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        embeddings[missing] = self.get([keys[i] for i in missing])[0]
+        return embeddings
+
+    def similarities(
+        self, keys: list[str], query_embedding: np.ndarray, block_size: int = 4096
+    ) -> np.ndarray:
+        """
+        Compute the dot product of stored embeddings with a query, one block of rows at a time.
+
+        Args:
+            keys (list[str]): Keys of the stored embeddings.
+            query_embedding (np.ndarray): Query embedding of shape (dim,).
+            block_size (int): Number of embeddings read at a time.
+
+        Returns:
+            np.ndarray: Score of each key.
+
+        Raises:
+            KeyError: If an embedding is not stored.
+        """
+        scores = np.empty(len(keys), dtype=np.float32)
+        for start in range(0, len(keys), block_size):
+            block = keys[start : start + block_size]
+            embeddings, missing = self.get(block)
+            if missing:
+                raise KeyError(f"Embedding not stored: {block[missing[0]]}")
+            scores[start : start + len(block)] = embeddings @ query_embedding
+        return scores
+
+
+_stores: dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(
+    model_name: str = DEFAULT_MODEL_NAME,
+    backend: str | None = None,
+    variant: str = "",
+    cache_dir: str = EMBEDDING_CACHE_DIR,
+) -> EmbeddingStore:
+    """
+    Get the process-wide embedding store of a model.
+
+    Backends produce slightly different vectors, so each one has its own store.
+
+    Args:
+        model_name (str): Name of the SentenceTransformer model.
+        backend (str | None): Backend of the model. Defaults to the registry backend.
+        variant (str): Name of the way texts are embedded, for embeddings that are not a single
+            encoding of the text (e.g. pooled windows). Defaults to plain encoding.
+        cache_dir (str): Directory holding the embedding stores.
+
+    Returns:
+        EmbeddingStore: The embedding store of the model.
+    """
+    name = f"{model_name}-{backend or embedding_models.backend}"
+    name = re.sub(r"[^\w.-]", "_", f"{name}-{variant}" if variant else name)
+    directory = os.path.abspath(os.path.join(cache_dir, name))
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = EmbeddingStore(directory)
+        return _stores[directory]
+
+
+def encode_cached(
+    texts: list[str], model_name: str = DEFAULT_MODEL_NAME, backend: str | None = None
+) -> np.ndarray:
+    """
+    Encode texts into L2-normalized embeddings, reusing the embeddings already stored.
+
+    Args:
+        texts (list[str]): Texts to encode.
+        model_name (str): Name of the SentenceTransformer model.
+        backend (str | None): Backend of the model. Defaults to the registry backend.
+
+    Returns:
+        np.ndarray: A float32 matrix of shape (len(texts), dim) with unit-norm rows.
+    """
+    store = get_embedding_store(model_name, backend)
+    return store.encode(
+        texts, lambda missing: embedding_models.encode(missing, model_name, backend)
+    )
+
+
+def split_windows(
+    text: str, tokenizer, window_tokens: int, overlap_tokens: int = 32
+) -> list[tuple[str, int]]:
+    """
+    Split a text into overlapping windows of at most `window_tokens` tokens.
+
+    Windows are slices of the original text, cut at the character offsets of their tokens.
+
+    Args:
+        text (str): Text to split.
+        tokenizer: Fast Hugging Face tokenizer of the model.
+        window_tokens (int): Maximum number of tokens per window.
+        overlap_tokens (int): Number of tokens shared by consecutive windows.
+
+    Returns:
+        list[tuple[str, int]]: Text and number of tokens of each window.
+    """
+    offsets = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    if not offsets:
+        return [(text, 1)]
+    step = max(window_tokens - overlap_tokens, 1)
+    windows = []
+    for start in range(0, len(offsets), step):
+        end = min(start + window_tokens, len(offsets))
+        windows.append((text[offsets[start][0] : offsets[end - 1][1]], end - start))
+        if end == len(offsets):
+            break
+    return windows
+
+
+def encode_documents(
+    texts: list[str],
+    model_name: str = DEFAULT_MODEL_NAME,
+    backend: str | None = None,
+    pooling: str = "mean",
+    overlap_tokens: int = 32,
+    batch_size: int = 256,
+) -> tuple[EmbeddingStore, list[str]]:
+    """
+    Embed whole documents into the embedding store, streaming their windows in fixed-size batches.
+
+    Each document is split into windows fitting the model's maximum sequence length, so that no
+    part of it is truncated, and its window embeddings are pooled into one L2-normalized
+    embedding. Windows are encoded `batch_size` at a time and each document is written to the
+    store as soon as its last window is encoded, so memory does not grow with the corpus.
+    Documents already stored are skipped.
+
+    Args:
+        texts (list[str]): Documents to embed.
+        model_name (str): Name of the SentenceTransformer model.
+        backend (str | None): Backend of the model. Defaults to the registry backend.
+        pooling (str): Aggregation of the window embeddings, one of `POOLINGS`.
+        overlap_tokens (int): Number of tokens shared by consecutive windows.
+        batch_size (int): Number of windows encoded at a time.
+
+    Returns:
+        tuple[EmbeddingStore, list[str]]: Store holding the document embeddings, and key of
+        each document in it.
+
+    Raises:
+        ValueError: If the pooling is unknown.
+    """
+    if pooling not in POOLINGS:
+        raise ValueError(f"Unknown pooling: {pooling}. Expected one of {POOLINGS}.")
+    store = get_embedding_store(
+        model_name, backend, variant=f"windows-{pooling}-{overlap_tokens}"
+    )
+    keys = [text_key(text) for text in texts]
+    model = embedding_models.get(model_name, backend)
+    # Leave room for the special tokens added around each window
+    window_tokens = model.max_seq_length - 2
+
+    # Pooled embedding and number of windows left to encode of the documents in progress
+    pending: dict[str, list] = {}
+    batch: list[tuple[str, str, int]] = []
+
+    def flush():
+        vectors = embedding_models.encode(
+            [window for _, window, _ in batch], model_name, backend
+        )
+        done_keys, done_vectors = [], []
+        for (key, _, tokens), vector in zip(batch, vectors):
+            state = pending[key]
+            if state[0] is None:
+                state[0] = vector * tokens if pooling == "mean" else vector.copy()
+            elif pooling == "mean":
+                state[0] += vector * tokens
+            else:
+                np.maximum(state[0], vector, out=state[0])
+            state[1] -= 1
+            if state[1] == 0:
+                pooled = pending.pop(key)[0]
+                done_keys.append(key)
+                done_vectors.append(pooled / max(np.linalg.norm(pooled), 1e-12))
+        if done_keys:
+            store.add(done_keys, np.stack(done_vectors))
+        batch.clear()
+
+    for key, text in zip(keys, texts):
+        if key in store or key in pending:
+            continue
+        windows = split_windows(text, model.tokenizer, window_tokens, overlap_tokens)
+        pending[key] = [None, len(windows)]
+        for window, tokens in windows:
+            batch.append((key, window, tokens))
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    return store, keys
@@ -1,27 +1,59 @@
 import os
 import re
+import time
 import pickle
+import threading
+from collections.abc import Iterator
 import gradio as gr
 import networkx as nx
 from openai import OpenAI
-from dotenv import load_dotenv
-
-from langchain_community.graphs.graph_document import GraphDocument
-from langchain_community.graphs import Neo4jGraph
-from src.app.graph_builder import build_graph
-from src.app.graph_nx import build_nx_graph
-from src.app.get_communities import get_communities, summarize_communities
-from src.app.generating_answers import generate_answer
-from src.app.utils.utils_scraping import save_articles_to_txt, process_article_urls
+
+from src.app.generating_answers import (
+    NO_INFORMATION_ANSWER,
+    generate_answers_batch,
+    render_formatted_answer,
+    stream_answer,
+    stream_chat_completion,
+    stream_formatted_answer,
+)
+from src.app.summary_index import build_summary_index
+from src.app.local_search import build_entity_index, local_search
+from src.app.query_cache import QueryCache
+from src.app.provenance import build_provenance_index
+from src.app.provenance import ProvenanceIndex
+from src.app.session_store import (
+    SUMMARY_TOP_K,
+    SessionIndex,
+    SessionStore,
+    precomputed_answers_file,
+)
+from src.app.utils.config import get_openai_client
+from src.app.utils.dedup import deduplicate_files
+from src.app.utils.corpus_store import get_corpus_store, list_documents, read_document
+from src.app.utils.utils_scraping import save_articles_to_corpus, process_article_urls
 from src.app.scraping_pipeline import scraping_pipeline
+from src.app.get_urls import SITE_HANDLERS
+
 
+# Answers to queries (and close paraphrases) already asked against a session index
+QUERY_CACHE_SIMILARITY_THRESHOLD = 0.95
+query_cache = QueryCache(similarity_threshold=QUERY_CACHE_SIMILARITY_THRESHOLD)
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("Missing OPENAI_API_KEY. Please set it in the environment.")
+# Session indexes kept in memory across queries
+session_store = SessionStore()
 
-client = OpenAI(api_key=api_key)
+# Suggested queries of the Querying tab, whose answers can be precomputed at indexing time
+PREDEFINED_QUERIES = [
+    "Identify factors that can impact medical inflation in the UK",
+    "What are the long-term drivers of healthcare inflation?",
+    "How does public health crises affect medical costs?",
+    "What are the regulatory challenges driving healthcare inflation?",
+    "What are the events that could lead to a rise in healthcare services demand?",
+    "How do demographic changes affect medical costs?",
+    "Has there been any advancement in medical technology that could significantly increase treatment costs?",
+    "How do public health initiatives impact healthcare costs?",
+    "Are there any pharmaceutical shortages?",
+]
 
 
 # File Management Functions
@@ -52,11 +84,8 @@ def load_file_content(filename: str, data_folder: str) -> str:
     Returns:
         str: Content of the file, or an error message if the file is not found.
     """
-    file_path = os.path.join(data_folder, filename)
-    if not os.path.exists(file_path):
-        return "File not found."
-    with open(file_path, "r") as file:
-        return file.read()
+    content = read_document(os.path.join(data_folder, filename))
+    return content if content is not None else "File not found."
 
 
 def read_article_titles(data_folder: str = "articles") -> list[str]:
@@ -67,11 +96,16 @@ def read_article_titles(data_folder: str = "articles") -> list[str]:
         data_folder (str): Path to the folder containing articles.
 
     Returns:
-        list[str]: List of article filenames ending in '.txt'.
+        list[str]: List of article filenames ending in '.txt', followed by the names of the
+        articles of the corpus store.
     """
     if not os.path.exists(data_folder):
         return []
-    return [file for file in os.listdir(data_folder) if file.endswith(".txt")]
+    return [
+        os.path.basename(path)
+        for path in list_documents(data_folder)
+        if path.endswith(".txt")
+    ]
 
 
 def remove_article(title: str, articles_dir: str = "articles") -> list[str]:
@@ -88,6 +122,8 @@ def remove_article(title: str, articles_dir: str = "articles") -> list[str]:
     file_path = os.path.join(articles_dir, title)
     if os.path.exists(file_path):
         os.remove(file_path)
+    else:
+        get_corpus_store(articles_dir).remove(title)
     return read_article_titles(data_folder=articles_dir)
 
 
@@ -103,7 +139,7 @@ def add_article(url: str, output_dir: str = "articles") -> list[str]:
         list[str]: Updated list of article titles.
     """
     article_df = process_article_urls([url])
-    save_articles_to_txt(article_df, output_dir)
+    save_articles_to_corpus(article_df, output_dir)
     return read_article_titles(data_folder=output_dir)
 
 
@@ -117,13 +153,8 @@ def update_sitemap_url(website: str) -> gr.Textbox:
     Returns:
         gr.Textbox: Updated sitemap URL.
     """
-    sitemap_urls = {
-        "bbc": "https://www.bbc.com/sitemaps/https-sitemap-com-news-1.xml",
-        "the economist": "https://www.economist.com/sitemap-2024-Q4.xml",
-        "nhs": "https://www.england.nhs.uk/sitemap-posttype-post.2024.xml",
-        "google news": "",
-    }
-    return gr.update(value=sitemap_urls.get(website, ""))
+    handler = SITE_HANDLERS.get(website)
+    return gr.update(value=handler.default_sitemap_url if handler else "")
 
 
 def scraping_interface(
@@ -181,15 +212,16 @@ def process_data_folder(data_folder: str) -> list[str]:
     """
     if not os.path.exists(data_folder):
         return f"Error: The folder '{data_folder}' does not exist."
-    return [
-        os.path.join(data_folder, file)
-        for file in os.listdir(data_folder)
-        if os.path.isfile(os.path.join(data_folder, file))
-    ]
+    return list_documents(data_folder)
 
 
 def build_graph_and_summarize(
-    data_folder: str, graph_pickle: str, summary_pickle: str
+    data_folder: str,
+    graph_pickle: str,
+    summary_pickle: str,
+    index_pickle: str | None = None,
+    entity_index_pickle: str | None = None,
+    provenance_pickle: str | None = None,
 ) -> tuple[nx.Graph, list[str]]:
     """
     Build a graph and summarize communities from files in a data folder.
@@ -198,82 +230,159 @@ def build_graph_and_summarize(
         data_folder (str): Path to the data folder.
         graph_pickle (str): Path to save the graph pickle file.
         summary_pickle (str): Path to save the community summaries.
+        index_pickle (str | None): Path to save the embedding index over the summaries, if any.
+        entity_index_pickle (str | None): Path to save the entity name index used by local search, if any.
+        provenance_pickle (str | None): Path to save the index resolving answers to source files, if any.
 
     Returns:
         tuple[nx.Graph, list[str]]: NetworkX graph and list of community summaries.
     """
+    # Imported on indexing only: the extraction stack is not needed to answer queries
+    from src.app.graph_builder import build_graph
+    from src.app.graph_nx import build_nx_graph
+    from src.app.get_communities import get_communities, summarize_communities
+
     try:
         file_paths = process_data_folder(data_folder)
         if isinstance(file_paths, str):  # Error message
             return file_paths, None
+        # Drop duplicated articles before any extraction call is spent on them
+        file_paths, dedup_report = deduplicate_files(file_paths)
+        print(dedup_report.summary())
         graph_document = build_graph(file_paths)
         G = build_nx_graph(graph_document)
         communities = get_communities(G)
-        community_summaries = summarize_communities(communities, G, client)
+        community_summaries = summarize_communities(communities, G, get_openai_client())
 
         # Save the graph and summaries
         with open(graph_pickle, "wb") as f:
             pickle.dump(G, f)
         with open(summary_pickle, "wb") as f:
             pickle.dump(community_summaries, f)
+        if index_pickle:
+            with open(index_pickle, "wb") as f:
+                pickle.dump(build_summary_index(community_summaries), f)
+        if entity_index_pickle:
+            with open(entity_index_pickle, "wb") as f:
+                pickle.dump(build_entity_index(G), f)
+        if provenance_pickle:
+            with open(provenance_pickle, "wb") as f:
+                pickle.dump(build_provenance_index(G, communities), f)
 
         return G, community_summaries
     except Exception as e:
         return f"Error: {str(e)}", None
 
 
-def display_graph_summary(data_folder: str, session_id: str) -> str:
+def precompute_answers(session_id: str, data_folder: str, queries: list[str]):
+    """
+    Answer queries against a session index and store the answers with the session.
+
+    The answers are saved with the version of the index they were computed from, so they are
+    ignored once the index is rebuilt.
+
+    Args:
+        session_id (str): Unique session ID.
+        data_folder (str): Path to the data folder.
+        queries (list[str]): Queries to answer.
+    """
+    start_time = time.perf_counter()
+    try:
+        session = session_store.get(session_id)
+        formatted_answers = generate_answers_batch(
+            session.community_summaries,
+            queries,
+            get_openai_client(),
+            summary_embeddings=session.summary_embeddings,
+            top_k=SUMMARY_TOP_K,
+            formatted=True,
+        )
+        answers = {}
+        for query, formatted_answer in zip(queries, formatted_answers):
+            answer = formatted_answer.model_dump()
+            answers[query] = (
+                render_formatted_answer(answer) or NO_INFORMATION_ANSWER,
+                formatted_answer_sources(answer, session.provenance, data_folder),
+            )
+        with open(precomputed_answers_file(session_id), "wb") as f:
+            pickle.dump({"version": session.version, "answers": answers}, f)
+        session_store.invalidate(session_id)
+        print(
+            f"Precomputed {len(answers)} answers for session {session_id} "
+            f"in {time.perf_counter() - start_time:.2f}s"
+        )
+    except Exception as e:
+        print(f"Failed to precompute answers for session {session_id}: {e}")
+
+
+def display_graph_summary(
+    data_folder: str, session_id: str, precompute: bool = False
+) -> str:
     """
     Display a summary of the graph and its communities.
 
     Args:
         data_folder (str): Path to the data folder.
         session_id (str): Unique session ID.
+        precompute (bool): Whether to answer the `PREDEFINED_QUERIES` in the background once the
+            communities are summarized.
 
     Returns:
         str: Summary string or error message.
     """
     G, community_summaries = build_graph_and_summarize(
-        data_folder, f"{session_id}.gpickle", f"{session_id}.pkl"
+        data_folder,
+        f"{session_id}.gpickle",
+        f"{session_id}.pkl",
+        f"{session_id}_embeddings.pkl",
+        f"{session_id}_entities.pkl",
+        f"{session_id}_provenance.pkl",
     )
     if isinstance(G, str):  # Error occurred
         return G
-    return "\n".join(
+    session_store.invalidate(session_id)
+    query_cache.invalidate(session_id)
+    summary = "\n".join(
         [
             f"Community {i + 1}: {summary}"
             for i, summary in enumerate(community_summaries)
         ]
     )
+    if precompute:
+        threading.Thread(
+            target=precompute_answers,
+            args=(session_id, data_folder, PREDEFINED_QUERIES),
+            daemon=True,
+        ).start()
+        summary = (
+            "Answers to the suggested queries are being precomputed in the background.\n\n"
+            + summary
+        )
+    return summary
 
 
-def extract_sources_and_load_content(answer: str, data_folder: str) -> list[str]:
+def match_sources(source_names: list[str], data_folder: str) -> list[str]:
     """
-    Extract unique source filenames from the answer text and perform partial matching
-    against files in the specified data folder.
+    Perform partial matching of source names against files in the specified data folder.
 
     Args:
-        answer (str): Text containing source references.
+        source_names (list[str]): Source names cited in an answer.
         data_folder (str): Path to the folder containing source files.
 
     Returns:
         list[str]: List of unique matched source filenames.
     """
-    # Extract source names using regex
-    pattern = r"\(Source: ([^)]*?)\)"
-    matches = re.findall(pattern, answer)
-
     # Normalize and clean source names
     sources = {
         src.strip().strip('"_').split(".")[0].lower()
-        for match in matches
-        for src in match.split(",")
+        for src in source_names
+        if src.strip()
     }
 
     # Collect original source filenames in the data folder
     original_sources = {
-        file.lower(): file
-        for file in os.listdir(data_folder)
-        if os.path.isfile(os.path.join(data_folder, file))
+        os.path.basename(path).lower(): os.path.basename(path)
+        for path in list_documents(data_folder)
     }
 
     # Match extracted sources to original filenames
@@ -288,22 +397,41 @@ def extract_sources_and_load_content(answer: str, data_folder: str) -> list[str]
     return list(matched_sources)
 
 
-def edit_response(answer: str, client: OpenAI) -> str:
+def extract_sources_and_load_content(answer: str, data_folder: str) -> list[str]:
     """
-    Format the response into ranked bullet points using GPT-4.
+    Extract unique source filenames from the answer text and perform partial matching
+    against files in the specified data folder.
+
+    Args:
+        answer (str): Text containing source references.
+        data_folder (str): Path to the folder containing source files.
+
+    Returns:
+        list[str]: List of unique matched source filenames.
+    """
+    # Extract source names using regex
+    pattern = r"\(Source: ([^)]*?)\)"
+    matches = re.findall(pattern, answer)
+    return match_sources(
+        [src for match in matches for src in match.split(",")], data_folder
+    )
+
+
+def edit_prompt(answer: str) -> str:
+    """
+    Build the prompt formatting a response into ranked bullet points.
 
     Args:
         answer (str): The unformatted response text.
-        client (OpenAI): OpenAI client for making GPT-4 API calls.
 
     Returns:
-        str: Formatted and ranked response as bullet points, or an error message if the API call fails.
+        str: Prompt for the formatting call.
     """
-    # Define the prompt for GPT-4
-    prompt = f"""
+    return f"""
     You are a meticulous editor and ranking expert. Format the following response into clear, concise bullet points.
     Rank the points by relevance to private health insurance in the UK, starting with the most relevant.
     If any sources are general or unspecified, mark them with 'No source explicitly found'.
+    Keep the community references at the end of each point, e.g. (Communities: 3, 7), unchanged.
     
     Prioritize:
     - Insights that address costs, premium adjustments, claims, or operational efficiency in private health insurance.
@@ -317,63 +445,290 @@ def edit_response(answer: str, client: OpenAI) -> str:
     Output only the ranked bullet points in order of relevance.
     """
 
+
+def edit_response(answer: str, client: OpenAI) -> str:
+    """
+    Format the response into ranked bullet points using GPT-4.
+
+    Args:
+        answer (str): The unformatted response text.
+        client (OpenAI): OpenAI client for making GPT-4 API calls.
+
+    Returns:
+        str: Formatted and ranked response as bullet points, or an error message if the API call fails.
+    """
     # Execute the GPT-4 API call
     try:
         response = client.chat.completions.create(
             model="gpt-4o",
-            messages=[{"role": "system", "content": prompt}],
+            messages=[{"role": "system", "content": edit_prompt(answer)}],
         )
         return response.choices[0].message.content.strip()
     except Exception as e:
         return f"Error during GPT-4 formatting: {str(e)}"
 
 
+def stream_edit_response(answer: str, client: OpenAI) -> Iterator[str]:
+    """
+    Format the response into ranked bullet points, streaming the tokens as they arrive.
+
+    Args:
+        answer (str): The unformatted response text.
+        client (OpenAI): OpenAI client for making GPT-4 API calls.
+
+    Yields:
+        str: Tokens of the formatted response, or an error message if the API call fails.
+    """
+    try:
+        yield from stream_chat_completion(
+            client, [{"role": "system", "content": edit_prompt(answer)}]
+        )
+    except Exception as e:
+        yield f"Error during GPT-4 formatting: {str(e)}"
+
+
+def formatted_answer_sources(
+    answer: dict, provenance: ProvenanceIndex | None, data_folder: str
+) -> list[str]:
+    """
+    Retrieve the source filenames of a formatted answer.
+
+    Args:
+        answer (dict): A `FormattedAnswer` dumped to a dictionary.
+        provenance (ProvenanceIndex | None): Provenance index of the session, if any.
+        data_folder (str): Path to the data folder.
+
+    Returns:
+        list[str]: Source filenames resolved from the cited communities and entities, or matched
+        against the data folder from the cited source names if they cannot be resolved.
+    """
+    bullets = answer.get("bullets") or []
+    sources = []
+    if provenance is not None:
+        sources = sorted(
+            {
+                source
+                for bullet in bullets
+                for source in provenance.resolve_sources(
+                    bullet.get("community_ids") or [], bullet.get("entities") or []
+                )
+            }
+        )
+    if not sources:
+        sources = match_sources(
+            [source for bullet in bullets for source in bullet.get("sources") or []],
+            data_folder,
+        )
+    return sources
+
+
+def parse_community_ids(answer: str) -> list[int]:
+    """
+    Extract the community IDs cited in the answer text.
+
+    Args:
+        answer (str): Text containing community references such as "(Communities: 3, 7)".
+
+    Returns:
+        list[int]: Unique cited community IDs.
+    """
+    matches = re.findall(r"\(Communities: ([\d,\s]+)\)", answer)
+    return sorted({int(cid) for match in matches for cid in re.findall(r"\d+", match)})
+
+
+def stream_answer_with_sources(
+    query: str,
+    session: SessionIndex,
+    data_folder: str,
+    search_mode: str = "Global",
+    answer_mode: str = "Single pass",
+) -> Iterator[tuple[str, list[str] | None]]:
+    """
+    Generate an answer for a query, streaming the reduce and formatting stages, and retrieve its sources.
+
+    Sources are resolved from the communities and entities cited by the answer through the
+    provenance index of the session, or matched against the files of the data folder for
+    sessions indexed without one.
+
+    Args:
+        query (str): User query.
+        session (SessionIndex): Index of the session to answer from. Global search only maps over
+            the `SUMMARY_TOP_K` most relevant communities when it has a summary index.
+        data_folder (str): Path to the data folder.
+        search_mode (str): "Global" to map-reduce over the community summaries, or "Local" to
+            answer from the neighborhood of the entities mentioned in the query.
+        answer_mode (str): "Single pass" to rank and format the bullet points in the reduce call,
+            or "Reduce + edit" to format the answer with an additional `edit_response` call.
+
+    Yields:
+        tuple[str, list[str] | None]: Text streamed so far and None, then the final answer
+        text with its list of source filenames.
+    """
+    if query == "Select an option...":
+        yield "Please select a valid query.", []
+        return
+    start_time = time.perf_counter()
+    provenance = session.provenance
+
+    def log_first_token(stage: str, stage_start_time: float):
+        print(
+            f"Time to first {stage} token: {time.perf_counter() - stage_start_time:.2f}s "
+            f"({time.perf_counter() - start_time:.2f}s since the query)"
+        )
+
+    if search_mode == "Local":
+        if session.graph is None:
+            yield "Local search requires the session graph.", []
+            return
+        tokens = iter(
+            [
+                local_search(
+                    query, session.graph, get_openai_client(), session.entity_index
+                )
+            ]
+        )
+    elif answer_mode == "Single pass":
+        response = ""
+        answer = {}
+        first_token_logged = False
+        for answer in stream_formatted_answer(
+            session.community_summaries,
+            query,
+            get_openai_client(),
+            summary_embeddings=session.summary_embeddings,
+            top_k=SUMMARY_TOP_K,
+        ):
+            if not first_token_logged:
+                log_first_token("answer", start_time)
+                first_token_logged = True
+            response = render_formatted_answer(answer)
+            yield response, None
+
+        response = response or NO_INFORMATION_ANSWER
+        sources = formatted_answer_sources(answer, provenance, data_folder)
+        print(f"Query answered in {time.perf_counter() - start_time:.2f}s")
+        yield response, sources
+        return
+    else:
+        tokens = stream_answer(
+            session.community_summaries,
+            query,
+            get_openai_client(),
+            summary_embeddings=session.summary_embeddings,
+            top_k=SUMMARY_TOP_K,
+        )
+
+    answer = ""
+    first_token_logged = False
+    for token in tokens:
+        if not first_token_logged:
+            log_first_token("answer", start_time)
+            first_token_logged = True
+        answer += token
+        yield answer, None
+
+    response = answer
+    if answer_mode != "Single pass":
+        format_start_time = time.perf_counter()
+        response = ""
+        first_token_logged = False
+        for token in stream_edit_response(answer, get_openai_client()):
+            if not first_token_logged:
+                log_first_token("formatted", format_start_time)
+                first_token_logged = True
+            response += token
+            yield response, None
+
+    response = response.strip()
+    community_ids = parse_community_ids(response) if search_mode != "Local" else []
+    if community_ids and provenance is not None:
+        sources = provenance.resolve_sources(community_ids)
+    else:
+        sources = extract_sources_and_load_content(response, data_folder)
+    print(f"Query answered in {time.perf_counter() - start_time:.2f}s")
+    yield response, sources
+
+
 def answer_with_sources(
-    query: str, community_summaries: list[str], data_folder: str
+    query: str,
+    session: SessionIndex,
+    data_folder: str,
+    search_mode: str = "Global",
+    answer_mode: str = "Single pass",
 ) -> tuple[str, list[str]]:
     """
     Generate an answer for a query and retrieve associated sources.
 
     Args:
         query (str): User query.
-        community_summaries (list[str]): Summarized community data.
+        session (SessionIndex): Index of the session to answer from.
         data_folder (str): Path to the data folder.
+        search_mode (str): "Global" or "Local" search.
+        answer_mode (str): "Single pass" or "Reduce + edit".
 
     Returns:
         tuple[str, list[str]]: Answer text and list of source filenames.
     """
-    if query == "Select an option...":
-        return "Please select a valid query.", []
-    response = generate_answer(community_summaries, query, client)
-    response = edit_response(response, client)
-    sources = extract_sources_and_load_content(response, data_folder)
+    for response, sources in stream_answer_with_sources(
+        query, session, data_folder, search_mode, answer_mode
+    ):
+        pass
     return response, sources
 
 
 def handle_query(
-    selected_query: str, user_query_input: str, data_folder: str, session_id: str
-) -> tuple[str, gr.Dropdown]:
+    selected_query: str,
+    user_query_input: str,
+    data_folder: str,
+    session_id: str,
+    search_mode: str = "Global",
+    answer_mode: str = "Single pass",
+) -> Iterator[tuple[str, gr.Dropdown]]:
     """
     Handle query response and provide source filenames.
 
+    The response textbox is updated as the tokens of the answer arrive.
+
     Args:
         selected_query (str): Predefined query or 'Write a custom query'.
         user_query_input (str): User-defined query text.
         data_folder (str): Path to the data folder.
         session_id (str): Unique session ID.
+        search_mode (str): "Global" or "Local" search.
+        answer_mode (str): "Single pass" or "Reduce + edit".
 
-    Returns:
-        tuple[str, gr.Dropdown]: Query response and source dropdown update.
+    Yields:
+        tuple[str, gr.Dropdown]: Query response so far and source dropdown update.
     """
     query = (
         user_query_input if selected_query == "Write a custom query" else selected_query
     )
-    summary_pickle = f"{session_id}.pkl"
-    with open(summary_pickle, "rb") as f:
-        community_summaries = pickle.load(f)
-    response, sources = answer_with_sources(query, community_summaries, data_folder)
-    dropdown_update = gr.Dropdown(choices=sources, visible=bool(sources))
-    return response, dropdown_update
+    session = session_store.get(session_id)
+    precomputed = session.precomputed_answer(query, search_mode, answer_mode)
+    if precomputed is not None:
+        response, sources = precomputed
+        yield response, gr.Dropdown(choices=sources, visible=bool(sources))
+        return
+
+    mode = f"{search_mode}/{answer_mode}"
+    cached = query_cache.get(session_id, session.version, query, mode)
+    if cached is not None:
+        response, sources = cached
+        yield response, gr.Dropdown(choices=sources, visible=bool(sources))
+        return
+
+    for response, sources in stream_answer_with_sources(
+        query, session, data_folder, search_mode, answer_mode
+    ):
+        if sources is None:
+            yield response, gr.update()
+
+    answered = query != "Select an option..." and (
+        search_mode != "Local" or session.graph is not None
+    )
+    if answered and "Error during GPT-4 formatting" not in response:
+        query_cache.put(session_id, session.version, query, (response, sources), mode)
+    yield response, gr.Dropdown(choices=sources, visible=bool(sources))
 
 
 def update_article_titles_df(data_folder: str) -> gr.update:
@@ -0,0 +1,281 @@
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import GenericTranslator
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+
+@dataclass(frozen=True)
+class SiteSelectors:
+    """
+    CSS selectors locating the parts of an article page.
+
+    Attributes:
+        title (tuple[str, ...]): Selectors of the title, tried in order.
+        date (tuple[str, ...]): Selectors of the publication date, tried in order.
+        article (tuple[str, ...]): Selectors of the article container, tried in order.
+        paragraphs (str): Selector of the text blocks inside the article container.
+    """
+
+    title: tuple[str, ...] = ("title",)
+    date: tuple[str, ...] = ("time",)
+    article: tuple[str, ...] = ("article",)
+    paragraphs: str = "p, h2, h3"
+
+
+DEFAULT_SELECTORS = SiteSelectors()
+
+# Site-specific selectors, keyed by a substring of the host name
+SITE_SELECTORS = {
+    "bbc": SiteSelectors(
+        title=("article h1", "h1", "title"),
+        paragraphs="[data-component='text-block'] p, [data-component='subheadline-block'] h2",
+    ),
+    "nhs": SiteSelectors(
+        title=("main h1", "h1", "title"),
+        article=("article", "main"),
+        paragraphs="p, h2, h3, li",
+    ),
+    "economist": SiteSelectors(
+        title=("h1", "title"),
+        paragraphs="p[data-component='paragraph'], h2",
+    ),
+}
+
+
+def site_selectors(url: str | None) -> SiteSelectors:
+    """
+    Get the selectors of the site an article URL belongs to.
+
+    Args:
+        url (str | None): URL of the article, if known.
+
+    Returns:
+        SiteSelectors: Site-specific selectors, or the default ones for unknown sites.
+    """
+    host = urlparse(url).netloc.lower() if url else ""
+    for site, selectors in SITE_SELECTORS.items():
+        if site in host:
+            return selectors
+    return DEFAULT_SELECTORS
+
+
+def normalize_text(text: str) -> str:
+    """Collapse the whitespace of a text while keeping word boundaries."""
+    return " ".join(text.split())
+
+
+class HtmlExtractor(ABC):
+    """
+    Base class of the HTML extraction backends.
+
+    Backends implement parsing, selection and text extraction. The extraction logic is shared:
+    the first matching title, date and article container are used, and the text blocks of the
+    article are joined with newlines.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def parse(self, html: bytes):
+        """Parse an HTML page into a tree, or None if it cannot be parsed."""
+
+    @abstractmethod
+    def select_first(self, tree, selector: str):
+        """Return the first node matching a CSS selector, or None."""
+
+    @abstractmethod
+    def select_all(self, node, selector: str) -> list:
+        """Return the nodes matching a CSS selector, in document order."""
+
+    @abstractmethod
+    def text(self, node) -> str:
+        """Return the text of a node and its descendants."""
+
+    def _first_text(self, tree, selectors: tuple[str, ...]) -> str | None:
+        """Return the text of the first element matching one of the selectors."""
+        for selector in selectors:
+            node = self.select_first(tree, selector)
+            if node is not None:
+                return normalize_text(self.text(node))
+        return None
+
+    def extract(
+        self, html: bytes, selectors: SiteSelectors = DEFAULT_SELECTORS
+    ) -> tuple[str | None, str | None, str | None]:
+        """
+        Extract the title, date, and content of an article from its HTML.
+
+        Args:
+            html (bytes): HTML of the article page.
+            selectors (SiteSelectors): Selectors of the site of the page.
+
+        Returns:
+            tuple: A tuple containing the title, date, and content of the article, or
+            (None, None, None) if the page has no article.
+        """
+        tree = self.parse(html)
+        if tree is None:
+            return None, None, None
+
+        article = None
+        for selector in selectors.article:
+            article = self.select_first(tree, selector)
+            if article is not None:
+                break
+        if article is None:
+            return None, None, None
+
+        blocks = [
+            normalize_text(self.text(node))
+            for node in self.select_all(article, selectors.paragraphs)
+        ]
+        content = "\n".join(block for block in blocks if block)
+        if not content:
+            # Fall back to the whole container when the site layout is not recognized
+            content = normalize_text(self.text(article))
+        if not content:
+            return None, None, None
+
+        title = self._first_text(tree, selectors.title)
+        date = self._first_text(tree, selectors.date)
+        return title, date, content
+
+
+class BeautifulSoupExtractor(HtmlExtractor):
+    """Extraction backend based on BeautifulSoup and the pure-Python `html.parser`."""
+
+    name = "beautifulsoup"
+
+    def parse(self, html: bytes):
+        return BeautifulSoup(html, "html.parser")
+
+    def select_first(self, tree, selector: str):
+        return tree.select_one(selector)
+
+    def select_all(self, node, selector: str) -> list:
+        return node.select(selector)
+
+    def text(self, node) -> str:
+        return node.get_text(" ")
+
+
+@lru_cache(maxsize=None)
+def _compile_css(selector: str):
+    """Compile a CSS selector to an XPath expression."""
+    return etree.XPath(GenericTranslator().css_to_xpath(selector, prefix="descendant::"))
+
+
+class LxmlExtractor(HtmlExtractor):
+    """Extraction backend based on the libxml2 HTML parser of lxml."""
+
+    name = "lxml"
+
+    def parse(self, html: bytes):
+        try:
+            return lxml.html.document_fromstring(html)
+        except (etree.ParserError, ValueError):
+            return None
+
+    def select_first(self, tree, selector: str):
+        matches = _compile_css(selector)(tree)
+        return matches[0] if matches else None
+
+    def select_all(self, node, selector: str) -> list:
+        return _compile_css(selector)(node)
+
+    def text(self, node) -> str:
+        return " ".join(node.itertext())
+
+
+class SelectolaxExtractor(HtmlExtractor):
+    """Extraction backend based on the Modest/Lexbor HTML parser of selectolax."""
+
+    name = "selectolax"
+
+    def parse(self, html: bytes):
+        return HTMLParser(html)
+
+    def select_first(self, tree, selector: str):
+        return tree.css_first(selector)
+
+    def select_all(self, node, selector: str) -> list:
+        # Matches of a selector group come selector by selector: restore the document order
+        matches = {match.mem_id for match in node.css(selector)}
+        return [child for child in node.traverse() if child.mem_id in matches]
+
+    def text(self, node) -> str:
+        return node.text(deep=True, separator=" ")
+
+
+def available_extractors() -> dict[str, HtmlExtractor]:
+    """
+    List the extraction backends that can be used in this environment.
+
+    Returns:
+        dict[str, HtmlExtractor]: Backends keyed by name, from the fastest to the slowest.
+    """
+    extractors = {}
+    if HTMLParser is not None:
+        extractors[SelectolaxExtractor.name] = SelectolaxExtractor()
+    if lxml is not None:
+        extractors[LxmlExtractor.name] = LxmlExtractor()
+    extractors[BeautifulSoupExtractor.name] = BeautifulSoupExtractor()
+    return extractors
+
+
+@lru_cache(maxsize=None)
+def get_extractor(name: str | None = None) -> HtmlExtractor:
+    """
+    Get an extraction backend.
+
+    Args:
+        name (str | None): Name of the backend. If None, the `HTML_EXTRACTION_BACKEND` environment
+            variable is used, and the fastest available backend if it is not set.
+
+    Returns:
+        HtmlExtractor: The extraction backend.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    extractors = available_extractors()
+    name = name or os.getenv("HTML_EXTRACTION_BACKEND")
+    if name is None:
+        return next(iter(extractors.values()))
+    if name not in extractors:
+        raise ValueError(
+            f"Unavailable HTML extraction backend: {name}. Available: {', '.join(extractors)}"
+        )
+    return extractors[name]
+
+
+def extract_article(
+    html: bytes, url: str | None = None, backend: str | None = None
+) -> tuple[str | None, str | None, str | None]:
+    """
+    Extract the title, date, and content of an article with the selectors of its site.
+
+    Args:
+        html (bytes): HTML of the article page.
+        url (str | None): URL of the article, used to pick site-specific selectors.
+        backend (str | None): Name of the extraction backend. If None, see `get_extractor`.
+
+    Returns:
+        tuple: A tuple containing the title, date, and content of the article, or
+        (None, None, None) if the page has no article.
+    """
+    return get_extractor(backend).extract(html, site_selectors(url))
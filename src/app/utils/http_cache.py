@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+
+
+class CacheMissError(requests.exceptions.ConnectionError):
+    """Raised in offline mode when a URL is not in the cache."""
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache revalidating its entries with conditional requests.
+
+    Each URL is stored as a body file and a JSON metadata file holding its `ETag` and
+    `Last-Modified` headers, named after the SHA-256 of the URL. Cached URLs are requested with
+    `If-None-Match` / `If-Modified-Since`, and the cached body is reused on a 304 response.
+    Entries are evicted in LRU order once the bodies exceed `max_bytes`. In offline mode, URLs
+    are only served from the cache.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "http_cache",
+        max_bytes: int = 1024**3,
+        offline: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        """Return the paths of the body and metadata files of a URL."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return (
+            os.path.join(self.cache_dir, f"{key}.body"),
+            os.path.join(self.cache_dir, f"{key}.json"),
+        )
+
+    def metadata(self, url: str) -> dict | None:
+        """
+        Get the cached metadata of a URL.
+
+        Args:
+            url (str): URL of the entry.
+
+        Returns:
+            dict | None: Metadata of the entry, or None if the URL is not cached.
+        """
+        body_path, meta_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """
+        Build the headers revalidating the cached entry of a URL.
+
+        Args:
+            url (str): URL to request.
+
+        Returns:
+            dict[str, str]: `If-None-Match` / `If-Modified-Since` headers, empty if the URL is not cached.
+        """
+        metadata = self.metadata(url) or {}
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+        return headers
+
+    def body_path(self, url: str) -> str | None:
+        """
+        Get the path of the cached body of a URL, marking the entry as recently used.
+
+        Args:
+            url (str): URL of the entry.
+
+        Returns:
+            str | None: Path of the body file, or None if the URL is not cached.
+        """
+        body_path, meta_path = self._paths(url)
+        if self.metadata(url) is None:
+            return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return body_path
+
+    def read(self, url: str) -> bytes | None:
+        """
+        Read the cached body of a URL.
+
+        Args:
+            url (str): URL of the entry.
+
+        Returns:
+            bytes | None: Cached body, or None if the URL is not cached.
+        """
+        path = self.body_path(url)
+        if path is None:
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+
+    def store(self, url: str, body: bytes, headers) -> str:
+        """
+        Store the body of a response with its validators.
+
+        Args:
+            url (str): URL of the response.
+            body (bytes): Body of the response.
+            headers: Headers of the response.
+
+        Returns:
+            str: Path of the stored body file.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        previous = self.metadata(url)
+        metadata = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "size": len(body),
+            "fetched_at": time.time(),
+        }
+        # Write to temporary files first so that concurrent readers never see a partial entry
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as file:
+            file.write(body)
+        with open(meta_path + suffix, "w", encoding="utf-8") as file:
+            json.dump(metadata, file)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(body) - (previous["size"] if previous else 0)
+        self._evict(keep=meta_path)
+        return body_path
+
+    def _evict(self, keep: str | None = None):
+        """Evict the least recently used entries until the bodies fit in `max_bytes`."""
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                meta_path = os.path.join(self.cache_dir, name)
+                body_path = meta_path[: -len(".json")] + ".body"
+                try:
+                    mtime = os.path.getmtime(meta_path)
+                    size = os.path.getsize(body_path)
+                except OSError:
+                    continue
+                entries.append((mtime, size, meta_path, body_path))
+            self._size = sum(size for _, size, _, _ in entries)
+            for _, size, meta_path, body_path in sorted(entries):
+                if self._size <= self.max_bytes:
+                    break
+                if meta_path == keep:
+                    continue
+                for path in (meta_path, body_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._size -= size
+
+    def fetch_path(self, url: str, timeout: float = 10) -> str:
+        """
+        Fetch a URL through the cache and return the path of its body file.
+
+        Args:
+            url (str): URL to fetch.
+            timeout (float): Timeout in seconds of the request.
+
+        Returns:
+            str: Path of the cached body file.
+
+        Raises:
+            CacheMissError: If the cache is offline and the URL is not cached.
+            requests.exceptions.RequestException: If the request fails.
+        """
+        if self.offline:
+            path = self.body_path(url)
+            if path is None:
+                raise CacheMissError(f"{url} is not in the HTTP cache (offline mode).")
+            return path
+
+        response = requests.get(url, headers=self.conditional_headers(url), timeout=timeout)
+        if response.status_code == 304:
+            path = self.body_path(url)
+            if path is not None:
+                return path
+            # The entry was evicted since the request was built
+            response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return self.store(url, response.content, response.headers)
+
+    def fetch(self, url: str, timeout: float = 10) -> bytes:
+        """
+        Fetch a URL through the cache.
+
+        Args:
+            url (str): URL to fetch.
+            timeout (float): Timeout in seconds of the request.
+
+        Returns:
+            bytes: Body of the response.
+
+        Raises:
+            CacheMissError: If the cache is offline and the URL is not cached.
+            requests.exceptions.RequestException: If the request fails.
+        """
+        with open(self.fetch_path(url, timeout), "rb") as file:
+            return file.read()
+
+
+http_cache = HttpCache(
+    cache_dir=os.getenv("HTTP_CACHE_DIR", "http_cache"),
+    offline=os.getenv("HTTP_CACHE_OFFLINE", "").lower() in ("1", "true", "yes"),
+)
@@ -0,0 +1,379 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import argparse
+import multiprocessing
+import pandas as pd
+from src.app.utils.async_fetcher import fetch_urls
+from src.app.utils.utils_scraping import parse_article_html
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    leased_until REAL,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (run_id, url)
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (run_id, state);
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    date TEXT,
+    content TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+# States of a task: waiting, leased to a worker, fetched with an article, fetched without
+# an article, or given up after `max_attempts`
+TASK_STATES = ("pending", "running", "done", "skipped", "failed")
+
+
+class ScrapingJobQueue:
+    """
+    SQLite-backed queue of article URL tasks, shared by the workers of a scraping run.
+
+    A run is identified by its parameters, so running the same scraping again resumes it
+    instead of listing the sitemap again, unless new URLs are added to it. Tasks are leased to
+    workers for `lease_seconds`; the tasks of a worker that died are handed out again once
+    their lease expires, up to `max_attempts` times. Fetched articles are stored once per URL
+    and reused by every run.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "scraping_jobs.sqlite",
+        lease_seconds: float = 120,
+        max_attempts: int = 3,
+    ):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    @staticmethod
+    def run_id(**params) -> str:
+        """
+        Identify a scraping run by its parameters.
+
+        Args:
+            **params: Parameters of the run.
+
+        Returns:
+            str: Stable ID of the run.
+        """
+        key = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def has_run(self, run_id: str) -> bool:
+        """Return whether the URLs of a run have already been enqueued."""
+        return self.created_at(run_id) is not None
+
+    def created_at(self, run_id: str) -> float | None:
+        """Return the time at which a run was created, or None if it does not exist."""
+        row = self.connection.execute(
+            "SELECT created_at FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def create_run(
+        self, run_id: str, urls: list[str], max_tasks: int | None = None, **params
+    ) -> int:
+        """
+        Enqueue the URLs of a run.
+
+        URLs whose article was already fetched by another run are marked as done immediately.
+        When the run already exists, only the URLs it does not have yet are added, after its
+        current tasks, and the existing tasks keep their state.
+
+        Args:
+            run_id (str): ID of the run.
+            urls (list[str]): Article URLs to fetch.
+            max_tasks (int | None): Maximum number of tasks of the run, existing ones included.
+                URLs beyond it are not enqueued. Defaults to no limit.
+            **params: Parameters of the run, stored for reference.
+
+        Returns:
+            int: Number of URLs added to the run.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?, ?)",
+                (run_id, json.dumps(params, default=str), now),
+            )
+            existing = {
+                row[0]
+                for row in self.connection.execute(
+                    "SELECT url FROM tasks WHERE run_id = ?", (run_id,)
+                )
+            }
+            new_urls = [url for url in dict.fromkeys(urls) if url not in existing]
+            if max_tasks is not None:
+                new_urls = new_urls[: max(0, max_tasks - len(existing))]
+            (start,) = self.connection.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM tasks WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+            self.connection.executemany(
+                """
+                INSERT INTO tasks (run_id, position, url, state, updated_at)
+                SELECT ?, ?, ?,
+                    CASE WHEN EXISTS (SELECT 1 FROM articles WHERE url = ?)
+                    THEN 'done' ELSE 'pending' END, ?
+                """,
+                [
+                    (run_id, start + position, url, url, now)
+                    for position, url in enumerate(new_urls)
+                ],
+            )
+        return len(new_urls)
+
+    def claim(self, run_id: str, worker: str, batch_size: int = 32) -> list[str]:
+        """
+        Lease a batch of pending tasks to a worker.
+
+        Args:
+            run_id (str): ID of the run.
+            worker (str): Name of the worker.
+            batch_size (int): Maximum number of tasks to lease.
+
+        Returns:
+            list[str]: URLs leased to the worker, empty when no task is left to fetch.
+        """
+        now = time.time()
+        with self.connection:
+            # Take the write lock first so that two workers never lease the same task
+            self.connection.execute("BEGIN IMMEDIATE")
+            # Give up on the tasks whose worker died during their last attempt
+            self.connection.execute(
+                """
+                UPDATE tasks SET state = 'failed', error = 'lease expired', updated_at = ?
+                WHERE run_id = ? AND state = 'running' AND leased_until < ? AND attempts >= ?
+                """,
+                (now, run_id, now, self.max_attempts),
+            )
+            urls = [
+                row[0]
+                for row in self.connection.execute(
+                    """
+                    SELECT url FROM tasks
+                    WHERE run_id = ? AND attempts < ?
+                        AND (state = 'pending' OR (state = 'running' AND leased_until < ?))
+                    ORDER BY position LIMIT ?
+                    """,
+                    (run_id, self.max_attempts, now, batch_size),
+                )
+            ]
+            self.connection.executemany(
+                """
+                UPDATE tasks SET state = 'running', attempts = attempts + 1, worker = ?,
+                    leased_until = ?, updated_at = ?
+                WHERE run_id = ? AND url = ?
+                """,
+                [(worker, now + self.lease_seconds, now, run_id, url) for url in urls],
+            )
+        return urls
+
+    def complete(
+        self,
+        run_id: str,
+        url: str,
+        title: str | None,
+        date: str | None,
+        content: str | None,
+    ):
+        """
+        Record the article fetched for a task.
+
+        Args:
+            run_id (str): ID of the run.
+            url (str): URL of the task.
+            title (str | None): Title of the article.
+            date (str | None): Publication date of the article.
+            content (str | None): Content of the article, None if the page has no article.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            if content:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)",
+                    (url, title, date, content, now),
+                )
+            self.connection.execute(
+                """
+                UPDATE tasks SET state = ?, error = NULL, leased_until = NULL, updated_at = ?
+                WHERE run_id = ? AND url = ?
+                """,
+                ("done" if content else "skipped", now, run_id, url),
+            )
+
+    def fail(self, run_id: str, url: str, error: str):
+        """
+        Record a failed attempt of a task, which is retried until `max_attempts` is reached.
+
+        Args:
+            run_id (str): ID of the run.
+            url (str): URL of the task.
+            error (str): Description of the failure.
+        """
+        with self.connection:
+            self.connection.execute(
+                """
+                UPDATE tasks SET state = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END,
+                    error = ?, leased_until = NULL, updated_at = ?
+                WHERE run_id = ? AND url = ?
+                """,
+                (self.max_attempts, error, time.time(), run_id, url),
+            )
+
+    def progress(self, run_id: str) -> dict[str, int]:
+        """
+        Count the tasks of a run in each state.
+
+        Args:
+            run_id (str): ID of the run.
+
+        Returns:
+            dict[str, int]: Number of tasks per state.
+        """
+        counts = dict.fromkeys(TASK_STATES, 0)
+        for state, count in self.connection.execute(
+            "SELECT state, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY state", (run_id,)
+        ):
+            counts[state] = count
+        return counts
+
+    def results(self, run_id: str) -> pd.DataFrame:
+        """
+        Get the articles fetched for a run.
+
+        Args:
+            run_id (str): ID of the run.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing the articles' URLs, titles, dates, and contents,
+            in the order of the run URLs.
+        """
+        return pd.read_sql_query(
+            """
+            SELECT articles.url, articles.title, articles.date, articles.content
+            FROM tasks JOIN articles ON articles.url = tasks.url
+            WHERE tasks.run_id = ? AND tasks.state = 'done'
+            ORDER BY tasks.position
+            """,
+            self.connection,
+            params=(run_id,),
+        )
+
+    def close(self):
+        """Close the connection to the database."""
+        self.connection.close()
+
+
+def run_worker(
+    queue: ScrapingJobQueue, run_id: str, worker: str | None = None, batch_size: int = 32
+) -> int:
+    """
+    Fetch the tasks of a run until none is left to lease.
+
+    Args:
+        queue (ScrapingJobQueue): Job queue of the run.
+        run_id (str): ID of the run.
+        worker (str | None): Name of the worker. Defaults to the process ID.
+        batch_size (int): Number of URLs leased and fetched concurrently at a time.
+
+    Returns:
+        int: Number of tasks processed by the worker.
+    """
+    worker = worker or f"worker-{os.getpid()}"
+    processed = 0
+    while urls := queue.claim(run_id, worker, batch_size):
+        for url, page in zip(urls, fetch_urls(urls)):
+            if page is None:
+                queue.fail(run_id, url, "fetch failed")
+                continue
+            try:
+                title, date, content = parse_article_html(page, url)
+            except Exception as e:
+                queue.fail(run_id, url, f"parsing failed: {e}")
+                continue
+            queue.complete(run_id, url, title, date, content)
+        processed += len(urls)
+        print(f"{worker}: {processed} tasks processed, progress {queue.progress(run_id)}")
+    return processed
+
+
+def _worker_process(db_path: str, run_id: str, batch_size: int):
+    """Entry point of a worker process."""
+    queue = ScrapingJobQueue(db_path)
+    try:
+        run_worker(queue, run_id, batch_size=batch_size)
+    finally:
+        queue.close()
+
+
+def run_workers(
+    db_path: str, run_id: str, num_workers: int = 1, batch_size: int = 32
+) -> dict[str, int]:
+    """
+    Fetch the tasks of a run with several worker processes.
+
+    Args:
+        db_path (str): Path of the job queue database.
+        run_id (str): ID of the run.
+        num_workers (int): Number of worker processes.
+        batch_size (int): Number of URLs leased and fetched concurrently by each worker.
+
+    Returns:
+        dict[str, int]: Number of tasks per state once the workers are done.
+    """
+    if num_workers <= 1:
+        _worker_process(db_path, run_id, batch_size)
+    else:
+        processes = [
+            multiprocessing.Process(
+                target=_worker_process, args=(db_path, run_id, batch_size)
+            )
+            for _ in range(num_workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+    queue = ScrapingJobQueue(db_path)
+    try:
+        return queue.progress(run_id)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Start worker processes fetching the tasks of a scraping run."
+    )
+    parser.add_argument("run_id")
+    parser.add_argument("--db-path", default="scraping_jobs.sqlite")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print(run_workers(args.db_path, args.run_id, args.workers, args.batch_size))
@@ -1,13 +1,17 @@
 import os
 import pickle
-from langchain.schema import Document
-from langchain.text_splitter import TokenTextSplitter
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
-from src.KG_classes import FileNode, ChunkNode, Property, Node, Relationship
-from langchain_community.graphs.graph_document import (
-    Node as BaseNode,
-    Relationship as BaseRelationship,
-)
+from typing import TYPE_CHECKING
+from src.app.utils.corpus_store import read_document
+
+# The graph-building helpers import langchain on first use, so that the query path, which
+# only needs the pickle and prompt helpers, does not load it
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from src.KG_classes import FileNode, ChunkNode, Property, Node, Relationship
+    from langchain_community.graphs.graph_document import (
+        Node as BaseNode,
+        Relationship as BaseRelationship,
+    )
 
 
 def save_to_pickle(data, file_path: str):
@@ -23,6 +27,22 @@ def save_to_pickle(data, file_path: str):
         pickle.dump(data, file)
 
 
+def load_pickle_if_exists(file_path: str):
+    """
+    Load a pickle file if it exists.
+
+    Args:
+        file_path (str): Path to the pickle file.
+
+    Returns:
+        The unpickled data, or None if the file does not exist.
+    """
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, "rb") as file:
+        return pickle.load(file)
+
+
 def read_prompt(prompt_file: str) -> str:
     """
     Read the prompt from a file.
@@ -42,7 +62,7 @@ def read_prompt(prompt_file: str) -> str:
     return prompt
 
 
-def create_file_node(file_path: str) -> FileNode:
+def create_file_node(file_path: str) -> "FileNode":
     """Create a file node representing the file's metadata.
 
     Args:
@@ -51,6 +71,8 @@ def create_file_node(file_path: str) -> FileNode:
     Returns:
         FileNode: File node representing the file.
     """
+    from src.KG_classes import FileNode, Property
+
     return FileNode(
         id=os.path.basename(file_path),
         type="File",
@@ -62,8 +84,8 @@ def create_file_node(file_path: str) -> FileNode:
 
 
 def create_chunk_node(
-    chunk: Document, chunk_idx: int, file_node: FileNode
-) -> ChunkNode:
+    chunk: "Document", chunk_idx: int, file_node: "FileNode"
+) -> "ChunkNode":
     """Create a chunk node representing a text chunk.
 
     Args:
@@ -73,6 +95,8 @@ def create_chunk_node(
 
     Returns:
         ChunkNode: Chunk node representing the text chunk."""
+    from src.KG_classes import ChunkNode, Property
+
     return ChunkNode(
         id=f"{file_node.id}_{chunk_idx}",
         type="Chunk",
@@ -96,7 +120,7 @@ def format_property_key(key: str) -> str:
     return words[0].lower() + "".join(word.capitalize() for word in words[1:])
 
 
-def props_to_dict(properties: list[Property]) -> dict[str, str]:
+def props_to_dict(properties: list["Property"]) -> dict[str, str]:
     """Convert a list of properties to a dictionary.
 
     Args:
@@ -107,7 +131,7 @@ def props_to_dict(properties: list[Property]) -> dict[str, str]:
     return {format_property_key(p.key): p.value for p in properties}
 
 
-def map_to_base_node(node: Node) -> BaseNode:
+def map_to_base_node(node: "Node") -> "BaseNode":
     """Map a custom Node to a base Node for the graph.
 
     Args:
@@ -115,6 +139,8 @@ def map_to_base_node(node: Node) -> BaseNode:
 
     Returns:
         BaseNode: Base Node for the graph."""
+    from langchain_community.graphs.graph_document import Node as BaseNode
+
     properties = (
         props_to_dict(node.properties)
         if isinstance(node.properties, list)
@@ -126,7 +152,7 @@ def map_to_base_node(node: Node) -> BaseNode:
     )
 
 
-def map_to_base_relationship(rel: Relationship) -> BaseRelationship:
+def map_to_base_relationship(rel: "Relationship") -> "BaseRelationship":
     """Map a custom Relationship to a base Relationship for the graph.
 
     Args:
@@ -134,6 +160,8 @@ def map_to_base_relationship(rel: Relationship) -> BaseRelationship:
 
     Returns:
         BaseRelationship: Base Relationship for the graph."""
+    from langchain_community.graphs.graph_document import Relationship as BaseRelationship
+
     return BaseRelationship(
         source=map_to_base_node(rel.source),
         target=map_to_base_node(rel.target),
@@ -143,8 +171,8 @@ def map_to_base_relationship(rel: Relationship) -> BaseRelationship:
 
 
 def create_relationship(
-    source: Node, target: Node, relationship_type: str
-) -> BaseRelationship:
+    source: "Node", target: "Node", relationship_type: str
+) -> "BaseRelationship":
     """Create a base Relationship between two nodes.
 
     Args:
@@ -154,6 +182,8 @@ def create_relationship(
 
     Returns:
         BaseRelationship: Base Relationship between the two nodes."""
+    from langchain_community.graphs.graph_document import Relationship as BaseRelationship
+
     return BaseRelationship(
         source=map_to_base_node(source),
         target=map_to_base_node(target),
@@ -164,7 +194,7 @@ def create_relationship(
 
 def load_and_split_documents(
     file_paths: list[str], chunk_size: int = 100, chunk_overlap: int = 20
-) -> list[Document]:
+) -> list["Document"]:
     """
     Load documents from file paths and split them into chunks.
 
@@ -176,6 +206,10 @@ def load_and_split_documents(
     Returns:
         list[Document]: List of split document chunks.
     """
+    from langchain.schema import Document
+    from langchain.text_splitter import TokenTextSplitter
+    from langchain_community.document_loaders import PyPDFLoader
+
     all_chunks = []
     text_splitter = TokenTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
@@ -183,13 +217,47 @@ def load_and_split_documents(
 
     for file_path in file_paths:
         try:
-            loader = (
-                PyPDFLoader(file_path)
-                if file_path.endswith(".pdf")
-                else TextLoader(file_path)
-            )
-            pages = loader.load_and_split()
+            if file_path.endswith(".pdf"):
+                pages = PyPDFLoader(file_path).load_and_split()
+            else:
+                # Text files and articles of the corpus store
+                content = read_document(file_path)
+                if content is None:
+                    raise FileNotFoundError(file_path)
+                pages = [Document(page_content=content, metadata={"source": file_path})]
             all_chunks.extend(text_splitter.split_documents(pages))
         except Exception as e:
             print(f"Error loading {file_path}: {e}")
     return all_chunks
+
+
+def file_version(file_path: str) -> str:
+    """
+    Identify the current version of a file from its modification time and size.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: Version string that changes whenever the file is rewritten, or "missing" if the file does not exist.
+    """
+    if not os.path.exists(file_path):
+        return "missing"
+    stat = os.stat(file_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Count the number of tokens of a text for a given OpenAI model.
+
+    Args:
+        text (str): Text to count the tokens of.
+        model (str): Name of the OpenAI model (default: "gpt-4o").
+
+    Returns:
+        int: Number of tokens of the text.
+    """
+    import tiktoken
+
+    return len(tiktoken.encoding_for_model(model).encode(text))
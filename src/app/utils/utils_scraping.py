@@ -1,8 +1,28 @@
 import os
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import pandas as pd
+from src.app.utils.async_fetcher import fetch_urls
+from src.app.utils.corpus_store import get_corpus_store
+from src.app.utils.html_extraction import extract_article
+from src.app.utils.http_cache import http_cache
+
+
+def parse_article_html(
+    html: bytes, url: str | None = None
+) -> tuple[str | None, str | None, str | None]:
+    """
+    Extract the title, date, and content of an article from its HTML.
+
+    Args:
+        html (bytes): HTML of the article page.
+        url (str, optional): URL of the article, used to pick site-specific selectors.
+
+    Returns:
+        tuple: A tuple containing the title, date, and content of the article, or
+        (None, None, None) if the page has no article.
+    """
+    return extract_article(html, url)
 
 
 def fetch_article_content(url: str) -> tuple[str | None, str | None, str | None]:
@@ -16,17 +36,7 @@ def fetch_article_content(url: str) -> tuple[str | None, str | None, str | None]
         tuple: A tuple containing the title, date, and content of the article.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        title = soup.find("title").get_text() if soup.find("title") else None
-        date = soup.find("time").get_text() if soup.find("time") else None
-        article = soup.find("article")
-
-        if article:
-            content = article.get_text(strip=True)
-            return title, date, content
+        return parse_article_html(http_cache.fetch(url, timeout=10), url)
     except requests.exceptions.Timeout:
         print(f"Request to {url} timed out.")
     except requests.exceptions.RequestException as e:
@@ -68,6 +78,8 @@ def process_article_urls(
     """
     Process a list of article URLs to fetch their content.
 
+    The articles are fetched concurrently over shared keep-alive connections.
+
     Args:
         url_list (list[str]): List of article URLs.
         save_to_txt (bool, optional): Whether to save articles as text files. Default is False.
@@ -76,13 +88,18 @@ def process_article_urls(
     Returns:
         pd.DataFrame: A DataFrame containing the articles' URLs, titles, dates, and contents.
     """
+    print(f"Fetching {len(url_list)} articles")
+    pages = fetch_urls(url_list)
+
     data = []
-    for index, url in enumerate(url_list):
+    for index, (url, page) in enumerate(zip(url_list, pages)):
         print(f"Processing article {index + 1}/{len(url_list)}: {url}")
         parsed_url = urlparse(url)
         site_name = site_name or parsed_url.netloc.replace("www.", "").split(".")[0]
+        if page is None:
+            continue
 
-        title, date, content = fetch_article_content(url)
+        title, date, content = parse_article_html(page, url)
         if content:
             if save_to_txt:
                 save_article_to_file(title, date, content, site_name, index)
@@ -146,6 +163,22 @@ def load_articles(directory: str, prefix: str, count: int) -> list[str]:
     return articles
 
 
+def save_articles_to_corpus(df: pd.DataFrame, output_dir: str) -> list[str]:
+    """
+    Save articles from a DataFrame to the corpus store of a data folder in one bulk write.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing article data.
+        output_dir (str): Data folder of the corpus store.
+
+    Returns:
+        list[str]: IDs of the saved articles.
+    """
+    ids = get_corpus_store(output_dir).add_articles(df)
+    print(f"{len(ids)} articles saved to the corpus store of {output_dir}")
+    return ids
+
+
 def save_articles_to_txt(df: pd.DataFrame, output_dir: str):
     """
     Save articles from a DataFrame to text files.
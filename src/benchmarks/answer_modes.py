@@ -0,0 +1,125 @@
+import os
+import time
+import argparse
+import statistics
+from dotenv import load_dotenv
+from openai import OpenAI
+from src.answer_classes import FormattedAnswer
+from src.app.generating_answers import (
+    final_answer_messages,
+    formatted_answer_messages,
+    map_intermediate_answers,
+    pack_intermediate_answers,
+)
+from src.app.session_store import load_session_index
+from src.app.utils.functions import edit_response
+
+
+def time_two_pass(context: str, query: str, client: OpenAI) -> float:
+    """
+    Time the reduce call followed by the `edit_response` formatting call.
+
+    Args:
+        context (str): Packed intermediate answers.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client.
+
+    Returns:
+        float: Wall time in seconds.
+    """
+    start_time = time.perf_counter()
+    response = client.chat.completions.create(
+        model="gpt-4o", messages=final_answer_messages(context, query)
+    )
+    edit_response(response.choices[0].message.content, client)
+    return time.perf_counter() - start_time
+
+
+def time_single_pass(context: str, query: str, client: OpenAI) -> float:
+    """
+    Time the reduce call producing ranked, formatted bullet points.
+
+    Args:
+        context (str): Packed intermediate answers.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client.
+
+    Returns:
+        float: Wall time in seconds.
+    """
+    start_time = time.perf_counter()
+    client.beta.chat.completions.parse(
+        model="gpt-4o",
+        messages=formatted_answer_messages(context, query),
+        response_format=FormattedAnswer,
+    )
+    return time.perf_counter() - start_time
+
+
+def compare_answer_modes(
+    community_summaries: list[str],
+    queries: list[str],
+    client: OpenAI,
+    repeats: int = 3,
+    top_k: int | None = None,
+    summary_embeddings=None,
+) -> dict[str, list[float]]:
+    """
+    Compare the latency of the two answer modes after a shared map step.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        queries (list[str]): Queries to answer.
+        client (OpenAI): OpenAI client.
+        repeats (int): Number of timed runs of each mode per query.
+        top_k (int | None): Maximum number of summaries to map over.
+        summary_embeddings (np.ndarray | None): Embedding index over the summaries.
+
+    Returns:
+        dict[str, list[float]]: Wall times in seconds of each mode.
+    """
+    timings = {"map": [], "Reduce + edit": [], "Single pass": []}
+    for query in queries:
+        start_time = time.perf_counter()
+        intermediate_answers = map_intermediate_answers(
+            community_summaries, query, client, summary_embeddings, top_k
+        )
+        timings["map"].append(time.perf_counter() - start_time)
+        context = pack_intermediate_answers(intermediate_answers)
+        if not context:
+            print(f"{query!r}: no relevant information, skipped")
+            continue
+        for _ in range(repeats):
+            timings["Reduce + edit"].append(time_two_pass(context, query, client))
+            timings["Single pass"].append(time_single_pass(context, query, client))
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the latency of the single-pass and reduce + edit answer modes."
+    )
+    parser.add_argument("session_id", help="Session ID of the indexed graph.")
+    parser.add_argument("queries", nargs="+", help="Queries to answer.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    session = load_session_index(args.session_id)
+
+    timings = compare_answer_modes(
+        session.community_summaries,
+        args.queries,
+        client,
+        args.repeats,
+        args.top_k,
+        session.summary_embeddings,
+    )
+    for mode, values in timings.items():
+        if values:
+            print(
+                f"{mode}: mean {statistics.mean(values):.2f}s, "
+                f"median {statistics.median(values):.2f}s over {len(values)} runs"
+            )
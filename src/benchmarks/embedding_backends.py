@@ -0,0 +1,96 @@
+import time
+import random
+import argparse
+import numpy as np
+from src.app.embedding_models import (
+    DEFAULT_MODEL_NAME,
+    EMBEDDING_BACKENDS,
+    EmbeddingModelRegistry,
+)
+
+WORDS = (
+    "health inflation hospital policy budget patients care market prices economy "
+    "government report growth rates staff waiting treatment costs services demand"
+).split()
+
+
+def synthetic_documents(num_docs: int, words_per_doc: int, seed: int = 0) -> list[str]:
+    """
+    Generate random documents of article-like length.
+
+    Args:
+        num_docs (int): Number of documents.
+        words_per_doc (int): Number of words per document.
+        seed (int): Random seed.
+
+    Returns:
+        list[str]: The documents.
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=words_per_doc)) for _ in range(num_docs)]
+
+
+def benchmark_backends(
+    documents: list[str],
+    backends: list[str],
+    model_name: str,
+    batch_size: int,
+    num_threads: int | None,
+) -> dict[str, tuple[float, float, float]]:
+    """
+    Measure the encoding throughput of each backend.
+
+    Args:
+        documents (list[str]): Documents to encode.
+        backends (list[str]): Backends to compare.
+        model_name (str): Name of the SentenceTransformer model.
+        batch_size (int): Encoding batch size.
+        num_threads (int | None): Number of CPU threads used for inference.
+
+    Returns:
+        dict[str, tuple[float, float, float]]: Load time in seconds, documents encoded per second
+        and mean cosine similarity with the embeddings of the first backend, keyed by backend.
+    """
+    registry = EmbeddingModelRegistry(batch_size=batch_size, num_threads=num_threads)
+    results, reference = {}, None
+    for backend in backends:
+        start_time = time.perf_counter()
+        try:
+            registry.get(model_name, backend)
+        except Exception as e:
+            print(f"{backend}: unavailable ({e})")
+            continue
+        load_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        embeddings = registry.encode(documents, model_name, backend)
+        docs_per_second = len(documents) / (time.perf_counter() - start_time)
+
+        if reference is None:
+            reference = embeddings
+        agreement = float(np.mean(np.sum(embeddings * reference, axis=1)))
+        results[backend] = (load_time, docs_per_second, agreement)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the encoding throughput of the embedding backends."
+    )
+    parser.add_argument("--num-docs", type=int, default=500)
+    parser.add_argument("--words-per-doc", type=int, default=200)
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.num_docs, args.words_per_doc)
+    results = benchmark_backends(
+        documents, args.backends, args.model_name, args.batch_size, args.threads
+    )
+    for backend, (load_time, docs_per_second, agreement) in results.items():
+        print(
+            f"{backend}: {docs_per_second:.1f} docs/s (loaded in {load_time:.2f}s, "
+            f"mean cosine with {args.backends[0]}: {agreement:.4f})"
+        )
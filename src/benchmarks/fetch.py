@@ -0,0 +1,106 @@
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from src.app.utils.async_fetcher import fetch_urls
+from src.app.utils.utils_scraping import parse_article_html
+
+ARTICLE_HTML = (
+    "<html><head><title>Article {index}</title></head><body>"
+    "<time>1 December 2024</time><article>"
+    + "<p>NHS waiting lists and treatment costs keep rising across the UK.</p>" * 50
+    + "</article></body></html>"
+)
+
+
+def start_stand_in_server(latency: float) -> ThreadingHTTPServer:
+    """
+    Start a local HTTP server standing in for a news site.
+
+    Args:
+        latency (float): Number of seconds the server waits before answering each request.
+
+    Returns:
+        ThreadingHTTPServer: The running server, listening on a free local port.
+    """
+
+    class ArticleHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = ARTICLE_HTML.format(index=self.path.strip("/")).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArticleHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_fetchers(
+    num_articles: int, latency: float, per_host_limit: int, politeness_delay: float
+) -> dict[str, float]:
+    """
+    Compare the sequential and async article fetchers against the stand-in server.
+
+    Args:
+        num_articles (int): Number of articles to fetch.
+        latency (float): Latency in seconds of the stand-in server.
+        per_host_limit (int): Maximum number of concurrent connections of the async fetcher.
+        politeness_delay (float): Politeness delay in seconds of the async fetcher.
+
+    Returns:
+        dict[str, float]: Wall time in seconds of each fetcher.
+    """
+    server = start_stand_in_server(latency)
+    host, port = server.server_address
+    urls = [f"http://{host}:{port}/{index}" for index in range(num_articles)]
+    try:
+        start_time = time.perf_counter()
+        for url in urls:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            parse_article_html(response.content)
+        sequential_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        pages = fetch_urls(
+            urls,
+            per_host_limit=per_host_limit,
+            politeness_delay=politeness_delay,
+            cache=None,
+        )
+        for page in pages:
+            parse_article_html(page)
+        async_time = time.perf_counter() - start_time
+    finally:
+        server.shutdown()
+    return {"sequential": sequential_time, "async": async_time}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the article fetchers against a local HTTP stand-in server."
+    )
+    parser.add_argument("--num-articles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--per-host-limit", type=int, default=8)
+    parser.add_argument("--politeness-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    timings = benchmark_fetchers(
+        args.num_articles, args.latency, args.per_host_limit, args.politeness_delay
+    )
+    for fetcher, seconds in timings.items():
+        print(
+            f"{fetcher}: {seconds:.2f}s ({args.num_articles / seconds:.1f} articles/s)"
+        )
@@ -0,0 +1,85 @@
+import os
+import time
+import argparse
+from src.app.utils.html_extraction import available_extractors, site_selectors
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# URL of each fixture, used to pick its site-specific selectors
+FIXTURE_URLS = {
+    "bbc": "https://www.bbc.com/news/articles/fixture",
+    "nhs": "https://www.england.nhs.uk/2024/11/fixture/",
+    "economist": "https://www.economist.com/finance-and-economics/2024/12/12/fixture",
+}
+
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> list[tuple[str, bytes]]:
+    """
+    Load the saved HTML pages of the benchmark.
+
+    Args:
+        fixtures_dir (str): Directory containing the `.html` fixtures.
+
+    Returns:
+        list[tuple[str, bytes]]: URL and HTML of each fixture.
+    """
+    fixtures = []
+    for file_name in sorted(os.listdir(fixtures_dir)):
+        if file_name.endswith(".html"):
+            site = os.path.splitext(file_name)[0]
+            with open(os.path.join(fixtures_dir, file_name), "rb") as file:
+                fixtures.append((FIXTURE_URLS.get(site, ""), file.read()))
+    return fixtures
+
+
+def benchmark_extractors(
+    fixtures: list[tuple[str, bytes]], repeats: int
+) -> dict[str, float]:
+    """
+    Measure the throughput of each available extraction backend.
+
+    Args:
+        fixtures (list[tuple[str, bytes]]): URL and HTML of each page.
+        repeats (int): Number of passes over the fixtures.
+
+    Returns:
+        dict[str, float]: Pages extracted per second, keyed by backend name.
+    """
+    throughputs = {}
+    for name, extractor in available_extractors().items():
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for url, html in fixtures:
+                extractor.extract(html, site_selectors(url))
+        elapsed = time.perf_counter() - start_time
+        throughputs[name] = repeats * len(fixtures) / elapsed
+    return throughputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the HTML extraction backends over saved article pages."
+    )
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures_dir)
+    total_bytes = sum(len(html) for _, html in fixtures)
+
+    # Check that the backends agree before timing them
+    for url, html in fixtures:
+        contents = {
+            name: extractor.extract(html, site_selectors(url))[2]
+            for name, extractor in available_extractors().items()
+        }
+        lengths = ", ".join(
+            f"{name}: {len(content or '')} chars" for name, content in contents.items()
+        )
+        print(f"{url}: {lengths}")
+
+    for name, pages_per_second in benchmark_extractors(fixtures, args.repeats).items():
+        megabytes_per_second = pages_per_second * total_bytes / len(fixtures) / 1e6
+        print(
+            f"{name}: {pages_per_second:.1f} pages/s ({megabytes_per_second:.1f} MB/s)"
+        )
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Entry points whose cold import time is tracked
+DEFAULT_MODULES = [
+    "src.app.session_store",
+    "src.app.generating_answers",
+    "src.app.scraping_pipeline",
+    "src.app.graph_builder",
+    "src.app.utils.functions",
+]
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+
+def measure_import_time(module: str) -> tuple[float, dict[str, float]]:
+    """
+    Import a module in a fresh interpreter and parse its `-X importtime` report.
+
+    Args:
+        module (str): Name of the module to import.
+
+    Returns:
+        tuple[float, dict[str, float]]: Cumulative import time of the module in seconds, and
+        time spent importing the modules of each top-level package.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        # Configuration is only checked on use: the import must not need any key
+        env={**os.environ, "MPLBACKEND": "Agg"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    total, packages, started = 0.0, {}, False
+    for line in result.stderr.splitlines():
+        # Lines look like: "import time: self [us] | cumulative | imported package", nesting
+        # being shown by the indentation of the package name
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        top_level = not name.startswith("  ")
+        if not started:
+            # Interpreter start-up imports end with the top-level `site` import
+            started = top_level and name.strip() == "site"
+            continue
+        if top_level:
+            total += int(cumulative) / 1e6
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_time) / 1e6
+    return total, packages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the cold import time of the entry points with -X importtime."
+    )
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=8, help="Packages listed per module.")
+    parser.add_argument("--json", help="Write the results to a JSON file, e.g. for CI.")
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Exit with an error if a module takes longer to import.",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        total, packages = measure_import_time(module)
+        results[module] = {"seconds": total, "packages": packages}
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        print(f"{module}: {total:.3f}s")
+        for package, seconds in heaviest[: args.top]:
+            print(f"    {package}: {seconds:.3f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_seconds is not None:
+        slow = [m for m, r in results.items() if r["seconds"] > args.max_seconds]
+        if slow:
+            sys.exit(f"Import time above {args.max_seconds}s: {', '.join(slow)}")
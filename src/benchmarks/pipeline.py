@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from dataclasses import asdict
+from src.benchmarks.stub_llm import start_stub_llm_server
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+ENTITIES = [
+    "NHS", "Pfizer", "Ozempic", "Wegovy", "Novartis", "AstraZeneca", "Treasury", "Ofsted",
+    "London", "Manchester", "Birmingham", "Leeds", "Bristol", "Scotland", "Wales", "Europe",
+    "Insulin", "Statins", "Antibiotics", "Vaccines", "Hospitals", "Nurses", "Doctors",
+    "Pharmacies", "Inflation", "Wages", "Budget", "Waiting", "Brexit", "Medicare",
+]
+VERBS = ["raises", "cuts", "funds", "delays", "supplies", "regulates", "affects", "expands"]
+
+
+def synthetic_corpus(
+    num_docs: int, directory: str, words_per_doc: int = 300, seed: int = 0
+) -> list[str]:
+    """
+    Write synthetic articles mentioning a shared pool of entities.
+
+    Args:
+        num_docs (int): Number of articles.
+        directory (str): Directory the articles are written to.
+        words_per_doc (int): Approximate number of words per article.
+        seed (int): Random seed.
+
+    Returns:
+        list[str]: Paths of the articles.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    file_paths = []
+    for index in range(num_docs):
+        sentences = []
+        while sum(len(sentence.split()) for sentence in sentences) < words_per_doc:
+            subject, target = rng.sample(ENTITIES, 2)
+            sentences.append(
+                f"{subject} {rng.choice(VERBS)} {target} costs by {rng.randint(1, 40)} percent."
+            )
+        path = os.path.join(directory, f"Synthetic_article_{index}.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(
+                f"URL: https://example.com/{index}\nTitle: Synthetic article {index}\n"
+                f"Date: 2024-12-01\n\n" + " ".join(sentences)
+            )
+        file_paths.append(path)
+    return file_paths
+
+
+def run_stage(server, stage: str, function, *args) -> tuple[object, dict]:
+    """
+    Run a pipeline stage and measure it.
+
+    Args:
+        server: Stub LLM server the stage calls.
+        stage (str): Name of the stage.
+        function: Function running the stage.
+        *args: Arguments of the function.
+
+    Returns:
+        tuple[object, dict]: Result of the stage, and its wall time in seconds, LLM calls,
+        errors, estimated tokens and peak traced memory in MiB.
+    """
+    before = asdict(server.stats)
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = asdict(server.stats)
+    return result, {
+        "stage": stage,
+        "seconds": elapsed,
+        "calls": after["calls"] - before["calls"],
+        "errors": after["errors"] - before["errors"],
+        "prompt_tokens": after["prompt_tokens"] - before["prompt_tokens"],
+        "completion_tokens": after["completion_tokens"] - before["completion_tokens"],
+        "peak_mib": peak / 2**20,
+    }
+
+
+def benchmark_pipeline(server, file_paths: list[str], query: str) -> list[dict]:
+    """
+    Run the indexing and answering stages over a corpus against the stub LLM server.
+
+    Args:
+        server: Stub LLM server the OpenAI clients are configured with.
+        file_paths (list[str]): Paths of the articles.
+        query (str): Query answered from the community summaries.
+
+    Returns:
+        list[dict]: Measurements of each stage.
+    """
+    from src.app.graph_builder import build_graph
+    from src.app.graph_nx import build_nx_graph
+    from src.app.get_communities import get_communities, summarize_communities
+    from src.app.generating_answers import generate_answer
+    from src.app.utils.config import get_openai_client
+
+    client = get_openai_client()
+    results = []
+    graph_document, metrics = run_stage(server, "build_graph", build_graph, file_paths)
+    results.append(metrics)
+    graph = build_nx_graph(graph_document)
+    communities, metrics = run_stage(server, "get_communities", get_communities, graph)
+    results.append(metrics)
+    community_summaries, metrics = run_stage(
+        server, "summarize_communities", summarize_communities, communities, graph, client
+    )
+    results.append(metrics)
+    _, metrics = run_stage(
+        server, "generate_answer", generate_answer, community_summaries, query, client
+    )
+    results.append(metrics)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline stages offline against a stub LLM server."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--words-per-doc", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--query", default="What factors impact healthcare inflation?")
+    parser.add_argument("--json", help="Write the results to a JSON file.")
+    args = parser.parse_args()
+
+    server = start_stub_llm_server(args.latency, args.error_rate, args.seed)
+    # The OpenAI client reads OPENAI_BASE_URL, langchain's ChatOpenAI reads OPENAI_API_BASE
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "stub",
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_BASE": server.base_url,
+            "MPLBACKEND": "Agg",
+        }
+    )
+
+    all_results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Prompts are read relative to the parent of the repository, named GraphRAG_vf
+        os.symlink(ROOT_DIR, os.path.join(work_dir, "GraphRAG_vf"))
+        os.chdir(work_dir)
+        for size in args.sizes:
+            file_paths = synthetic_corpus(
+                size, os.path.join(work_dir, f"corpus_{size}"), args.words_per_doc, args.seed
+            )
+            all_results[size] = benchmark_pipeline(server, file_paths, args.query)
+            print(f"{size} documents:")
+            for metrics in all_results[size]:
+                print(
+                    f"    {metrics['stage']}: {metrics['seconds']:.2f}s, "
+                    f"{metrics['calls']} calls ({metrics['errors']} errors), "
+                    f"{metrics['prompt_tokens']} + {metrics['completion_tokens']} tokens, "
+                    f"peak {metrics['peak_mib']:.1f} MiB"
+                )
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=2)
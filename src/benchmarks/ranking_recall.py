@@ -0,0 +1,67 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from src.app.articles_subject import calculate_bert_similarity, rank_articles, top_k_indices
+
+
+def evaluate_ranking_recall(
+    articles: list[str],
+    queries: list[str],
+    num_articles: int,
+    candidate_sizes: list[int] = (25, 50, 100, 200),
+) -> dict[int, tuple[float, float]]:
+    """
+    Evaluate the recall of the two-stage ranking against the full dense ranking.
+
+    Args:
+        articles (list[str]): Articles to rank.
+        queries (list[str]): Queries to evaluate.
+        num_articles (int): Number of articles selected per query.
+        candidate_sizes (list[int]): Numbers of prefiltered articles re-ranked with the dense model.
+
+    Returns:
+        dict[int, tuple[float, float]]: Mean recall of the selected articles and mean ranking
+        time in seconds, keyed by number of re-ranked articles.
+    """
+    results = {size: ([], []) for size in candidate_sizes}
+    for query in queries:
+        scores = calculate_bert_similarity(articles, query)
+        reference = set(top_k_indices(scores, num_articles).tolist())
+        for size in candidate_sizes:
+            start_time = time.perf_counter()
+            selected, _ = rank_articles(articles, query, num_articles, size)
+            elapsed = time.perf_counter() - start_time
+            recall = len(reference.intersection(selected.tolist())) / len(reference)
+            results[size][0].append(recall)
+            results[size][1].append(elapsed)
+    return {
+        size: (float(np.mean(recalls)), float(np.mean(times)))
+        for size, (recalls, times) in results.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Evaluate the recall of the TF-IDF prefilter + dense re-ranking of articles."
+    )
+    parser.add_argument(
+        "articles_csv", help="CSV of scraped articles, e.g. bbc_all_articles.csv."
+    )
+    parser.add_argument("queries", nargs="+", help="Queries to evaluate.")
+    parser.add_argument("--num-articles", type=int, default=30)
+    parser.add_argument(
+        "--candidate-sizes", type=int, nargs="+", default=[25, 50, 100, 200]
+    )
+    args = parser.parse_args()
+
+    articles = pd.read_csv(args.articles_csv)["content"].fillna("").tolist()
+    results = evaluate_ranking_recall(
+        articles, args.queries, args.num_articles, args.candidate_sizes
+    )
+    # Embeddings are cached after the reference ranking, so times measure warm rankings
+    for size, (recall, elapsed) in results.items():
+        print(
+            f"M={size}: recall@{args.num_articles} {recall:.3f}, "
+            f"{min(size, len(articles))}/{len(articles)} articles re-ranked, {elapsed:.3f}s"
+        )
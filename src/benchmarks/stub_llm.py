@@ -0,0 +1,324 @@
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass, field, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Words of the prompts that are never used as canned entity names
+STOP_WORDS = {
+    "The", "This", "That", "These", "Use", "Query", "Queries", "Summary", "Entities",
+    "Relationships", "Tip", "Make", "URL", "Title", "Date", "In", "It", "A", "An",
+}
+
+
+@dataclass
+class StubStats:
+    """
+    Requests served by the stub LLM server.
+
+    Token counts are estimated at 4 characters per token.
+
+    Attributes:
+        calls (int): Number of chat completion requests, including the failed ones.
+        errors (int): Number of requests answered with an injected error.
+        prompt_tokens (int): Estimated number of prompt tokens.
+        completion_tokens (int): Estimated number of completion tokens.
+        calls_by_kind (dict[str, int]): Number of successful requests per kind of output
+            ("text", "structured", "function").
+    """
+
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls_by_kind: dict[str, int] = field(default_factory=dict)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return max(1, len(text) // 4)
+
+
+def prompt_words(messages: list[dict]) -> list[str]:
+    """
+    Pick the words canned outputs are made of from the last user message.
+
+    Capitalized words are preferred, so that entities extracted from several chunks of the same
+    document overlap and connect the graph.
+
+    Args:
+        messages (list[dict]): Messages of the request.
+
+    Returns:
+        list[str]: Candidate words, never empty.
+    """
+    contents = [
+        message.get("content") or ""
+        for message in messages
+        if message.get("role") in ("user", "human")
+    ]
+    text = contents[-1] if contents else ""
+    if not isinstance(text, str):  # List of content parts
+        text = " ".join(part.get("text", "") for part in text if isinstance(part, dict))
+    words = [w for w in re.findall(r"\b[A-Z][a-zA-Z]{2,}\b", text) if w not in STOP_WORDS]
+    return words or re.findall(r"\b[a-zA-Z]{4,}\b", text) or ["stub"]
+
+
+def fake_from_schema(
+    schema: dict, rng: random.Random, words: list[str], defs: dict, name: str = ""
+):
+    """
+    Generate a deterministic instance of a JSON schema.
+
+    Args:
+        schema (dict): JSON schema to instantiate.
+        rng (random.Random): Random generator seeded by the request.
+        words (list[str]): Words strings are made of.
+        defs (dict): Definitions referenced by `$ref`.
+        name (str): Name of the property being generated.
+
+    Returns:
+        An instance of the schema.
+    """
+    if "$ref" in schema:
+        return fake_from_schema(defs[schema["$ref"].split("/")[-1]], rng, words, defs, name)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return fake_from_schema(options[0], rng, words, defs, name)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type == "object":
+        return {
+            key: fake_from_schema(value, rng, words, defs, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        count = rng.randint(1, 5 if name in ("nodes", "rels", "points", "bullets") else 2)
+        return [
+            fake_from_schema(schema.get("items", {}), rng, words, defs, name)
+            for _ in range(count)
+        ]
+    if schema_type == "integer":
+        return rng.randint(0, 100)
+    if schema_type == "number":
+        return round(rng.random(), 3)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+    if name in ("id", "type", "key", "sources", "entities"):
+        return rng.choice(words)
+    return " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+
+
+def start_stub_llm_server(
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    completion_words: int = 60,
+    port: int = 0,
+) -> ThreadingHTTPServer:
+    """
+    Start a local OpenAI-compatible chat completions server with canned outputs.
+
+    Outputs are deterministic for a given request: plain text for free-form completions, an
+    instance of the JSON schema for structured outputs (`response_format`), and function or
+    tool call arguments for function calling, as used by the langchain extraction chain.
+    Streaming requests are answered with server-sent events.
+
+    Args:
+        latency (float): Number of seconds the server waits before answering each request.
+        error_rate (float): Fraction of requests answered with a 500 error.
+        seed (int): Seed of the error injection.
+        completion_words (int): Number of words of plain text completions.
+        port (int): Port to listen on. Defaults to a free port.
+
+    Returns:
+        ThreadingHTTPServer: The running server. Its `stats` attribute holds a `StubStats`, and
+        its `base_url` attribute the URL to configure OpenAI clients with.
+    """
+    stats = StubStats()
+    lock = threading.Lock()
+    error_rng = random.Random(seed)
+
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_stream(self, message: dict, finish_reason: str, model: str):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            content = message.get("content") or ""
+            pieces = [content[i : i + 16] for i in range(0, len(content), 16)] or [""]
+            deltas = [{"role": "assistant", "content": pieces[0]}]
+            deltas += [{"content": piece} for piece in pieces[1:]]
+            if "function_call" in message:
+                deltas.append({"function_call": message["function_call"]})
+            if "tool_calls" in message:
+                deltas.append(
+                    {"tool_calls": [{"index": 0, **call} for call in message["tool_calls"]]}
+                )
+            for index, delta in enumerate(deltas):
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": delta,
+                            "finish_reason": finish_reason if index == len(deltas) - 1 else None,
+                        }
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            request = json.loads(body)
+            time.sleep(latency)
+
+            prompt_tokens = estimate_tokens(json.dumps(request.get("messages", [])))
+            with lock:
+                stats.calls += 1
+                stats.prompt_tokens += prompt_tokens
+                failed = error_rng.random() < error_rate
+                if failed:
+                    stats.errors += 1
+            if failed:
+                self.send_json(
+                    500, {"error": {"message": "Injected stub error", "type": "server_error"}}
+                )
+                return
+
+            rng = random.Random(hashlib.sha256(body).digest())
+            words = prompt_words(request.get("messages", []))
+            message, finish_reason, kind = self.canned_message(request, rng, words)
+            completion = json.dumps(message)
+            completion_tokens = estimate_tokens(completion)
+            with lock:
+                stats.completion_tokens += completion_tokens
+                stats.calls_by_kind[kind] = stats.calls_by_kind.get(kind, 0) + 1
+
+            model = request.get("model", "stub")
+            if request.get("stream"):
+                self.send_stream(message, finish_reason, model)
+                return
+            self.send_json(
+                200,
+                {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": finish_reason}
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                },
+            )
+
+        def canned_message(
+            self, request: dict, rng: random.Random, words: list[str]
+        ) -> tuple[dict, str, str]:
+            """Build the assistant message, finish reason and kind of output of a request."""
+            functions = request.get("functions") or [
+                tool["function"] for tool in request.get("tools", []) if "function" in tool
+            ]
+            if functions:
+                choice = request.get("function_call") or request.get("tool_choice")
+                name = None
+                if isinstance(choice, dict):
+                    name = choice.get("name") or choice.get("function", {}).get("name")
+                function = next((f for f in functions if f["name"] == name), functions[0])
+                parameters = function.get("parameters", {})
+                arguments = json.dumps(
+                    fake_from_schema(parameters, rng, words, parameters.get("$defs", {}))
+                )
+                call = {"name": function["name"], "arguments": arguments}
+                if request.get("functions"):
+                    message = {"role": "assistant", "content": None, "function_call": call}
+                    return message, "function_call", "function"
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{"id": "call_stub", "type": "function", "function": call}],
+                }
+                return message, "tool_calls", "function"
+
+            response_format = request.get("response_format") or {}
+            if response_format.get("type") == "json_schema":
+                schema = response_format["json_schema"].get("schema", {})
+                content = json.dumps(
+                    fake_from_schema(schema, rng, words, schema.get("$defs", {}))
+                )
+                message = {"role": "assistant", "content": content, "refusal": None}
+                return message, "stop", "structured"
+            if response_format.get("type") == "json_object":
+                return {"role": "assistant", "content": "{}"}, "stop", "structured"
+
+            content = " ".join(rng.choice(words) for _ in range(completion_words))
+            return {"role": "assistant", "content": content}, "stop", "text"
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), ChatCompletionsHandler)
+    server.daemon_threads = True
+    server.stats = stats
+    host, bound_port = server.server_address
+    server.base_url = f"http://{host}:{bound_port}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a local OpenAI-compatible stub server with canned outputs."
+    )
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_stub_llm_server(args.latency, args.error_rate, args.seed, port=args.port)
+    print(f"Stub LLM server listening on {server.base_url}")
+    print(
+        f"Point the app at it with OPENAI_BASE_URL={server.base_url} "
+        f"OPENAI_API_BASE={server.base_url} OPENAI_API_KEY=stub"
+    )
+    try:
+        while True:
+            time.sleep(60)
+            print(asdict(server.stats))
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,102 @@
+import os
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from openai import OpenAI
+from src.app.generating_answers import answer_community
+from src.app.session_store import load_session_index
+from src.app.summary_index import build_summary_index, rank_summaries
+
+
+def relevant_communities(
+    community_summaries: list[str], query: str, client: OpenAI
+) -> set[int]:
+    """
+    Label the communities that are relevant to a query by running the full map step.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        query (str): Query to be answered.
+        client (OpenAI): OpenAI client for generating answers.
+
+    Returns:
+        set[int]: Indices of the communities whose intermediate answer has a helpful point.
+    """
+    relevant = set()
+    for index, summary in enumerate(community_summaries):
+        answer = answer_community(summary, query, client)
+        if any(point.score > 0 for point in answer.points):
+            relevant.add(index)
+    return relevant
+
+
+def recall_at_k(ranking: list[int], relevant: set[int], ks: list[int]) -> dict[int, float]:
+    """
+    Compute the recall of a ranking at several cut-offs.
+
+    Args:
+        ranking (list[int]): Community indices, most similar first.
+        relevant (set[int]): Indices of the relevant communities.
+        ks (list[int]): Cut-offs to evaluate.
+
+    Returns:
+        dict[int, float]: Recall for each cut-off. Queries without relevant communities have a recall of 1.
+    """
+    if not relevant:
+        return {k: 1.0 for k in ks}
+    return {k: len(relevant.intersection(ranking[:k])) / len(relevant) for k in ks}
+
+
+def evaluate_summary_recall(
+    community_summaries: list[str],
+    summary_embeddings: np.ndarray,
+    queries: list[str],
+    client: OpenAI,
+    ks: list[int] = (1, 3, 5, 10, 20),
+) -> dict[int, float]:
+    """
+    Evaluate the recall of the embedding pre-filter against the full map step.
+
+    Args:
+        community_summaries (list[str]): List of summaries for each community.
+        summary_embeddings (np.ndarray): Embedding index over the summaries.
+        queries (list[str]): Queries to evaluate.
+        client (OpenAI): OpenAI client used to label relevant communities.
+        ks (list[int]): Cut-offs to evaluate.
+
+    Returns:
+        dict[int, float]: Mean recall over the queries for each cut-off.
+    """
+    recalls = {k: [] for k in ks}
+    for query in queries:
+        relevant = relevant_communities(community_summaries, query, client)
+        ranking = rank_summaries(query, summary_embeddings)
+        for k, recall in recall_at_k(ranking, relevant, ks).items():
+            recalls[k].append(recall)
+        print(f"{query!r}: {len(relevant)}/{len(community_summaries)} relevant communities")
+    return {k: float(np.mean(values)) for k, values in recalls.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Evaluate recall@k of the community summary pre-filter."
+    )
+    parser.add_argument("session_id", help="Session ID of the indexed graph.")
+    parser.add_argument("queries", nargs="+", help="Queries to evaluate.")
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 3, 5, 10, 20])
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    session = load_session_index(args.session_id)
+    community_summaries = session.community_summaries
+    summary_embeddings = session.summary_embeddings
+    if summary_embeddings is None:
+        summary_embeddings = build_summary_index(community_summaries)
+
+    results = evaluate_summary_recall(
+        community_summaries, summary_embeddings, args.queries, client, args.ks
+    )
+    for k, recall in results.items():
+        print(f"recall@{k}: {recall:.3f} ({k} LLM calls per query)")
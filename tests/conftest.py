@@ -0,0 +1,66 @@
+import os
+import re
+import zlib
+import networkx as nx
+import numpy as np
+import pytest
+
+
+def bag_of_words_embeddings(texts: list[str], model_name: str = "") -> np.ndarray:
+    """Embed texts as normalized hashed bags of words, ignoring case and punctuation."""
+    embeddings = np.zeros((len(texts), 64), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            embeddings[row, zlib.crc32(word.encode("utf-8")) % 64] += 1
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    """
+    Replace the sentence embedding model by `bag_of_words_embeddings`, so that tests neither
+    download nor load a model.
+    """
+    from src.app import summary_index
+
+    monkeypatch.setattr(summary_index, "embed_texts", bag_of_words_embeddings)
+    return bag_of_words_embeddings
+
+
+@pytest.fixture
+def provenance_graph() -> nx.Graph:
+    """
+    Graph shaped like the output of `build_nx_graph`: two files, one chunk each, and the
+    entities extracted from each chunk linked to it by `From` relationships.
+    """
+    graph = nx.Graph()
+    for name, content, entities in (
+        ("a.txt", "Drug prices drive inflation.", ["Inflation", "Drug Prices"]),
+        ("b.txt", "Wages drive inflation.", ["Inflation", "Wages"]),
+    ):
+        chunk = f"{name}_0"
+        graph.add_node(
+            name, type="File", properties={"path": f"/data/{name}", "name": name}
+        )
+        # Property keys are stored as formatted by `format_property_key`
+        graph.add_node(
+            chunk,
+            type="Chunk",
+            properties={"content": content, "idx": "0", "sourcefileid": name},
+        )
+        graph.add_edge(chunk, name, type="From")
+        for entity in entities:
+            graph.add_node(entity, type="Concept", properties={"name": entity})
+            graph.add_edge(entity, chunk, type="From")
+    graph.add_edge("Drug Prices", "Inflation", type="Drives")
+    graph.add_edge("Wages", "Inflation", type="Drives")
+    return graph
+
+
+@pytest.fixture
+def prompts_dir(tmp_path, monkeypatch):
+    """Run the test from a directory where the `GraphRAG_vf/src/prompts` paths resolve."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.symlink(root, tmp_path / "GraphRAG_vf")
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,38 @@
+import numpy as np
+from src.app.articles_subject import TfidfIndex, top_k_indices
+
+ARTICLES = [
+    "Hospital waiting lists grow as the NHS faces staff shortages.",
+    "Drug prices push medical inflation to a record high.",
+    "The central bank raises interest rates to fight inflation.",
+]
+
+
+def test_top_k_indices_are_sorted_by_decreasing_score():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_tfidf_index_ranks_articles_for_each_theme():
+    index = TfidfIndex(ARTICLES, n_features=2**12)
+    (nhs, _), (inflation, similarities) = index.top_k(["NHS staff", "medical inflation"], 2)
+    assert nhs[0] == 0
+    assert inflation.tolist() == [1, 2]
+    assert similarities[0] > similarities[1] > 0
+
+
+def test_tfidf_index_save_and_load(tmp_path):
+    index = TfidfIndex(ARTICLES[:2], n_features=2**12)
+    path = str(tmp_path / "tfidf.pkl")
+    index.save(path)
+    loaded = TfidfIndex.load(path)
+    assert len(loaded) == 2
+    assert np.allclose(loaded.scores(["inflation"]), index.scores(["inflation"]))
+
+    # Articles added after loading update the document frequencies
+    index.add(ARTICLES[2:])
+    loaded.add(ARTICLES[2:])
+    assert np.array_equal(loaded.document_frequencies, index.document_frequencies)
+    assert np.allclose(loaded.scores(["inflation"]), index.scores(["inflation"]))
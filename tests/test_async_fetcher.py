@@ -0,0 +1,87 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.app.utils.async_fetcher import fetch_urls
+from src.app.utils.http_cache import HttpCache
+
+
+@pytest.fixture
+def server():
+    """Local HTTP server recording the requests it receives, per path."""
+    requests = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                requests.setdefault(self.path, []).append(dict(self.headers))
+                count = len(requests[self.path])
+            if self.path.startswith("/article/"):
+                self.reply(200, self.path.encode())
+            elif self.path == "/flaky" and count == 1:
+                self.reply(503, b"", {"Retry-After": "0"})
+            elif self.path == "/flaky":
+                self.reply(200, b"recovered")
+            elif self.path == "/down":
+                self.reply(503, b"")
+            elif self.path == "/cached":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.reply(304, b"")
+                else:
+                    self.reply(200, b"cached body", {"ETag": '"v1"'})
+            else:
+                self.reply(404, b"")
+
+        def reply(self, status: int, body: bytes, headers: dict | None = None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.requests = requests
+    yield httpd
+    httpd.shutdown()
+
+
+def fetch(urls: list[str], **kwargs) -> list[bytes | None]:
+    options = {"backoff": 0.01, "politeness_delay": 0, "cache": None}
+    return fetch_urls(urls, **{**options, **kwargs})
+
+
+def test_bodies_are_returned_in_the_order_of_the_urls(server):
+    urls = [f"{server.base_url}/article/{i}" for i in range(20)]
+    assert fetch(urls, per_host_limit=4) == [f"/article/{i}".encode() for i in range(20)]
+
+
+def test_transient_errors_are_retried(server):
+    assert fetch([f"{server.base_url}/flaky"]) == [b"recovered"]
+    assert len(server.requests["/flaky"]) == 2
+
+
+def test_urls_that_cannot_be_fetched_are_none(server):
+    bodies = fetch([f"{server.base_url}/down", f"{server.base_url}/missing"], retries=2)
+    assert bodies == [None, None]
+    assert len(server.requests["/down"]) == 3
+    # Client errors are not retried
+    assert len(server.requests["/missing"]) == 1
+
+
+def test_cached_urls_are_revalidated(server, tmp_path):
+    cache = HttpCache(cache_dir=str(tmp_path))
+    url = f"{server.base_url}/cached"
+    assert fetch([url], cache=cache) == [b"cached body"]
+    assert fetch([url], cache=cache) == [b"cached body"]
+    assert [headers.get("If-None-Match") for headers in server.requests["/cached"]] == [
+        None,
+        '"v1"',
+    ]
+    offline = HttpCache(cache_dir=str(tmp_path), offline=True)
+    assert fetch([url, f"{server.base_url}/article/1"], cache=offline) == [b"cached body", None]
@@ -0,0 +1,81 @@
+import os
+import pandas as pd
+import pytest
+from src.app.utils.corpus_store import CorpusStore
+
+
+def articles(*rows: tuple[str, str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {"url": f"https://site/{title}", "title": title, "date": "2024-12-01", "content": content}
+            for title, content in rows
+        ]
+    )
+
+
+@pytest.fixture
+def store(tmp_path) -> CorpusStore:
+    store = CorpusStore(str(tmp_path / "corpus"))
+    store.add_articles(articles(("First one", "Content 1"), ("Second", "Content 2")))
+    return store
+
+
+def test_articles_are_read_back_by_offset(store):
+    assert store.ids() == ["First_one.txt", "Second.txt"]
+    record = store.get("Second.txt")
+    assert record["content"] == "Content 2"
+    assert record["url"] == "https://site/Second"
+    assert store.text("First_one.txt") == (
+        "URL: https://site/First one\nTitle: First one\nDate: 2024-12-01\n\nContent 1"
+    )
+    assert store.get("Missing.txt") is None
+
+
+def test_duplicated_contents_are_stored_once(store):
+    ids = store.add_articles(articles(("Copy", "Content 1"), ("Third", "Content 3")))
+    assert ids == ["First_one.txt", "Third.txt"]
+    assert "Copy.txt" not in store
+
+
+def test_index_is_reloaded_from_disk(store):
+    reloaded = CorpusStore(store.directory)
+    assert reloaded.ids() == store.ids()
+    assert reloaded.get("Second.txt") == store.get("Second.txt")
+
+
+def test_removed_articles_are_tombstoned(store):
+    assert store.remove("First_one.txt")
+    assert not store.remove("First_one.txt")
+    assert "First_one.txt" not in store
+    reloaded = CorpusStore(store.directory)
+    assert reloaded.ids() == ["Second.txt"]
+    # The content of a removed article can be added again
+    assert reloaded.add_articles(articles(("Again", "Content 1"))) == ["Again.txt"]
+
+
+def test_lagging_offset_index_is_completed_from_the_data_file(store):
+    with open(store.index_path, "r+") as file:
+        first_entry = file.readline()
+        file.seek(len(first_entry))
+        file.truncate()
+    reloaded = CorpusStore(store.directory)
+    assert reloaded.ids() == ["First_one.txt", "Second.txt"]
+    assert reloaded.get("Second.txt")["content"] == "Content 2"
+    with open(store.index_path) as file:
+        assert len(file.readlines()) == 2
+
+
+def test_partially_written_record_is_ignored(store):
+    with open(store.data_path, "ab") as file:
+        file.write(b'{"id": "Partial.txt", "cont')
+    os.remove(store.index_path)
+    reloaded = CorpusStore(store.directory)
+    assert reloaded.ids() == ["First_one.txt", "Second.txt"]
+
+
+def test_articles_with_the_same_title_get_distinct_ids(store):
+    ids = store.add_articles(articles(("Second", "Content 3"), ("Second", "Content 4")))
+    assert ids[0] != ids[1]
+    assert all(doc_id.startswith("Second_") for doc_id in ids)
+    assert [store.get(doc_id)["content"] for doc_id in ids] == ["Content 3", "Content 4"]
+    assert store.get("Second.txt")["content"] == "Content 2"
@@ -0,0 +1,49 @@
+import numpy as np
+from src.app.utils.dedup import MinHasher, canonicalize_url, find_duplicates, shingles
+
+ARTICLE = " ".join(
+    f"sentence {i} of the article about healthcare costs and medical inflation"
+    for i in range(30)
+)
+
+
+def test_canonicalize_url_drops_tracking_and_presentation_details():
+    canonical = canonicalize_url("https://www.bbc.com/news/health-1/?utm_source=x&b=2&a=1#top")
+    assert canonical == canonicalize_url("http://bbc.com/news/health-1?a=1&b=2")
+    assert canonical == "//bbc.com/news/health-1?a=1&b=2"
+    assert canonicalize_url("https://amp.bbc.com/news/health-1/amp") == "//bbc.com/news/health-1"
+    assert canonicalize_url("https://bbc.com/news/a") != canonicalize_url("https://bbc.com/news/b")
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=256)
+    first = {f"shingle {i}" for i in range(100)}
+    second = {f"shingle {i}" for i in range(50, 150)}  # Jaccard similarity 1/3
+    assert np.array_equal(hasher.signature(first), hasher.signature(set(first)))
+    estimate = np.mean(hasher.signature(first) == hasher.signature(second))
+    assert abs(estimate - 1 / 3) < 0.1
+
+
+def test_shingles_of_short_and_empty_texts():
+    assert shingles("Too short", size=5) == {"too short"}
+    assert shingles("...", size=5) == set()
+
+
+def test_find_duplicates_by_url_and_content():
+    edited = ARTICLE.replace("sentence 7 of", "sentence seven of")
+    urls = [
+        "https://www.bbc.com/news/a",
+        "https://bbc.com/news/a?utm_campaign=feed",
+        "https://bbc.com/news/b",
+        None,
+        "https://bbc.com/news/d",
+    ]
+    texts = [ARTICLE, "Other text of the same page", edited, "A different article", ""]
+    duplicate_of, url_duplicates = find_duplicates(urls, texts)
+    assert duplicate_of == {1: 0, 2: 0}
+    assert url_duplicates == {1}
+
+
+def test_find_duplicates_keeps_distinct_articles():
+    texts = [ARTICLE, ARTICLE.replace("healthcare", "energy").replace("medical", "fuel")]
+    assert find_duplicates([None, None], texts) == ({}, set())
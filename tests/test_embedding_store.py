@@ -0,0 +1,159 @@
+import multiprocessing
+import re
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.app.embedding_models import embedding_models
+from src.app.utils.embedding_store import (
+    EmbeddingStore,
+    encode_documents,
+    split_windows,
+    text_key,
+)
+
+
+@pytest.fixture
+def store(tmp_path) -> EmbeddingStore:
+    store = EmbeddingStore(str(tmp_path / "store"))
+    store.add(["a", "b"], np.array([[1, 0, 0], [0, 1, 0]], dtype=np.float32))
+    return store
+
+
+def test_get_returns_stored_rows_and_missing_positions(store):
+    embeddings, missing = store.get(["b", "missing", "a"])
+    assert missing == [1]
+    assert np.array_equal(embeddings, [[0, 1, 0], [0, 0, 0], [1, 0, 0]])
+
+
+def test_add_skips_stored_keys(store):
+    store.add(["a", "c", "c"], np.array([[9, 9, 9], [0, 0, 1], [5, 5, 5]]))
+    assert len(store) == 3
+    embeddings, _ = store.get(["a", "c"])
+    assert np.array_equal(embeddings, [[1, 0, 0], [0, 0, 1]])
+
+
+def test_add_rejects_another_dimension(store):
+    with pytest.raises(ValueError):
+        store.add(["c"], np.ones((1, 4)))
+
+
+def test_store_is_reloaded_from_disk(store):
+    reloaded = EmbeddingStore(store.directory)
+    assert reloaded.dim == 3
+    assert np.array_equal(reloaded.get(["a", "b"])[0], store.get(["a", "b"])[0])
+
+
+def test_vectors_written_without_their_key_are_dropped(store):
+    with open(store.vectors_path, "ab") as file:
+        file.write(np.ones(3, dtype=np.float32).tobytes())
+    reloaded = EmbeddingStore(store.directory)
+    assert len(reloaded) == 2
+    reloaded.add(["c"], np.array([[0, 0, 1]]))
+    assert np.array_equal(EmbeddingStore(store.directory).get(["c"])[0], [[0, 0, 1]])
+
+
+def test_encode_only_encodes_missing_texts(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"))
+    encoded = []
+
+    def encoder(texts):
+        encoded.extend(texts)
+        return np.array([[len(text), 1.0] for text in texts])
+
+    assert np.array_equal(store.encode(["ab", "abc", "ab"], encoder), [[2, 1], [3, 1], [2, 1]])
+    assert np.array_equal(store.encode(["abcd", "ab"], encoder), [[4, 1], [2, 1]])
+    assert encoded == ["ab", "abc", "abcd"]
+    assert text_key("ab") in store
+
+
+def test_similarities_are_computed_block_by_block(store):
+    store.add(["c"], np.array([[0, 0, 1]]))
+    scores = store.similarities(["c", "a", "b"], np.array([1, 2, 3], dtype=np.float32), block_size=2)
+    assert np.array_equal(scores, [3, 1, 2])
+    with pytest.raises(KeyError):
+        store.similarities(["missing"], np.ones(3, dtype=np.float32))
+
+
+def add_rows(directory: str, worker: int):
+    store = EmbeddingStore(directory)
+    for i in range(200):
+        store.add([f"{worker}-{i}"], np.array([[worker, i]]))
+
+
+def test_instances_sharing_a_directory_keep_keys_and_vectors_aligned(store):
+    other = EmbeddingStore(store.directory)
+    other.add(["c"], np.array([[0, 0, 1]]))
+    store.add(["d", "c"], np.array([[1, 1, 1], [9, 9, 9]]))
+    other.add(["e"], np.array([[2, 2, 2]]))
+    reloaded = EmbeddingStore(store.directory)
+    assert len(reloaded) == 5
+    assert np.array_equal(reloaded.get(["c", "d", "e"])[0], [[0, 0, 1], [1, 1, 1], [2, 2, 2]])
+    assert np.array_equal(store.get(["c"])[0], [[0, 0, 1]])
+
+
+def test_processes_appending_to_a_store_keep_keys_and_vectors_aligned(tmp_path):
+    directory = str(tmp_path / "store")
+    EmbeddingStore(directory).add(["seed"], np.zeros((1, 2)))
+    processes = [
+        multiprocessing.Process(target=add_rows, args=(directory, worker))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    store = EmbeddingStore(directory)
+    keys = [f"{worker}-{i}" for worker in range(4) for i in range(200)]
+    embeddings, missing = store.get(keys)
+    assert missing == []
+    assert np.array_equal(embeddings, [[worker, i] for worker in range(4) for i in range(200)])
+
+
+def whitespace_tokenizer(text, **kwargs):
+    return {"offset_mapping": [match.span() for match in re.finditer(r"\S+", text)]}
+
+
+@pytest.fixture
+def fake_model(tmp_path, monkeypatch) -> list[list[str]]:
+    """Embed windows as their counts of "x" and "y" words, recording each encoded batch."""
+    batches = []
+
+    def encode(texts, model_name="", backend=None):
+        batches.append(texts)
+        return np.array(
+            [[text.split().count("x"), text.split().count("y")] for text in texts],
+            dtype=np.float32,
+        )
+
+    model = SimpleNamespace(max_seq_length=6, tokenizer=whitespace_tokenizer)
+    monkeypatch.setattr(embedding_models, "get", lambda model_name="", backend=None: model)
+    monkeypatch.setattr(embedding_models, "encode", encode)
+    monkeypatch.chdir(tmp_path)  # The stores are created in the working directory
+    return batches
+
+
+def test_split_windows_overlap():
+    assert split_windows("a b c d e f", whitespace_tokenizer, 4, overlap_tokens=2) == [
+        ("a b c d", 4),
+        ("c d e f", 4),
+    ]
+    assert split_windows("", whitespace_tokenizer, 4) == [("", 1)]
+
+
+@pytest.mark.parametrize(
+    "pooling, expected", [("mean", [4 * 4 + 4 * 2, 4 * 2]), ("max", [4, 2])]
+)
+def test_encode_documents_pools_the_windows_of_each_document(fake_model, pooling, expected):
+    texts = ["x x x x y y", "y"]
+    store, keys = encode_documents(texts, pooling=pooling, overlap_tokens=2, batch_size=1)
+    # Windows are encoded one batch at a time, without truncating the document
+    assert fake_model == [["x x x x"], ["x x y y"], ["y"]]
+    assert keys == [text_key(text) for text in texts]
+    expected = np.array(expected) / np.linalg.norm(expected)
+    assert np.allclose(store.get(keys)[0], [expected, [0, 1]])
+
+    # Stored documents are not encoded again
+    encode_documents(texts, pooling=pooling, overlap_tokens=2)
+    assert len(fake_model) == 3
+    with pytest.raises(ValueError):
+        encode_documents(texts, pooling="median")
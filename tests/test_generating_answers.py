@@ -0,0 +1,145 @@
+from types import SimpleNamespace
+import pytest
+from src.answer_classes import (
+    AnswerPoint,
+    BatchIntermediateAnswer,
+    FormattedAnswer,
+    IntermediateAnswer,
+    QueryAnswer,
+)
+from src.app import generating_answers
+from src.app.generating_answers import generate_answers_batch, pack_intermediate_answers
+
+
+@pytest.fixture(autouse=True)
+def word_token_count(monkeypatch):
+    # One token per word keeps the budgets readable and avoids loading a tokenizer
+    monkeypatch.setattr(
+        generating_answers, "count_tokens", lambda text, model="gpt-4o": len(text.split())
+    )
+
+
+def answer(*points: tuple[str, int]) -> IntermediateAnswer:
+    return IntermediateAnswer(
+        points=[AnswerPoint(description=d, score=s) for d, s in points]
+    )
+
+
+def test_pack_intermediate_answers_orders_points_by_score():
+    packed = pack_intermediate_answers(
+        {
+            0: answer(("Wages rise", 40)),
+            1: answer(("Drug prices rise", 90), ("Ageing population", 60)),
+        }
+    )
+    assert packed.index("Drug prices rise") < packed.index("Ageing population")
+    assert packed.index("Ageing population") < packed.index("Wages rise")
+    assert "----Community 1 | Importance Score: 90----" in packed
+    assert "----Community 0 | Importance Score: 40----" in packed
+
+
+def test_pack_intermediate_answers_drops_unhelpful_points():
+    packed = pack_intermediate_answers(
+        {0: answer(("Unrelated", 0)), 1: answer(("Relevant", 10))}
+    )
+    assert "Unrelated" not in packed
+    assert "Relevant" in packed
+    assert pack_intermediate_answers({0: answer(("Unrelated", 0))}) == ""
+
+
+def test_pack_intermediate_answers_stops_at_the_token_budget():
+    # Each section is 9 words: 6 for its "----Community N | Importance Score: S----" header
+    answers = {i: answer((f"point number {i}", 100 - i)) for i in range(5)}
+    packed = pack_intermediate_answers(answers, max_tokens=20)
+    assert "point number 0" in packed
+    assert "point number 1" in packed
+    assert "point number 2" not in packed
+
+
+class FakeCompletions:
+    """Chat completions answering from the words shared by the query and the summary."""
+
+    def __init__(self):
+        self.map_calls = []
+        self.reduce_calls = []
+
+    def parse(self, model, messages, response_format):
+        content = messages[-1]["content"]
+        if response_format is BatchIntermediateAnswer:
+            numbered, summary = content.removeprefix("Queries:\n").split("\nSummary: ")
+            queries = [line.split(". ", 1)[1] for line in numbered.split("\n")]
+            self.map_calls.append((summary, queries))
+            answers = [
+                QueryAnswer(
+                    query_index=index,
+                    points=[
+                        AnswerPoint(
+                            description=f"{summary} answers {query}",
+                            score=10 if set(query.split()) & set(summary.split()) else 0,
+                        )
+                    ],
+                )
+                for index, query in enumerate(queries)
+            ]
+            # Indices out of the batch are ignored
+            answers.append(QueryAnswer(query_index=len(queries), points=[]))
+            parsed = BatchIntermediateAnswer(answers=answers)
+        else:
+            self.reduce_calls.append(content)
+            parsed = FormattedAnswer(bullets=[])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(parsed=parsed))])
+
+    def create(self, model, messages):
+        self.reduce_calls.append(messages[-1]["content"])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=messages[-1]["content"]))]
+        )
+
+
+@pytest.fixture
+def client(prompts_dir) -> SimpleNamespace:
+    completions = FakeCompletions()
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=completions),
+        beta=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        completions=completions,
+    )
+
+
+SUMMARIES = ["drug prices", "nhs wages", "football results"]
+
+
+def test_generate_answers_batch_sends_each_summary_once(client):
+    answers = generate_answers_batch(
+        SUMMARIES, ["drug prices rise", "nhs wages"], client
+    )
+    assert [queries for _, queries in client.completions.map_calls] == [
+        ["drug prices rise", "nhs wages"]
+    ] * 3
+    assert len(answers) == 2
+    assert "drug prices answers drug prices rise" in answers[0]
+    assert "nhs wages answers drug prices rise" not in answers[0]
+    assert "nhs wages answers nhs wages" in answers[1]
+
+
+def test_generate_answers_batch_maps_each_summary_with_the_queries_selecting_it(
+    client, fake_embeddings
+):
+    queries = ["drug prices", "nhs wages"]
+    answers = generate_answers_batch(
+        SUMMARIES, queries, client, summary_embeddings=fake_embeddings(SUMMARIES), top_k=1
+    )
+    assert sorted(client.completions.map_calls) == [
+        ("drug prices", ["drug prices"]),
+        ("nhs wages", ["nhs wages"]),
+    ]
+    assert "drug prices answers drug prices" in answers[0]
+
+
+def test_generate_answers_batch_skips_the_reduce_call_without_helpful_points(client):
+    answers = generate_answers_batch(
+        SUMMARIES, ["weather forecast", "drug prices"], client, formatted=True
+    )
+    assert answers[0] == FormattedAnswer(bullets=[])
+    assert isinstance(answers[1], FormattedAnswer)
+    assert len(client.completions.reduce_calls) == 1
@@ -0,0 +1,166 @@
+import random
+from datetime import datetime, timezone
+import pytest
+from src.app import get_urls
+from src.app.get_urls import (
+    Reservoir,
+    filter_urls_by_date,
+    harvest_sitemaps,
+    iter_sitemap_urls,
+    lastmod_date,
+    reservoir_sample,
+)
+from src.app.utils.http_cache import HttpCache
+
+NAMESPACE = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def sitemap_index(*children: tuple[str, str]) -> bytes:
+    entries = "".join(
+        f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>"
+        for loc, lastmod in children
+    )
+    return f"<sitemapindex {NAMESPACE}>{entries}</sitemapindex>".encode()
+
+
+def url_set(*locs: str, lastmod: str = "2024-12-01") -> bytes:
+    entries = "".join(
+        f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc in locs
+    )
+    return f"<urlset {NAMESPACE}>{entries}</urlset>".encode()
+
+
+@pytest.fixture
+def sitemaps(tmp_path, monkeypatch) -> HttpCache:
+    cache = HttpCache(cache_dir=str(tmp_path), offline=True)
+    pages = {
+        "https://site/index.xml": sitemap_index(
+            ("https://site/2024.xml", "2024-12-01"),
+            ("https://site/2023.xml", "2023-06-01"),
+            ("https://site/index.xml", "2024-12-01"),  # Cycle back to the index
+        ),
+        "https://site/2024.xml": url_set("https://site/a", "https://site/b"),
+        "https://site/2023.xml": url_set("https://site/old"),
+    }
+    for url, body in pages.items():
+        cache.store(url, body, {})
+    monkeypatch.setattr(get_urls, "http_cache", cache)
+    return cache
+
+
+def locs(sitemap_url: str, **kwargs) -> list[str]:
+    # Elements are cleared once consumed: read them inside the loop
+    return [
+        url.findtext(f"{{{get_urls.SITEMAP_NAMESPACE}}}loc")
+        for url in iter_sitemap_urls(sitemap_url, **kwargs)
+    ]
+
+
+def test_iter_sitemap_urls_follows_sitemap_indexes(sitemaps):
+    assert locs("https://site/index.xml") == [
+        "https://site/a",
+        "https://site/b",
+        "https://site/old",
+    ]
+
+
+def test_iter_sitemap_urls_skips_filtered_child_sitemaps(sitemaps):
+    assert locs(
+        "https://site/index.xml",
+        sitemap_filter=lambda loc, lastmod: lastmod >= "2024",
+    ) == ["https://site/a", "https://site/b"]
+    assert locs("https://site/index.xml", max_depth=0) == []
+
+
+def test_filter_urls_by_date_only_keeps_urls_modified_after(sitemaps):
+    old = url_set("https://site/a").decode()
+    new = url_set("https://site/new", lastmod="2024-12-20T10:00:00+00:00").decode()
+    entries = old[old.index("<url>") : old.index("</urlset>")]
+    sitemaps.store("https://site/2024.xml", new.replace("<url>", entries + "<url>").encode(), {})
+    # The index lists the child sitemap as modified when the new URL was added
+    sitemaps.store(
+        "https://site/index.xml",
+        sitemap_index(("https://site/2024.xml", "2024-12-20T10:00:00+00:00")),
+        {},
+    )
+
+    def urls(**kwargs) -> list[str]:
+        return sorted(
+            filter_urls_by_date(
+                "https://site/index.xml",
+                {"ns": get_urls.SITEMAP_NAMESPACE},
+                2024,
+                12,
+                lastmod_date,
+                num_articles=10,
+                **kwargs,
+            )
+        )
+
+    assert urls() == ["https://site/a", "https://site/new"]
+    assert urls(modified_after=datetime(2024, 12, 10, tzinfo=timezone.utc)) == [
+        "https://site/new"
+    ]
+    assert urls(modified_after=datetime(2024, 12, 21, tzinfo=timezone.utc)) == []
+
+
+def test_harvest_sitemaps_buckets_urls_by_site_and_month(sitemaps):
+    economist = "https://www.economist.com/finance"
+    sitemaps.store(
+        "https://www.economist.com/sitemap.xml",
+        url_set(
+            f"{economist}/2024/11/05/rates",
+            f"{economist}/2024/12/03/prices",
+            f"{economist}/2024/12/04/wages",
+            f"{economist}/2023/12/01/old",
+        ),
+        {},
+    )
+    sitemaps.store(
+        "https://www.bbc.com/sitemap.xml",
+        url_set("https://www.bbc.com/news/a", "https://www.bbc.com/sport/b"),
+        {},
+    )
+    harvest = harvest_sitemaps(
+        [
+            ("the economist", "https://www.economist.com/sitemap.xml"),
+            ("bbc", "https://www.bbc.com/sitemap.xml"),
+        ],
+        [(2024, 11), (2024, 12)],
+        num_articles=5,
+    )
+    assert harvest[("the economist", 2024, 11)] == [f"{economist}/2024/11/05/rates"]
+    assert sorted(harvest[("the economist", 2024, 12)]) == [
+        f"{economist}/2024/12/03/prices",
+        f"{economist}/2024/12/04/wages",
+    ]
+    # Only the BBC news URLs are kept, bucketed by their lastmod
+    assert harvest[("bbc", 2024, 11)] == []
+    assert harvest[("bbc", 2024, 12)] == ["https://www.bbc.com/news/a"]
+
+
+def test_harvest_sitemaps_without_months_downloads_nothing(sitemaps):
+    assert harvest_sitemaps([("bbc", "https://www.bbc.com/missing.xml")], []) == {}
+    with pytest.raises(ValueError):
+        harvest_sitemaps([("google news", "")], [(2024, 12)])
+
+
+def test_reservoir_keeps_every_item_of_a_short_stream():
+    reservoir = Reservoir(5)
+    for item in range(3):
+        reservoir.add(item)
+    assert reservoir.items == [0, 1, 2]
+    assert reservoir.seen == 3
+
+
+def test_reservoir_sample_is_uniform():
+    random.seed(0)
+    counts = [0] * 10
+    for _ in range(2000):
+        sample = reservoir_sample(range(10), 3)
+        assert len(sample) == len(set(sample)) == 3
+        for item in sample:
+            counts[item] += 1
+    # Each item is expected in 600 of the 2000 samples
+    assert all(500 < count < 700 for count in counts)
+
@@ -0,0 +1,65 @@
+import pytest
+from src.app.utils.html_extraction import (
+    BeautifulSoupExtractor,
+    HtmlExtractor,
+    available_extractors,
+    extract_article,
+    get_extractor,
+    site_selectors,
+)
+from src.benchmarks.html_extraction import load_fixtures
+
+FIXTURES = load_fixtures()
+EXTRACTORS = available_extractors()
+
+ARTICLE = b"""<html><head><title>Page title</title></head><body>
+<nav><p>Menu</p></nav>
+<article><h1>Drug prices</h1><time>1 December 2024</time>
+<h2>First heading</h2><p>First  paragraph.</p><h2>Second heading</h2><p>Second paragraph.</p>
+</article></body></html>"""
+
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+def test_backends_extract_the_article_blocks_in_document_order(name):
+    title, date, content = EXTRACTORS[name].extract(ARTICLE)
+    assert title == "Page title"
+    assert date == "1 December 2024"
+    assert content == "First heading\nFirst paragraph.\nSecond heading\nSecond paragraph."
+
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+def test_backends_skip_pages_without_article(name):
+    page = b"<html><head><title>Index</title></head><body><p>Menu</p></body></html>"
+    assert EXTRACTORS[name].extract(page) == (None, None, None)
+
+
+@pytest.mark.parametrize("url, html", FIXTURES, ids=[url for url, _ in FIXTURES])
+def test_backends_agree_on_the_saved_pages(url, html):
+    reference = BeautifulSoupExtractor().extract(html, site_selectors(url))
+    title, date, content = reference
+    assert title and date and len(content) > 1000
+    for extractor in EXTRACTORS.values():
+        assert extractor.extract(html, site_selectors(url)) == reference
+
+
+def test_site_selectors_are_picked_from_the_host():
+    assert site_selectors("https://www.bbc.com/news/a").title[0] == "article h1"
+    assert site_selectors("https://example.com/a") == site_selectors(None)
+    url, html = FIXTURES[0]
+    assert extract_article(html, url, "beautifulsoup") == BeautifulSoupExtractor().extract(
+        html, site_selectors(url)
+    )
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError):
+        get_extractor("unknown")
+
+
+def test_incomplete_backends_cannot_be_instantiated():
+    class ParseOnlyExtractor(HtmlExtractor):
+        def parse(self, html: bytes):
+            return html
+
+    with pytest.raises(TypeError):
+        ParseOnlyExtractor()
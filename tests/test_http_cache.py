@@ -0,0 +1,58 @@
+import pytest
+from src.app.utils import http_cache as http_cache_module
+from src.app.utils.http_cache import CacheMissError, HttpCache
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict | None = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+@pytest.fixture
+def cache(tmp_path) -> HttpCache:
+    return HttpCache(cache_dir=str(tmp_path))
+
+
+def test_conditional_headers_carry_the_cached_validators(cache):
+    assert cache.conditional_headers("https://site/a") == {}
+    cache.store(
+        "https://site/a",
+        b"body",
+        {"ETag": '"v1"', "Last-Modified": "Sun, 01 Dec 2024 00:00:00 GMT"},
+    )
+    assert cache.conditional_headers("https://site/a") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Sun, 01 Dec 2024 00:00:00 GMT",
+    }
+    cache.store("https://site/b", b"body", {"ETag": '"v2"'})
+    assert cache.conditional_headers("https://site/b") == {"If-None-Match": '"v2"'}
+
+
+def test_not_modified_response_reuses_the_cached_body(cache, monkeypatch):
+    requests_sent = []
+
+    def get(url, headers=None, timeout=None):
+        requests_sent.append(headers or {})
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, b"first body", {"ETag": '"v1"'})
+
+    monkeypatch.setattr(http_cache_module.requests, "get", get)
+    assert cache.fetch("https://site/a") == b"first body"
+    assert cache.fetch("https://site/a") == b"first body"
+    assert requests_sent == [{}, {"If-None-Match": '"v1"'}]
+
+
+def test_offline_cache_only_serves_cached_urls(cache):
+    cache.store("https://site/a", b"body", {})
+    offline = HttpCache(cache_dir=cache.cache_dir, offline=True)
+    assert offline.fetch("https://site/a") == b"body"
+    with pytest.raises(CacheMissError):
+        offline.fetch("https://site/missing")
+
@@ -0,0 +1,83 @@
+import pytest
+from src.app.utils.job_queue import ScrapingJobQueue
+
+URLS = ["https://site/a", "https://site/b", "https://site/c"]
+
+
+@pytest.fixture
+def queue(tmp_path) -> ScrapingJobQueue:
+    queue = ScrapingJobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=60, max_attempts=2)
+    queue.create_run("run", URLS, website="bbc")
+    yield queue
+    queue.close()
+
+
+def expire_leases(queue: ScrapingJobQueue):
+    queue.connection.execute("UPDATE tasks SET leased_until = 0 WHERE state = 'running'")
+
+
+def test_run_id_depends_on_the_parameters_only():
+    assert ScrapingJobQueue.run_id(a=1, b=2) == ScrapingJobQueue.run_id(b=2, a=1)
+    assert ScrapingJobQueue.run_id(a=1) != ScrapingJobQueue.run_id(a=2)
+
+
+def test_tasks_are_leased_to_one_worker_at_a_time(queue):
+    assert queue.has_run("run")
+    assert queue.claim("run", "w1", batch_size=2) == URLS[:2]
+    assert queue.claim("run", "w2", batch_size=2) == URLS[2:]
+    assert queue.claim("run", "w3") == []
+    assert queue.progress("run")["running"] == 3
+
+
+def test_expired_leases_are_handed_out_again_until_max_attempts(queue):
+    queue.claim("run", "w1", batch_size=1)
+    expire_leases(queue)
+    assert queue.claim("run", "w2", batch_size=1) == URLS[:1]
+    expire_leases(queue)
+    # Second attempt of the task expired: it is given up
+    assert queue.claim("run", "w3", batch_size=1) == URLS[1:2]
+    assert queue.progress("run")["failed"] == 1
+
+
+def test_failed_attempts_are_retried(queue):
+    queue.claim("run", "w1", batch_size=1)
+    queue.fail("run", URLS[0], "fetch failed")
+    assert queue.claim("run", "w1", batch_size=1) == URLS[:1]
+    queue.fail("run", URLS[0], "fetch failed")
+    assert queue.progress("run")["failed"] == 1
+    assert URLS[0] not in queue.claim("run", "w1")
+
+
+def test_results_follow_the_order_of_the_run(queue):
+    urls = queue.claim("run", "w1")
+    for url in reversed(urls):
+        queue.complete("run", url, f"Title {url}", "2024-12-01", f"Content {url}")
+    queue.complete("run", URLS[1], None, None, None)
+    results = queue.results("run")
+    assert results["url"].tolist() == [URLS[0], URLS[2]]
+    assert queue.progress("run")["skipped"] == 1
+
+
+def test_articles_fetched_by_another_run_are_not_fetched_again(queue):
+    queue.claim("run", "w1", batch_size=1)
+    queue.complete("run", URLS[0], "Title", "2024-12-01", "Content")
+    queue.create_run("other", [URLS[0], "https://site/d"])
+    assert queue.claim("other", "w1") == ["https://site/d"]
+    assert queue.results("other")["url"].tolist() == [URLS[0]]
+
+
+def test_listing_a_run_again_only_adds_new_urls(queue):
+    queue.claim("run", "w1", batch_size=1)
+    queue.complete("run", URLS[0], "Title", "2024-12-01", "Content")
+    queue.create_run("run", ["https://site/new", *URLS])
+    assert queue.progress("run")["done"] == 1
+    # New URLs come after the existing tasks
+    assert queue.claim("run", "w1") == [*URLS[1:], "https://site/new"]
+
+
+def test_runs_are_capped_at_max_tasks(queue):
+    assert queue.create_run("run", ["https://site/d", "https://site/e"], max_tasks=4) == 1
+    assert queue.create_run("run", ["https://site/f"], max_tasks=4) == 0
+    assert sum(queue.progress("run").values()) == 4
+    assert queue.created_at("run") is not None
+    assert queue.created_at("missing") is None
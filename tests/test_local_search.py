@@ -0,0 +1,27 @@
+from src.app.local_search import collect_chunks
+from src.app.utils.utils import format_property_key
+
+
+def test_chunk_properties_are_stored_with_formatted_keys():
+    # The source file ID of a chunk is not stored under its camelCase name
+    assert format_property_key("sourceFileId") == "sourcefileid"
+
+
+def test_collect_chunks_cites_the_source_file_of_each_chunk(provenance_graph):
+    chunks = collect_chunks(provenance_graph, ["Drug Prices"])
+    assert chunks == [("a.txt", "Drug prices drive inflation.")]
+
+
+def test_collect_chunks_ranks_chunks_linked_to_closer_entities_first(provenance_graph):
+    chunks = collect_chunks(provenance_graph, ["Wages", "Inflation"])
+    assert [source for source, _ in chunks] == ["b.txt", "a.txt"]
+    assert collect_chunks(provenance_graph, ["Wages", "Inflation"], max_chunks=1) == [
+        ("b.txt", "Wages drive inflation.")
+    ]
+
+
+def test_collect_chunks_falls_back_to_the_chunk_id(provenance_graph):
+    provenance_graph.remove_node("a.txt")
+    assert collect_chunks(provenance_graph, ["Drug Prices"]) == [
+        ("a.txt_0", "Drug prices drive inflation.")
+    ]
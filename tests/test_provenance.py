@@ -0,0 +1,29 @@
+from src.app.provenance import ProvenanceIndex, build_provenance_index
+
+
+def test_build_provenance_index_follows_from_relationships(provenance_graph):
+    index = build_provenance_index(
+        provenance_graph, [["Drug Prices", "Inflation"], ["Wages", "b.txt_0"]]
+    )
+    assert index.chunk_files == {"a.txt_0": "a.txt", "b.txt_0": "b.txt"}
+    assert index.entity_chunks["inflation"] == {"a.txt_0", "b.txt_0"}
+    assert index.community_entities == {0: ["Drug Prices", "Inflation"], 1: ["Wages"]}
+    assert index.community_files == {0: {"a.txt", "b.txt"}, 1: {"b.txt"}}
+
+
+def test_entity_files_are_case_insensitive(provenance_graph):
+    index = build_provenance_index(provenance_graph, [])
+    assert index.entity_files("drug prices") == {"a.txt"}
+    assert index.entity_files("Unknown") == set()
+
+
+def test_resolve_sources_prefers_entities_over_communities():
+    index = ProvenanceIndex(
+        entity_chunks={"wages": {"b.txt_0"}},
+        chunk_files={"a.txt_0": "a.txt", "b.txt_0": "b.txt"},
+        community_files={0: {"a.txt", "b.txt"}, 1: {"c.txt"}},
+    )
+    assert index.resolve_sources([0], ["Wages"]) == ["b.txt"]
+    # Unresolved entities fall back to the communities
+    assert index.resolve_sources([1, 0], ["Unknown"]) == ["a.txt", "b.txt", "c.txt"]
+    assert index.resolve_sources([2]) == []
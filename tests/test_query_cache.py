@@ -0,0 +1,59 @@
+import pytest
+from src.app import query_cache
+from src.app.query_cache import QueryCache
+
+
+@pytest.fixture
+def cache(monkeypatch, fake_embeddings) -> QueryCache:
+    monkeypatch.setattr(query_cache, "embed_texts", fake_embeddings)
+    return QueryCache(max_entries=2, similarity_threshold=0.95)
+
+
+ANSWER = ("Prices rise.", ["a.txt"])
+
+
+def test_exact_query_hits(cache):
+    cache.put("s1", "v1", "What drives inflation?", ANSWER)
+    assert cache.get("s1", "v1", "  what DRIVES inflation?") == ANSWER
+
+
+def test_paraphrase_hits_above_threshold(cache):
+    cache.put("s1", "v1", "What drives inflation?", ANSWER)
+    assert cache.get("s1", "v1", "what drives inflation") == ANSWER
+    assert cache.get("s1", "v1", "Who funds the NHS?") is None
+
+
+def test_answers_are_keyed_by_mode(cache):
+    cache.put("s1", "v1", "What drives inflation?", ANSWER, mode="Global/Single pass")
+    assert cache.get("s1", "v1", "What drives inflation?", "Global/Single pass") == ANSWER
+    assert cache.get("s1", "v1", "What drives inflation?", "Global/Reduce + edit") is None
+    assert cache.get("s1", "v1", "What drives inflation?", "Local/Single pass") is None
+
+
+def test_new_index_version_drops_the_session_entries(cache):
+    cache.put("s1", "v1", "What drives inflation?", ANSWER)
+    cache.put("s2", "v1", "What drives inflation?", ANSWER)
+    assert cache.get("s1", "v2", "What drives inflation?") is None
+    assert cache.get("s1", "v1", "What drives inflation?") is None
+    assert cache.get("s2", "v1", "What drives inflation?") == ANSWER
+
+
+def test_answer_of_a_previous_version_is_not_cached(cache):
+    assert cache.get("s1", "v2", "What drives inflation?") is None
+    cache.put("s1", "v1", "What drives inflation?", ANSWER)
+    assert cache.get("s1", "v2", "What drives inflation?") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.put("s1", "v1", "first query", ANSWER)
+    cache.put("s1", "v1", "second query", ANSWER)
+    cache.get("s1", "v1", "first query")
+    cache.put("s1", "v1", "third query", ANSWER)
+    assert cache.get("s1", "v1", "first query") == ANSWER
+    assert cache.get("s1", "v1", "second query") is None
+
+
+def test_entries_expire_after_the_ttl(cache):
+    cache.ttl = 0
+    cache.put("s1", "v1", "What drives inflation?", ANSWER)
+    assert cache.get("s1", "v1", "What drives inflation?") is None
@@ -0,0 +1,114 @@
+import gc
+import pickle
+import threading
+import time
+import pytest
+from src.app import session_store as session_store_module
+from src.app.session_store import (
+    SessionStore,
+    load_session_index,
+    precomputed_answers_file,
+    session_files,
+    session_version,
+)
+
+
+def write_session(session_id: str, summaries: list[str]):
+    with open(session_files(session_id)["community_summaries"], "wb") as f:
+        pickle.dump(summaries, f)
+
+
+@pytest.fixture
+def session_id(tmp_path) -> str:
+    session_id = str(tmp_path / "session")
+    write_session(session_id, ["Summary 1"])
+    return session_id
+
+
+def test_load_session_index_reads_the_session_files(session_id):
+    session = load_session_index(session_id)
+    assert session.community_summaries == ["Summary 1"]
+    assert session.graph is None and session.summary_embeddings is None
+    assert session.version == session_version(session_id)
+    assert session.precomputed_answers == {}
+
+
+def test_precomputed_answers_of_another_version_are_ignored(session_id):
+    answers = {"query": ("Answer", ["a.txt"])}
+    with open(precomputed_answers_file(session_id), "wb") as f:
+        pickle.dump({"version": session_version(session_id), "answers": answers}, f)
+    assert load_session_index(session_id).precomputed_answers == answers
+
+    write_session(session_id, ["Summary 1", "Summary 2"])
+    assert load_session_index(session_id).precomputed_answers == {}
+
+
+def test_missing_session_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SessionStore().get(str(tmp_path / "missing"))
+
+
+def test_sessions_are_loaded_once_and_reloaded_when_rewritten(session_id):
+    store = SessionStore()
+    session = store.get(session_id)
+    assert store.get(session_id) is session
+
+    write_session(session_id, ["Summary 1", "Summary 2"])
+    reloaded = store.get(session_id)
+    assert reloaded is not session
+    assert reloaded.community_summaries == ["Summary 1", "Summary 2"]
+
+    store.invalidate(session_id)
+    assert store.get(session_id) is not reloaded
+
+
+def test_least_recently_used_sessions_are_evicted(tmp_path):
+    store = SessionStore(max_sessions=2)
+    ids = [str(tmp_path / f"session{i}") for i in range(3)]
+    for session_id in ids:
+        write_session(session_id, [session_id])
+    first = store.get(ids[0])
+    store.get(ids[1])
+    store.get(ids[0])
+    store.get(ids[2])
+    assert list(store._entries) == [ids[0], ids[2]]
+    assert store.get(ids[0]) is first
+
+
+def test_concurrent_first_loads_are_coalesced(session_id, monkeypatch):
+    loads = []
+
+    def slow_load(session_id):
+        loads.append(session_id)
+        time.sleep(0.1)
+        return load_session_index(session_id)
+
+    monkeypatch.setattr(session_store_module, "load_session_index", slow_load)
+    store = SessionStore()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(store.get(session_id)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [session_id]
+    assert all(result is results[0] for result in results)
+    # Load locks only live while a load is in progress
+    gc.collect()
+    assert len(store._load_locks) == 0
+
+
+def test_precomputed_answers_are_only_served_in_their_mode(session_id):
+    answers = {"query": ("Answer", ["a.txt"])}
+    with open(precomputed_answers_file(session_id), "wb") as f:
+        pickle.dump({"version": session_version(session_id), "answers": answers}, f)
+    session = load_session_index(session_id)
+    assert session.precomputed_answer("query", "Global", "Single pass") == answers["query"]
+    assert session.precomputed_answer("other", "Global", "Single pass") is None
+    assert session.precomputed_answer("query", "Global", "Reduce") is None
+    assert session.precomputed_answer("query", "Local", "Single pass") is None
+    assert session.precomputed_answer("query", "Global", "Single pass", top_k=3) is None
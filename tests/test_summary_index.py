@@ -0,0 +1,28 @@
+import numpy as np
+from src.app.summary_index import build_summary_index, rank_summaries
+
+SUMMARIES = [
+    "Drug prices and medical inflation in the NHS.",
+    "Football results of the weekend.",
+    "Wages of NHS staff and healthcare inflation.",
+]
+
+
+def test_build_summary_index_of_no_summary_is_empty():
+    assert build_summary_index([]).shape == (0, 0)
+    assert rank_summaries("inflation", np.zeros((0, 0), dtype=np.float32)) == []
+
+
+def test_rank_summaries_keeps_the_most_similar_first(fake_embeddings):
+    index = fake_embeddings(SUMMARIES)
+    ranked = rank_summaries("NHS inflation", index)
+    assert sorted(ranked) == [0, 1, 2]
+    assert ranked[-1] == 1
+    assert rank_summaries("NHS inflation", index, top_k=2) == ranked[:2]
+
+
+def test_rank_summaries_drops_summaries_below_the_threshold(fake_embeddings):
+    index = fake_embeddings(SUMMARIES)
+    ranked = rank_summaries("NHS inflation", index, similarity_threshold=0.3)
+    assert 1 not in ranked
+    assert ranked